@@ -0,0 +1,109 @@
+"""``diff_jobs`` against ``DeepDiff(ignore_order=True)`` on job pairs.
+
+Each pair is a realistic Elastic ML job and a modified copy: detectors and
+influencers are shuffled, one detector function and the bucket span change,
+an influencer is added and the datafeed query, which grows with ``--terms``,
+gets one extra term. Results are printed as JSON lines.
+
+    python benchmarks/bench_diff.py --detectors 5 50 --terms 100 5000
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from deepdiff import DeepDiff  # noqa: E402
+
+from ml_json_cli.diffing import diff_jobs  # noqa: E402
+
+
+def make_job(detectors, terms):
+    return {
+        "description": "Security: rare process activity",
+        "groups": "security, windows, process",
+        "analysis_config": {
+            "bucket_span": "15m",
+            "detectors": [
+                {
+                    "detector_index": i,
+                    "detector_description": f"rare process for host {i}",
+                    "function": "rare",
+                    "by_field_name": "process.name",
+                    "partition_field_name": f"host.field_{i}",
+                    "custom_rules": [{"actions": ["skip_result"], "scope": {}}],
+                }
+                for i in range(detectors)
+            ],
+            "influencers": [f"influencer.{i}" for i in range(detectors)],
+        },
+        "analysis_limits": {"model_memory_limit": "256mb"},
+        "datafeed_config": {
+            "indices": ["logs-*", "winlogbeat-*"],
+            "query": {
+                "bool": {
+                    "filter": [
+                        {"terms": {"event.code": [str(i) for i in range(terms)]}}
+                    ]
+                }
+            },
+        },
+        "custom_settings": {"created_by": "ml-module-windows"},
+    }
+
+
+def modify(job, rng):
+    new = copy.deepcopy(job)
+    config = new["analysis_config"]
+    rng.shuffle(config["detectors"])
+    rng.shuffle(config["influencers"])
+    config["detectors"][0]["function"] = "freq_rare"
+    config["bucket_span"] = "1h"
+    config["influencers"].append("user.name")
+    query = new["datafeed_config"]["query"]["bool"]["filter"][0]["terms"]
+    query["event.code"].append("extra")
+    return new
+
+
+def time_ms(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return round(statistics.median(samples), 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--detectors", type=int, nargs="+", default=[5, 50])
+    parser.add_argument("--terms", type=int, nargs="+", default=[100, 5000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    for detectors in args.detectors:
+        for terms in args.terms:
+            old = make_job(detectors, terms)
+            new = modify(old, rng)
+            result = {
+                "detectors": detectors,
+                "terms": terms,
+                "changes": len(diff_jobs(old, new)),
+                "diff_jobs_ms": time_ms(lambda: diff_jobs(old, new), args.repeat),
+                "deepdiff_ms": time_ms(
+                    lambda: DeepDiff(old, new, ignore_order=True), args.repeat
+                ),
+            }
+            result["speedup"] = round(result["deepdiff_ms"] / result["diff_jobs_ms"], 1)
+            print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
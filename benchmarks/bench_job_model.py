@@ -0,0 +1,137 @@
+"""Per-row CPU and memory of ``Job`` objects vs fully decoded dicts.
+
+Stored rows of a synthetic fleet (see ``fleet.py``) are turned into jobs the
+way commands used to, decoding every JSON field into a dict, and with
+``Job.from_row``, which decodes a field on first access. For each scenario
+the CPU time per row and the memory retained per row (measured with
+``tracemalloc`` while every result is held) are printed as JSON lines:
+
+``wrap``
+    Build the job only, as ``export --fields`` and the shell cache do before
+    touching any field.
+``attributes``
+    Read the attributes shown by ``search``/``stats`` (bucket span, memory
+    limit, creator, detectors), which never need the datafeed.
+``diff``
+    ``diff_jobs`` between two revisions of each job where only the bucket
+    span and memory limit changed.
+
+    python benchmarks/bench_job_model.py --jobs 10000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import fleet  # noqa: E402
+from ml_json_cli.diffing import diff_jobs  # noqa: E402
+from ml_json_cli.json_parser import (  # noqa: E402
+    JOB_FIELDS,
+    JSON_FIELDS,
+    Job,
+    normalize_job,
+)
+
+
+def decode_dict(row):
+    """Decode every JSON field of a stored row, as commands did before ``Job``."""
+    job = {field: row[field] for field in JOB_FIELDS}
+    for field in JSON_FIELDS:
+        job[field] = json.loads(job[field]) if job[field] else {}
+    return job
+
+
+def dict_attributes(row):
+    job = decode_dict(row)
+    config = job["analysis_config"]
+    return (
+        config.get("bucket_span"),
+        job["analysis_limits"].get("model_memory_limit"),
+        job["custom_settings"].get("created_by"),
+        tuple(
+            (detector.get("detector_index", position), detector.get("function"))
+            for position, detector in enumerate(config.get("detectors") or [])
+        ),
+    )
+
+
+def job_attributes(row):
+    attributes = Job.from_row(row).attributes()
+    return (
+        attributes.bucket_span,
+        attributes.model_memory_limit,
+        attributes.created_by,
+        attributes.detectors,
+    )
+
+
+SCENARIOS = {
+    "wrap": {"dict": decode_dict, "job": Job.from_row},
+    "attributes": {"dict": dict_attributes, "job": job_attributes},
+    "diff": {
+        "dict": lambda pair: diff_jobs(decode_dict(pair[0]), decode_dict(pair[1])),
+        "job": lambda pair: diff_jobs(Job.from_row(pair[0]), Job.from_row(pair[1])),
+    },
+}
+
+
+def stored_rows(jobs):
+    """Return two revisions of each job as stored ``jobs`` rows (dicts)."""
+    pairs = []
+    for index in range(jobs):
+        old, new = fleet.make_job(index), fleet.make_job(index)
+        config = new["job"]["analysis_config"]
+        config["bucket_span"] = "2h"
+        new["job"]["analysis_limits"]["model_memory_limit"] = "2gb"
+        pairs.append(
+            tuple(normalize_job(document)._asdict() for document in (old, new))
+        )
+    return pairs
+
+
+def measure(func, items):
+    started = time.process_time()
+    for item in items:
+        func(item)
+    cpu = time.process_time() - started
+
+    tracemalloc.start()
+    results = [func(item) for item in items]
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del results
+    return cpu, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=10000)
+    args = parser.parse_args()
+
+    pairs = stored_rows(args.jobs)
+    rows = [old for old, _ in pairs]
+    for scenario, models in SCENARIOS.items():
+        items = pairs if scenario == "diff" else rows
+        for model, func in models.items():
+            cpu, retained = measure(func, items)
+            print(
+                json.dumps(
+                    {
+                        "scenario": scenario,
+                        "model": model,
+                        "jobs": len(items),
+                        "cpu_us_per_row": round(cpu / len(items) * 1e6, 2),
+                        "bytes_per_row": round(retained / len(items)),
+                    }
+                ),
+                flush=True,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Latency of ``merge`` over a large version history.
+
+A fleet of ``--jobs`` synthetic jobs with ``--versions`` stored versions
+each (100k versions by default) is written straight into a fresh database.
+Each strategy is then timed as a dry run and as a real merge against a copy
+of that database, next to the previous implementation that queried and
+updated one job at a time. Results are printed as JSON lines.
+
+    python benchmarks/bench_merge.py --jobs 10000 --versions 10
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ml_json_cli import db  # noqa: E402
+from ml_json_cli.json_parser import content_hash  # noqa: E402
+from ml_json_cli.merge import STRATEGIES, merge_jobs  # noqa: E402
+from ml_json_cli.search_index import reindex_jobs  # noqa: E402
+from ml_json_cli.versions import JOB_FIELDS, read_version  # noqa: E402
+
+
+def make_fields(job, version):
+    analysis_config = {
+        "bucket_span": f"{15 + version % 3 * 15}m",
+        "detectors": [{"detector_index": 0, "function": "rare"}],
+        "influencers": ["host.name", "user.name"],
+    }
+    analysis_limits = {"model_memory_limit": f"{64 + version % 2 * 64}mb"}
+    datafeed_config = {"indices": ["logs-*"], "query": {"match_all": {}}}
+    custom_settings = {"created_by": "bench"}
+    description = f"Job {job} revision {version // 4}"
+    groups = "security, windows"
+    fields = (
+        description,
+        groups,
+        json.dumps(analysis_config),
+        json.dumps(analysis_limits),
+        json.dumps(datafeed_config),
+        json.dumps(custom_settings),
+    )
+    digest = content_hash(
+        description,
+        groups,
+        analysis_config,
+        analysis_limits,
+        datafeed_config,
+        custom_settings,
+    )
+    return fields, digest
+
+
+def build(path, jobs, versions):
+    db.DB_FILE = path
+    conn = db.get_db_connection()
+    placeholders = ", ".join("?" for _ in JOB_FIELDS)
+    for job in range(jobs):
+        job_id = f"job_{job:06d}"
+        rows = []
+        for version in range(1, versions + 1):
+            fields, digest = make_fields(job, version)
+            rows.append((job_id, version, digest) + fields)
+        current, digest = make_fields(job, versions + 1)
+        conn.execute(
+            f"""
+            INSERT INTO jobs (job_id, {", ".join(JOB_FIELDS)}, content_hash,
+                              current_version)
+            VALUES (?, {placeholders}, ?, ?)
+            """,
+            (job_id,) + current + (digest, versions),
+        )
+        conn.executemany(
+            f"""
+            INSERT INTO job_versions (job_id, version, content_hash,
+                                      {", ".join(JOB_FIELDS)})
+            VALUES (?, ?, ?, {placeholders})
+            """,
+            rows,
+        )
+    conn.commit()
+    conn.close()
+
+
+PER_JOB_SQL = {
+    "latest": "SELECT * FROM job_versions WHERE job_id = ? ORDER BY version DESC LIMIT 1",
+    "earliest": "SELECT * FROM job_versions WHERE job_id = ? ORDER BY version LIMIT 1",
+    "most_common": """
+        SELECT * FROM job_versions
+        WHERE job_id = ? AND content_hash = (
+            SELECT content_hash FROM job_versions WHERE job_id = ?
+            GROUP BY content_hash ORDER BY COUNT(*) DESC, MAX(version) DESC LIMIT 1
+        )
+        ORDER BY version DESC LIMIT 1
+    """,
+}
+
+
+def merge_per_job(conn, strategy):
+    """The previous implementation: one query and one UPDATE per job."""
+    cursor = conn.cursor()
+    job_ids = [
+        row[0]
+        for row in cursor.execute(
+            "SELECT job_id FROM job_versions GROUP BY job_id HAVING COUNT(*) > 1"
+        )
+    ]
+    for job_id in job_ids:
+        params = (job_id, job_id) if strategy == "most_common" else (job_id,)
+        version = cursor.execute(PER_JOB_SQL[strategy], params).fetchone()
+        fields = read_version(conn, job_id, version["version"])
+        cursor.execute(
+            f"""
+            UPDATE jobs SET {", ".join(f"{field} = ?" for field in JOB_FIELDS)},
+                            content_hash = ?, last_updated = CURRENT_TIMESTAMP
+            WHERE job_id = ?
+            """,
+            tuple(fields[field] for field in JOB_FIELDS)
+            + (version["content_hash"], job_id),
+        )
+    reindex_jobs(cursor, job_ids)
+    conn.commit()
+
+
+def run(source, path, strategy, variant):
+    shutil.copy(source, path)
+    db.DB_FILE = path
+    conn = db.get_db_connection()
+    versions = conn.execute("SELECT COUNT(*) FROM job_versions").fetchone()[0]
+    started = time.perf_counter()
+    if variant == "per_job":
+        merge_per_job(conn, strategy)
+    else:
+        merge_jobs(
+            conn,
+            {field: strategy for field in JOB_FIELDS},
+            dry_run=variant == "dry_run",
+        )
+    elapsed = time.perf_counter() - started
+    conn.close()
+    os.remove(path)
+    return {
+        "strategy": strategy,
+        "variant": variant,
+        "versions": versions,
+        "seconds": round(elapsed, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=10000)
+    parser.add_argument("--versions", type=int, default=10)
+    parser.add_argument(
+        "--strategies", nargs="+", default=list(STRATEGIES), choices=STRATEGIES
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.db")
+        build(source, args.jobs, args.versions)
+        for strategy in args.strategies:
+            for variant in ("per_job", "dry_run", "set_based"):
+                result = run(source, os.path.join(tmp, "run.db"), strategy, variant)
+                print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Insert latency of version allocation as ``job_versions`` grows.
+
+Compares the legacy ``increment_version`` trigger (``COUNT``/``MAX`` scans
+over an unindexed table) with the indexed ``jobs.current_version`` counter
+used by ``JobWriter``. For every size the history is bulk-filled, then
+individual snapshot inserts are timed. Results are printed as JSON lines.
+
+    python benchmarks/bench_version_alloc.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ml_json_cli import db  # noqa: E402
+from ml_json_cli.loader import SNAPSHOT_SQL, UPSERT_SQL  # noqa: E402
+
+PAYLOAD = json.dumps({"bucket_span": "15m", "detectors": [{"function": "rare"}]})
+
+LEGACY_SCHEMA = """
+    CREATE TABLE jobs (
+        job_id TEXT PRIMARY KEY, description TEXT, groups TEXT,
+        analysis_config TEXT, analysis_limits TEXT, datafeed_config TEXT,
+        custom_settings TEXT, last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE TABLE job_versions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT, version INTEGER,
+        description TEXT, groups TEXT, analysis_config TEXT, analysis_limits TEXT,
+        datafeed_config TEXT, custom_settings TEXT,
+        timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+"""
+
+LEGACY_TRIGGER = """
+    CREATE TRIGGER increment_version AFTER INSERT ON job_versions
+    FOR EACH ROW
+    WHEN (SELECT COUNT(*) FROM job_versions WHERE job_id = NEW.job_id) > 0
+    BEGIN
+        UPDATE job_versions SET version = (
+            SELECT MAX(version) + 1 FROM job_versions WHERE job_id = NEW.job_id
+        ) WHERE id = NEW.id;
+    END;
+"""
+
+LEGACY_SNAPSHOT_SQL = """
+    INSERT INTO job_versions (job_id, version, description, groups, analysis_config,
+                              analysis_limits, datafeed_config, custom_settings, timestamp)
+    SELECT job_id, (SELECT IFNULL(MAX(version), 0) + 1 FROM job_versions WHERE job_id = ?),
+           description, groups, analysis_config, analysis_limits,
+           datafeed_config, custom_settings, last_updated
+    FROM jobs WHERE job_id = ?
+"""
+
+
+def job_row(job_id):
+    return (job_id, "", "bench", PAYLOAD, "{}", "{}", "{}")
+
+
+def fill(conn, size, jobs):
+    """Bulk insert ``size`` history rows spread over ``jobs`` jobs."""
+    conn.executemany(
+        "INSERT INTO jobs (job_id, description, groups, analysis_config, analysis_limits,"
+        " datafeed_config, custom_settings) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (job_row(f"job_{i}") for i in range(jobs)),
+    )
+    conn.executemany(
+        "INSERT INTO job_versions (job_id, version, analysis_config) VALUES (?, ?, ?)",
+        ((f"job_{i % jobs}", i // jobs + 1, PAYLOAD) for i in range(size)),
+    )
+    conn.commit()
+
+
+def prepare_legacy(path, size, jobs):
+    conn = sqlite3.connect(path)
+    conn.executescript(LEGACY_SCHEMA)
+    fill(conn, size, jobs)
+    conn.executescript(LEGACY_TRIGGER)
+    return conn
+
+
+def prepare_indexed(path, size, jobs):
+    db.DB_FILE = path
+    db.init_db()
+    conn = sqlite3.connect(path)
+    fill(conn, size, jobs)
+    conn.execute(
+        "UPDATE jobs SET current_version = ("
+        "SELECT MAX(version) FROM job_versions v WHERE v.job_id = jobs.job_id)"
+    )
+    conn.commit()
+    return conn
+
+
+def time_inserts(conn, scheme, size, samples, jobs):
+    latencies = []
+    for i in range(samples):
+        job_id = f"job_{(i * 7919) % jobs}"
+        started = time.perf_counter()
+        if scheme == "legacy":
+            conn.execute(LEGACY_SNAPSHOT_SQL, (job_id, job_id))
+        else:
+            conn.execute(SNAPSHOT_SQL, (job_id,))
+            conn.execute(UPSERT_SQL, job_row(job_id))
+        conn.commit()
+        latencies.append((time.perf_counter() - started) * 1e6)
+    latencies.sort()
+    return {
+        "scheme": scheme,
+        "rows": size,
+        "samples": samples,
+        "p50_us": round(statistics.median(latencies), 1),
+        "p99_us": round(latencies[min(len(latencies) - 1, int(samples * 0.99))], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--samples", type=int, default=50)
+    parser.add_argument(
+        "--schemes",
+        nargs="+",
+        default=["legacy", "indexed"],
+        choices=["legacy", "indexed"],
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            for scheme in args.schemes:
+                path = os.path.join(tmp, f"{scheme}_{size}.db")
+                prepare = prepare_legacy if scheme == "legacy" else prepare_indexed
+                conn = prepare(path, size, args.jobs)
+                result = time_inserts(conn, scheme, size, args.samples, args.jobs)
+                conn.close()
+                os.remove(path)
+                print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Size and latency of ``full`` vs ``delta`` version storage.
+
+A synthetic job with a large datafeed query is loaded ``--versions`` times,
+changing its bucket span, model memory limit or query terms on each load, as
+module upgrades and tuning do. For each storage mode the database size after
+``VACUUM`` and the p50/p99 latency of writing a version and of reading a
+random version with ``read_version`` are printed as JSON lines.
+
+    python benchmarks/bench_version_storage.py --versions 1000
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ml_json_cli import db  # noqa: E402
+from ml_json_cli.json_parser import normalize_job  # noqa: E402
+from ml_json_cli.loader import JobWriter  # noqa: E402
+from ml_json_cli.versions import read_version  # noqa: E402
+
+
+def make_document(version, terms):
+    return {
+        "job": {
+            "job_id": "bench_job",
+            "description": "Security: rare process activity",
+            "groups": ["security", "windows"],
+            "analysis_config": {
+                "bucket_span": f"{15 + version % 4 * 15}m",
+                "detectors": [
+                    {
+                        "detector_index": i,
+                        "function": "rare",
+                        "by_field_name": "process",
+                    }
+                    for i in range(10)
+                ],
+                "influencers": ["host.name", "user.name", "process.name"],
+            },
+            "analysis_limits": {"model_memory_limit": f"{64 + version % 3 * 64}mb"},
+            "custom_settings": {"created_by": "ml-module-windows"},
+        },
+        "datafeed": {
+            "indices": ["logs-*", "winlogbeat-*"],
+            "query": {
+                "bool": {
+                    "filter": [
+                        {
+                            "terms": {
+                                "event.code": [
+                                    str(i) for i in range(terms + version // 50)
+                                ]
+                            }
+                        }
+                    ]
+                }
+            },
+        },
+    }
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def run(mode, path, versions, terms, reads):
+    db.DB_FILE = path
+    conn = db.get_db_connection()
+    db.set_setting(conn, "version_storage", mode)
+    conn.commit()
+
+    writes = []
+    with JobWriter(conn, batch_size=1) as writer:
+        for version in range(versions + 1):
+            row = normalize_job(make_document(version, terms))
+            started = time.perf_counter()
+            writer.add(row)
+            writer.flush()
+            writes.append((time.perf_counter() - started) * 1000)
+
+    rng = random.Random(7)
+    stored = conn.execute("SELECT MAX(version) FROM job_versions").fetchone()[0]
+    read_times = []
+    for _ in range(reads):
+        version = rng.randint(1, stored)
+        started = time.perf_counter()
+        read_version(conn, "bench_job", version)
+        read_times.append((time.perf_counter() - started) * 1000)
+
+    conn.execute("VACUUM")
+    conn.close()
+    return {
+        "mode": mode,
+        "versions": stored,
+        "db_bytes": os.path.getsize(path),
+        "write_p50_ms": round(statistics.median(writes), 3),
+        "write_p99_ms": round(percentile(writes, 0.99), 3),
+        "read_p50_ms": round(statistics.median(read_times), 3),
+        "read_p99_ms": round(percentile(read_times, 0.99), 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--versions", type=int, default=1000)
+    parser.add_argument("--terms", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=500)
+    parser.add_argument(
+        "--modes", nargs="+", default=["full", "delta"], choices=["full", "delta"]
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in args.modes:
+            path = os.path.join(tmp, f"{mode}.db")
+            result = run(mode, path, args.versions, args.terms, args.reads)
+            print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
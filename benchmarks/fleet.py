@@ -0,0 +1,144 @@
+"""Synthetic Elastic ML fleets shaped like ``sample.json``.
+
+Every job is derived from its index alone, so the same fleet is generated on
+every run and machine. Jobs belong to a module (which sets their groups,
+``created_by`` and datafeed indices), have one to eight detectors with
+descriptions, influencers and a datafeed query whose ``terms`` list varies
+in size. Each revision of the fleet retunes every job: its bucket span,
+model memory limit, first detector function and query terms change, so
+loading ``versions`` revisions gives every job ``versions - 1`` stored
+versions.
+
+    python benchmarks/fleet.py --jobs 10000 --versions 5 --out /tmp/fleet
+"""
+
+import argparse
+import json
+import os
+import random
+
+MODULES = (
+    ("security", "windows", "winlogbeat-*"),
+    ("security", "linux", "auditbeat-*"),
+    ("security", "network", "packetbeat-*"),
+    ("apm", "transactions", "apm-*"),
+    ("siem", "auth", "logs-system.auth-*"),
+    ("nginx", "access", "filebeat-*"),
+)
+FUNCTIONS = ("rare", "count", "high_count", "high_distinct_count", "mean", "max")
+# Functions that analyse a field's values rather than counting events.
+METRIC_FUNCTIONS = ("high_distinct_count", "mean", "max")
+FIELDS = (
+    "process.name",
+    "process.parent.name",
+    "user.name",
+    "host.name",
+    "source.ip",
+    "destination.port",
+    "event.action",
+    "url.path",
+)
+BUCKET_SPANS = ("5m", "12m", "15m", "30m", "1h")
+MEMORY_LIMITS = ("16mb", "32mb", "64mb", "128mb", "256mb", "1gb")
+
+
+def job_id(index):
+    return f"bench_{MODULES[index % len(MODULES)][1]}_{index:06d}"
+
+
+def make_detector(position, function, field):
+    detector = {
+        "detector_description": f"Detects {function} {field} per host.",
+        "function": function,
+        "partition_field_name": "host.name",
+        "detector_index": position,
+    }
+    detector["field_name" if function in METRIC_FUNCTIONS else "by_field_name"] = field
+    return detector
+
+
+def make_job(index, revision=0):
+    """Return the export document of job ``index`` at ``revision``."""
+    rng = random.Random(index)
+    group, subgroup, pattern = MODULES[index % len(MODULES)]
+    detectors = [
+        (rng.choice(FUNCTIONS), rng.choice(FIELDS)) for _ in range(rng.randint(1, 8))
+    ]
+    field = detectors[0][1]
+    detectors[0] = (FUNCTIONS[(index + revision) % len(FUNCTIONS)], field)
+    detectors = [
+        make_detector(position, function, name)
+        for position, (function, name) in enumerate(detectors)
+    ]
+    terms = rng.randint(5, 200) + revision
+    return {
+        "job": {
+            "job_id": job_id(index),
+            "custom_settings": {
+                "job_revision": revision,
+                "created_by": f"ml-module-{group}-{subgroup}",
+            },
+            "groups": [group, subgroup],
+            "description": f"{group.title()}: {subgroup} - unusual "
+            f"{field} activity (job {index}).",
+            "analysis_config": {
+                "bucket_span": BUCKET_SPANS[(index + revision) % len(BUCKET_SPANS)],
+                "detectors": detectors,
+                "influencers": rng.sample(FIELDS, 3),
+                "model_prune_window": "30d",
+            },
+            "analysis_limits": {
+                "model_memory_limit": MEMORY_LIMITS[
+                    (index + revision) % len(MEMORY_LIMITS)
+                ],
+                "categorization_examples_limit": 4,
+            },
+            "data_description": {
+                "time_field": "@timestamp",
+                "time_format": "epoch_ms",
+            },
+            "model_snapshot_retention_days": 10,
+        },
+        "datafeed": {
+            "datafeed_id": f"datafeed-{job_id(index)}",
+            "job_id": job_id(index),
+            "indices": [pattern, "logs-*"],
+            "query": {
+                "bool": {
+                    "filter": [
+                        {"term": {"event.category": group}},
+                        {"terms": {"event.code": [str(i) for i in range(terms)]}},
+                    ]
+                }
+            },
+        },
+    }
+
+
+def write_fleet(directory, jobs, versions):
+    """Write one NDJSON file per revision and return their paths in order."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for revision in range(versions):
+        path = os.path.join(directory, f"fleet_r{revision}.ndjson")
+        with open(path, "w", encoding="utf-8") as f:
+            for index in range(jobs):
+                f.write(json.dumps(make_job(index, revision)))
+                f.write("\n")
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--versions", type=int, default=3)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    for path in write_fleet(args.out, args.jobs, args.versions):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
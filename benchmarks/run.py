@@ -0,0 +1,228 @@
+"""Time the CLI over synthetic fleets and report JSON results.
+
+For each ``--scales`` job count a fleet is generated with ``fleet.py`` and
+loaded revision by revision into a fresh database, then every command is
+timed: ``search`` with each filter, ``compare``, ``history``, ``export``,
+``merge`` and ``undo``. Every run is a separate process that invokes the
+command in-process and reports its wall time and peak RSS, so interpreter
+startup is excluded and memory is measured per command.
+
+Each scenario reports ``p50_ms``, ``p99_ms``, ``throughput_per_s`` (jobs
+or rows handled per second, or commands per second) and ``peak_rss_bytes``.
+With ``--baseline`` the p50 of every scenario is compared with an earlier
+result file and the run fails when one regressed by more than
+``--tolerance``.
+
+    python benchmarks/run.py --scales 1000 10000 100000 --output results.json
+    python benchmarks/run.py --scales 1000 --baseline results.json
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, ROOT)
+
+import fleet  # noqa: E402
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def child(args):
+    """Run one CLI command in this process and print its measurements."""
+    from ml_json_cli.cli import cli
+    from ml_json_cli.perf import peak_rss_bytes
+
+    started = time.perf_counter()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        cli.main(args=args, prog_name="mlcli", standalone_mode=False)
+    elapsed = time.perf_counter() - started
+    print(json.dumps({"seconds": elapsed, "peak_rss_bytes": peak_rss_bytes()}))
+
+
+def invoke(workdir, args):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", "--", *args],
+        cwd=workdir,
+        capture_output=True,
+        text=True,
+        env=dict(os.environ, PYTHONPATH=ROOT),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"mlcli {' '.join(args)} failed:\n{result.stderr}")
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def summarize(scale, versions, scenario, measurements, items):
+    seconds = [m["seconds"] for m in measurements]
+    rss = [m["peak_rss_bytes"] for m in measurements if m["peak_rss_bytes"]]
+    return {
+        "scale": scale,
+        "versions": versions,
+        "scenario": scenario,
+        "runs": len(seconds),
+        "p50_ms": round(statistics.median(seconds) * 1000, 3),
+        "p99_ms": round(percentile(seconds, 0.99) * 1000, 3),
+        "throughput_per_s": round(items * len(seconds) / sum(seconds), 2),
+        "peak_rss_bytes": max(rss) if rss else None,
+    }
+
+
+def read_scenarios(jobs):
+    """Return ``(name, args, items)`` for the read-only commands."""
+    target = fleet.job_id(jobs // 2)
+    return [
+        ("search_job_id", ["search", "--job-id", target], 1),
+        ("search_fuzzy", ["search", "--fuzzy", target[:-2]], 1),
+        ("search_text", ["search", "--text", "unusual process"], 1),
+        ("search_group", ["search", "--group", "windows"], 1),
+        ("search_bucket_span", ["search", "--bucket-span", "15m"], 1),
+        ("search_influencers", ["search", "--influencers", "host.name,user.name"], 1),
+        (
+            "search_created_by",
+            ["search", "--created-by", "ml-module-apm-transactions"],
+            1,
+        ),
+        ("search_model_memory_limit", ["search", "--model-memory-limit", "64mb"], 1),
+        ("search_detector_function", ["search", "--detector-function", "rare"], 1),
+        (
+            "search_date_range",
+            ["search", "--start-date", "2000-01-01", "--end-date", "2999-01-01"],
+            1,
+        ),
+        ("compare", ["compare", "--job-id", target], 1),
+        ("history", ["history", "--job-id", target], 1),
+        ("history_as_of", ["history", "--as-of", "2999-01-01"], jobs),
+        ("merge_dry_run", ["merge", "--dry-run"], jobs),
+    ]
+
+
+def run_scale(jobs, versions, repeat, tmp):
+    workdir = os.path.join(tmp, f"fleet_{jobs}")
+    paths = fleet.write_fleet(workdir, jobs, versions)
+    results = []
+
+    loads = [invoke(workdir, ["load", path]) for path in paths]
+    results.append(summarize(jobs, versions, "load", loads, jobs))
+    reloads = [invoke(workdir, ["load", paths[-1]]) for _ in range(repeat)]
+    results.append(summarize(jobs, versions, "load_unchanged", reloads, jobs))
+
+    for name, args, items in read_scenarios(jobs):
+        runs = [invoke(workdir, args) for _ in range(repeat)]
+        results.append(summarize(jobs, versions, name, runs, items))
+
+    for name, extra, items in (
+        ("export_history", [], jobs * (versions - 1)),
+        ("export_current", ["--current"], jobs),
+    ):
+        args = ["export", "--all", "--format", "ndjson", "--output", "out.ndjson"]
+        runs = [invoke(workdir, args + extra) for _ in range(repeat)]
+        results.append(summarize(jobs, versions, name, runs, items))
+
+    undos = [invoke(workdir, ["undo", fleet.job_id(index)]) for index in range(repeat)]
+    results.append(summarize(jobs, versions, "undo", undos, 1))
+    merge = invoke(workdir, ["merge"])
+    results.append(summarize(jobs, versions, "merge", [merge], jobs))
+
+    for result in results:
+        print(
+            f"{jobs:>7} {result['scenario']:<28} p50 {result['p50_ms']:>10.1f} ms",
+            file=sys.stderr,
+        )
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "commit": commit or None,
+    }
+
+
+def regressions(results, baseline, tolerance):
+    """Return the scenarios whose p50 grew by more than ``tolerance``."""
+    before = {(r["scale"], r["scenario"]): r for r in baseline["results"]}
+    slower = []
+    for result in results:
+        previous = before.get((result["scale"], result["scenario"]))
+        if previous and result["p50_ms"] > previous["p50_ms"] * (1 + tolerance):
+            slower.append(
+                {
+                    "scale": result["scale"],
+                    "scenario": result["scenario"],
+                    "baseline_p50_ms": previous["p50_ms"],
+                    "p50_ms": result["p50_ms"],
+                }
+            )
+    return slower
+
+
+def main():
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[3:])
+        return
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--versions", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--output", help="Write the JSON report here (default: stdout)."
+    )
+    parser.add_argument("--baseline", help="Earlier report to check for regressions.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = []
+        for jobs in args.scales:
+            results.extend(run_scale(jobs, args.versions, args.repeat, tmp))
+
+    report = {"environment": environment(), "results": results}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            report["regressions"] = regressions(results, json.load(f), args.tolerance)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    for regression in report.get("regressions", []):
+        print(
+            f"Regression: {regression['scenario']} at {regression['scale']} jobs, "
+            f"p50 {regression['baseline_p50_ms']} -> {regression['p50_ms']} ms",
+            file=sys.stderr,
+        )
+    if report.get("regressions"):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
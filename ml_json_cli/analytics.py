@@ -0,0 +1,208 @@
+"""Typed columns extracted from stored jobs, with vectorized group-by.
+
+``extract_columns`` reads ``jobs`` and/or ``job_versions`` into NumPy
+arrays: categorical columns as strings (``MISSING`` when absent) and
+numeric columns as ``float64`` with ``nan`` for values that are missing or
+cannot be parsed. Attributes are pulled with ``json_extract`` in SQL; only
+versions kept in delta storage are decoded in Python.
+"""
+
+import numpy as np
+
+from ml_json_cli.json_parser import Job, parse_duration, parse_memory
+from ml_json_cli.versions import version_fields
+
+MISSING = "-"
+
+CATEGORY_COLUMNS = (
+    "job_id",
+    "group",
+    "bucket_span",
+    "model_memory_limit",
+    "created_by",
+)
+METRIC_COLUMNS = ("model_memory_bytes", "bucket_span_seconds", "detector_count")
+AGGREGATES = ("count", "sum", "mean", "min", "max")
+SOURCES = ("jobs", "versions", "all")
+
+EXTRACT_CHUNK_SIZE = 1000
+
+
+def _extract(column, path):
+    return f"CASE WHEN json_valid({column}) THEN json_extract({column}, '{path}') END"
+
+
+ATTRIBUTE_COLUMNS = f"""
+    {_extract("analysis_config", "$.bucket_span")} AS bucket_span,
+    {_extract("analysis_limits", "$.model_memory_limit")} AS model_memory_limit,
+    {_extract("custom_settings", "$.created_by")} AS created_by,
+    CASE WHEN json_valid(analysis_config)
+         THEN json_array_length(analysis_config, '$.detectors') END AS detector_count
+"""
+
+SOURCE_SQL = {
+    "jobs": f"""
+        SELECT job_id, current_version + 1 AS version, groups, NULL AS encoding,
+               {ATTRIBUTE_COLUMNS}
+        FROM jobs
+    """,
+    "versions": f"""
+        SELECT job_id, version, groups, encoding, {ATTRIBUTE_COLUMNS}
+        FROM job_versions
+    """,
+}
+
+
+def _decoded_attributes(conn, row):
+    """Return the attribute values of an encoded ``job_versions`` row."""
+    fields = version_fields(
+        conn,
+        row["job_id"],
+        conn.execute(
+            "SELECT * FROM job_versions WHERE job_id = ? AND version = ?",
+            (row["job_id"], row["version"]),
+        ).fetchone(),
+    )
+
+    job = Job.from_row(fields, row["job_id"])
+    attributes = job.attributes()
+    config = job.analysis_config
+    detectors = config.get("detectors") if isinstance(config, dict) else None
+    return (
+        job.groups,
+        attributes.bucket_span,
+        attributes.model_memory_limit,
+        attributes.created_by,
+        len(detectors) if isinstance(detectors, list) else None,
+    )
+
+
+def _category(value):
+    return MISSING if value is None or value == "" else str(value)
+
+
+def extract_columns(conn, source="jobs"):
+    """Return a dict of equally long NumPy arrays, one row per job version.
+
+    ``source`` is ``jobs`` (current definitions), ``versions`` (history) or
+    ``all``. ``groups`` holds the raw ``", "``-joined groups of each row.
+    """
+    sources = ("jobs", "versions") if source == "all" else (source,)
+    rows = {name: [] for name in ("job_id", "version", "groups") + CATEGORY_COLUMNS[2:]}
+    rows["detector_count"] = []
+    for name in sources:
+        cursor = conn.execute(SOURCE_SQL[name])
+        while chunk := cursor.fetchmany(EXTRACT_CHUNK_SIZE):
+            for row in chunk:
+                if row["encoding"] is not None:
+                    values = _decoded_attributes(conn, row)
+                else:
+                    values = (
+                        row["groups"],
+                        row["bucket_span"],
+                        row["model_memory_limit"],
+                        row["created_by"],
+                        row["detector_count"],
+                    )
+                groups, bucket_span, memory, created_by, detectors = values
+                rows["job_id"].append(row["job_id"])
+                rows["version"].append(row["version"])
+                rows["groups"].append(groups or "")
+                rows["bucket_span"].append(bucket_span)
+                rows["model_memory_limit"].append(memory)
+                rows["created_by"].append(created_by)
+                rows["detector_count"].append(detectors)
+
+    memory = [parse_memory(value) for value in rows["model_memory_limit"]]
+    spans = [parse_duration(value) for value in rows["bucket_span"]]
+    return {
+        "job_id": np.array(rows["job_id"], dtype=str),
+        "version": np.array(rows["version"], dtype=np.int64),
+        "groups": np.array(rows["groups"], dtype=str),
+        "bucket_span": np.array([_category(v) for v in rows["bucket_span"]], dtype=str),
+        "model_memory_limit": np.array(
+            [_category(v) for v in rows["model_memory_limit"]], dtype=str
+        ),
+        "created_by": np.array([_category(v) for v in rows["created_by"]], dtype=str),
+        "model_memory_bytes": np.array(
+            [np.nan if v is None else v for v in memory], dtype=np.float64
+        ),
+        "bucket_span_seconds": np.array(
+            [np.nan if v is None else v for v in spans], dtype=np.float64
+        ),
+        "detector_count": np.array(
+            [np.nan if v is None else v for v in rows["detector_count"]],
+            dtype=np.float64,
+        ),
+    }
+
+
+def explode_groups(columns):
+    """Repeat every row once per job group, adding a ``group`` column.
+
+    Rows of jobs without groups are kept once with ``group`` set to
+    ``MISSING``.
+    """
+    split = [
+        groups.split(", ") if groups else [MISSING] for groups in columns["groups"]
+    ]
+    repeats = np.array([len(groups) for groups in split], dtype=np.int64)
+    exploded = {name: np.repeat(values, repeats) for name, values in columns.items()}
+    exploded["group"] = np.array(
+        [group for groups in split for group in groups], dtype=str
+    )
+    return exploded
+
+
+def group_by(columns, keys, metric, aggregates=AGGREGATES):
+    """Aggregate ``metric`` over the distinct combinations of ``keys``.
+
+    Returns ``(labels, results)`` where ``labels`` is a list of key tuples
+    sorted by key and ``results`` maps each aggregate to an array aligned
+    with ``labels``. ``count`` counts rows; the other aggregates ignore
+    ``nan`` values and are ``nan`` for groups without any value.
+    """
+    size = len(columns[metric])
+    codes = np.zeros(size, dtype=np.int64)
+    for key in keys:
+        uniques, inverse = np.unique(columns[key], return_inverse=True)
+        codes = codes * len(uniques) + inverse
+    group_codes, first, groups = np.unique(
+        codes, return_index=True, return_inverse=True
+    )
+    count = len(group_codes)
+
+    values = columns[metric]
+    valid = ~np.isnan(values)
+    valid_groups = groups[valid]
+    valid_values = values[valid]
+    present = np.bincount(valid_groups, minlength=count)
+
+    results = {}
+    if "count" in aggregates:
+        results["count"] = np.bincount(groups, minlength=count)
+    totals = np.bincount(valid_groups, weights=valid_values, minlength=count)
+    if "sum" in aggregates:
+        results["sum"] = np.where(present > 0, totals, np.nan)
+    if "mean" in aggregates:
+        with np.errstate(invalid="ignore", divide="ignore"):
+            results["mean"] = np.where(present > 0, totals / present, np.nan)
+    if "min" in aggregates:
+        minimum = np.full(count, np.inf)
+        np.minimum.at(minimum, valid_groups, valid_values)
+        results["min"] = np.where(present > 0, minimum, np.nan)
+    if "max" in aggregates:
+        maximum = np.full(count, -np.inf)
+        np.maximum.at(maximum, valid_groups, valid_values)
+        results["max"] = np.where(present > 0, maximum, np.nan)
+
+    labels = [tuple(str(columns[key][index]) for key in keys) for index in first]
+    return labels, results
+
+
+def write_parquet(columns, path):
+    """Write ``columns`` to a Parquet file; requires the optional pyarrow."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    pq.write_table(pa.table({name: values for name, values in columns.items()}), path)
@@ -0,0 +1,127 @@
+"""Append-only record of mutating commands.
+
+Each run of ``load``, ``merge``, ``undo`` or ``storage`` that changes the
+database adds one ``audit_log`` row (command, arguments, user, duration) and
+one ``audit_log_jobs`` row per job it wrote, with the job's content hash
+before and after. ``AuditLog`` buffers the job rows and writes them with
+``executemany`` inside the command's own transactions, just before each
+commit, so auditing never adds a commit per job.
+"""
+
+import getpass
+import json
+import time
+
+import click
+
+from ml_json_cli.db import TIMESTAMP_FORMAT
+
+INSERT_ENTRY_SQL = """
+    INSERT INTO audit_log (command, arguments, user) VALUES (?, ?, ?)
+"""
+
+INSERT_JOBS_SQL = """
+    INSERT OR REPLACE INTO audit_log_jobs (audit_id, job_id, old_hash, new_hash)
+    VALUES (?, ?, ?, ?)
+"""
+
+
+def current_user():
+    try:
+        return getpass.getuser()
+    except (KeyError, OSError):
+        return None
+
+
+class AuditLog:
+    """Audit record of one command run against ``conn``.
+
+    Nothing is written until ``flush``, which the command calls before each
+    commit; ``finish`` records the duration and must also be followed by a
+    commit. A run that never flushes leaves no entry.
+    """
+
+    def __init__(self, conn, command, arguments):
+        self.conn = conn
+        self.command = command
+        self.arguments = arguments
+        self.audit_id = None
+        self.job_count = 0
+        self.started = time.perf_counter()
+        self._jobs = {}
+
+    @classmethod
+    def from_context(cls, conn):
+        """Start a record for the click command being invoked."""
+        ctx = click.get_current_context()
+        return cls(conn, ctx.info_name, ctx.params)
+
+    def record(self, job_id, old_hash, new_hash):
+        """Note that ``job_id`` changed from ``old_hash`` to ``new_hash``."""
+        self._jobs[job_id] = (old_hash, new_hash)
+
+    def flush(self):
+        """Write the entry (once) and the buffered job rows; the caller commits."""
+        if self.audit_id is None:
+            cursor = self.conn.execute(
+                INSERT_ENTRY_SQL,
+                (
+                    self.command,
+                    json.dumps(self.arguments, default=str, separators=(",", ":")),
+                    current_user(),
+                ),
+            )
+            self.audit_id = cursor.lastrowid
+        if self._jobs:
+            self.conn.executemany(
+                INSERT_JOBS_SQL,
+                [
+                    (self.audit_id, job_id, old_hash, new_hash)
+                    for job_id, (old_hash, new_hash) in self._jobs.items()
+                ],
+            )
+            self.job_count += len(self._jobs)
+            self._jobs = {}
+
+    def finish(self):
+        """Flush and store the duration and job count; the caller commits."""
+        self.flush()
+        self.conn.execute(
+            "UPDATE audit_log SET duration_ms = ?, job_count = ? WHERE id = ?",
+            (
+                round((time.perf_counter() - self.started) * 1000, 3),
+                self.job_count,
+                self.audit_id,
+            ),
+        )
+
+
+def query_entries(conn, since=None, until=None, job_id=None, command=None, limit=100):
+    """Return audit entries, newest first, filtered by time, job and command.
+
+    ``since`` and ``until`` are UTC ``datetime`` bounds (inclusive and
+    exclusive). With ``job_id`` each row also carries that job's
+    ``old_hash`` and ``new_hash``.
+    """
+    conditions, params = [], []
+    if since:
+        conditions.append("a.timestamp >= ?")
+        params.append(since.strftime(TIMESTAMP_FORMAT))
+    if until:
+        conditions.append("a.timestamp < ?")
+        params.append(until.strftime(TIMESTAMP_FORMAT))
+    if command:
+        conditions.append("a.command = ?")
+        params.append(command)
+    if job_id:
+        source = "audit_log_jobs j JOIN audit_log a ON a.id = j.audit_id"
+        columns = "a.*, j.old_hash, j.new_hash"
+        conditions.append("j.job_id = ?")
+        params.append(job_id)
+    else:
+        source, columns = "audit_log a", "a.*"
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return conn.execute(
+        f"SELECT {columns} FROM {source} {where} ORDER BY a.id DESC LIMIT ?",
+        params + [limit],
+    ).fetchall()
@@ -1,87 +1,85 @@
-import sys
-import shlex
-import readline
-import argcomplete
-import click
-from rich.console import Console
-from ml_json_cli.commands.load import load
-from ml_json_cli.commands.search import search
-from ml_json_cli.commands.compare import compare
-from ml_json_cli.commands.export import export
-from ml_json_cli.commands.history import history
-from ml_json_cli.commands.merge import merge
-from ml_json_cli.commands.undo import undo
-from ml_json_cli.db import get_db_connection
-
-
-console = Console()
+import os
+import importlib
 
+import click
 
-@click.group()
+from ml_json_cli import perf
+
+# Command modules are imported only when their command is looked up, so
+# that e.g. ``mlcli history`` never pays for rich, ijson or rapidfuzz.
+COMMANDS = {
+    "load": "ml_json_cli.commands.load:load",
+    "search": "ml_json_cli.commands.search:search",
+    "compare": "ml_json_cli.commands.compare:compare",
+    "drift": "ml_json_cli.commands.drift:drift",
+    "export": "ml_json_cli.commands.export:export",
+    "history": "ml_json_cli.commands.history:history",
+    "merge": "ml_json_cli.commands.merge:merge",
+    "undo": "ml_json_cli.commands.undo:undo",
+    "storage": "ml_json_cli.commands.storage:storage",
+    "stats": "ml_json_cli.commands.stats:stats",
+    "audit": "ml_json_cli.commands.audit:audit",
+    "validate": "ml_json_cli.commands.validate:validate",
+    "shell": "ml_json_cli.commands.shell:shell",
+}
+
+
+class LazyGroup(click.Group):
+    """A click group that imports its commands on first use."""
+
+    def __init__(self, *args, lazy_commands=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
+
+    def list_commands(self, ctx):
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+
+    def get_command(self, ctx, cmd_name):
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            module_name, attr = self.lazy_commands[cmd_name].split(":")
+            with perf.phase("import"):
+                module = importlib.import_module(module_name)
+            self.add_command(getattr(module, attr), cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+
+@click.group(cls=LazyGroup, lazy_commands=COMMANDS)
+@click.option(
+    "--profile",
+    is_flag=True,
+    expose_value=False,
+    callback=perf.profile_option,
+    help="Print a breakdown of where the command spent its time to stderr.",
+)
+@click.option(
+    "--trace-sql",
+    is_flag=True,
+    expose_value=False,
+    callback=perf.profile_option,
+    help="Count and time every SQL statement (implies --profile).",
+)
+@click.option(
+    "--profile-format",
+    type=click.Choice(["text", "json"]),
+    expose_value=False,
+    callback=perf.profile_option,
+    help="Format of the profile breakdown (implies --profile).",
+)
+@click.option(
+    "--profile-out",
+    type=click.Path(dir_okay=False, writable=True),
+    expose_value=False,
+    callback=perf.profile_option,
+    help="Also run under cProfile and write pstats data here (implies --profile).",
+)
 def cli():
     """Elastic ML CLI - Manage and Compare ML Jobs"""
 
 
-cli.add_command(load)
-cli.add_command(search)
-cli.add_command(compare)
-cli.add_command(export)
-cli.add_command(history)
-cli.add_command(merge)
-cli.add_command(undo)
-
-argcomplete.autocomplete(cli)
-
-
-def get_job_ids():
-    """Fetches job IDs from the database for auto-completion."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute("SELECT job_id FROM jobs")
-    job_ids = [row[0] for row in cursor.fetchall()]
-    conn.close()
-    return job_ids
-
-
-def completer(text, state):
-    """Auto-completes available commands and job IDs."""
-    commands = cli.list_commands(ctx=None)
-    job_ids = get_job_ids()
-    options = commands + job_ids
-    matches = [c for c in options if c.startswith(text)]
-    return matches[state] if state < len(matches) else None
-
-
-def setup_readline():
-    """Enables history and tab completion in the interactive shell."""
-    if sys.platform in ["darwin", "linux"]:
-        readline.parse_and_bind("tab: complete")
-        readline.set_completer(completer)
-        readline.set_history_length(1000)
-
-
-@cli.command()
-def shell():
-    """Start an interactive CLI session (mlcli>)"""
-    console.print(
-        "[bold green]Entering interactive mode. Type 'exit' or 'quit' to leave.[/bold green]"
-    )
-
-    setup_readline()
+if "_ARGCOMPLETE" in os.environ:
+    import argcomplete
 
-    while True:
-        try:
-            command = input("mlcli> ").strip()
-            if command.lower() in {"exit", "quit"}:
-                console.print("[bold yellow]Exiting mlcli...[/bold yellow]")
-                break
-            if command:
-                cli.main(prog_name="mlcli", args=shlex.split(command))
-        except KeyboardInterrupt:
-            console.print("\n[bold yellow]Use 'exit' or 'quit' to leave.[/bold yellow]")
-        except EOFError:
-            console.print("\n[bold yellow]Exiting mlcli...[/bold yellow]")
-            break
+    argcomplete.autocomplete(cli)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,71 @@
+"""Query the audit log of mutating commands."""
+
+import click
+from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
+from ml_json_cli.audit_log import query_entries
+from ml_json_cli.db import DATETIME_FORMATS, get_db_connection
+
+console = Console()
+
+
+def short_hash(value):
+    return value[:12] if value else "-"
+
+
+@click.command()
+@click.option(
+    "--since",
+    type=click.DateTime(DATETIME_FORMATS),
+    help="Only entries at or after this UTC time.",
+)
+@click.option(
+    "--until",
+    type=click.DateTime(DATETIME_FORMATS),
+    help="Only entries before this UTC time.",
+)
+@click.option("--job-id", type=str, help="Only entries that wrote this job.")
+@click.option("--command", type=str, help="Only entries of this command, e.g. load.")
+@click.option(
+    "--limit",
+    type=click.IntRange(min=1),
+    default=50,
+    show_default=True,
+    help="Maximum number of entries to show.",
+)
+def audit(since, until, job_id, command, limit):
+    """Show who ran load, merge, undo or storage, and which jobs they wrote."""
+    conn = get_db_connection()
+    entries = query_entries(
+        conn, since=since, until=until, job_id=job_id, command=command, limit=limit
+    )
+    conn.close()
+
+    if not entries:
+        console.print("[yellow]No audit entries found.[/yellow]")
+        return
+
+    table = Table(title=f"Audit log for {job_id}" if job_id else "Audit log")
+    table.add_column("Time (UTC)", style="cyan")
+    table.add_column("Command")
+    table.add_column("User")
+    table.add_column("Arguments")
+    table.add_column("Jobs", justify="right")
+    table.add_column("Duration", justify="right")
+    if job_id:
+        table.add_column("Old hash")
+        table.add_column("New hash")
+    for entry in entries:
+        row = [
+            entry["timestamp"],
+            entry["command"],
+            entry["user"] or "-",
+            escape(entry["arguments"]),
+            str(entry["job_count"]),
+            f"{entry['duration_ms'] or 0:.0f} ms",
+        ]
+        if job_id:
+            row += [short_hash(entry["old_hash"]), short_hash(entry["new_hash"])]
+        table.add_row(*row)
+    console.print(table)
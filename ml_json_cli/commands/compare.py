@@ -2,11 +2,13 @@
 
 import json
 import click
-from deepdiff import DeepDiff
 from rich.console import Console
 from rich.table import Table
 from rich import box
 from ml_json_cli.db import get_db_connection
+from ml_json_cli.diffing import diff_jobs
+from ml_json_cli.perf import phase
+from ml_json_cli.versions import fetch_job
 
 console = Console()
 
@@ -39,15 +41,7 @@ def compare(job_id, version1, version2, latest, show_json):
     conn = get_db_connection()
     cursor = conn.cursor()
 
-    cursor.execute(
-        """
-        SELECT description, groups, analysis_config, analysis_limits,
-               datafeed_config, custom_settings
-        FROM jobs WHERE job_id = ?
-        """,
-        (job_id,),
-    )
-    latest_job = cursor.fetchone()
+    latest_job = fetch_job(conn, job_id)
 
     if not latest_job:
         console.print(f"[red]Error: No current version found for job '{job_id}'.[/red]")
@@ -56,9 +50,7 @@ def compare(job_id, version1, version2, latest, show_json):
     # Fetch the most recent previous version from `job_versions`
     cursor.execute(
         """
-        SELECT version, description, groups, analysis_config, analysis_limits,
-               datafeed_config, custom_settings
-        FROM job_versions
+        SELECT version FROM job_versions
         WHERE job_id = ? ORDER BY version DESC LIMIT 1
         """,
         (job_id,),
@@ -84,54 +76,17 @@ def compare(job_id, version1, version2, latest, show_json):
     if latest:
         version2 = "latest"
 
-    if version1 != "latest":
-        cursor.execute(
-            """
-            SELECT description, groups, analysis_config, analysis_limits,
-                   datafeed_config, custom_settings
-            FROM job_versions WHERE job_id = ? AND version = ?
-            """,
-            (job_id, version1),
-        )
-        version1_data = cursor.fetchone()
-    else:
-        version1_data = latest_job
-
-    if version2 != "latest":
-        cursor.execute(
-            """
-            SELECT description, groups, analysis_config, analysis_limits,
-                   datafeed_config, custom_settings
-            FROM job_versions WHERE job_id = ? AND version = ?
-            """,
-            (job_id, version2),
-        )
-        version2_data = cursor.fetchone()
-    else:
-        version2_data = latest_job
+    old_data = latest_job if version1 == "latest" else fetch_job(conn, job_id, version1)
+    new_data = latest_job if version2 == "latest" else fetch_job(conn, job_id, version2)
 
-    if not version1_data or not version2_data:
+    if not old_data or not new_data:
         console.print(
             f"[red]Error: One or both versions not found for job '{job_id}'.[/red]"
         )
         return
 
-    old_data = {key: version1_data[key] for key in version1_data.keys()}
-    new_data = {key: version2_data[key] for key in version2_data.keys()}
-
-    for key in [
-        "analysis_config",
-        "analysis_limits",
-        "datafeed_config",
-        "custom_settings",
-    ]:
-        try:
-            old_data[key] = json.loads(old_data[key]) if old_data[key] else {}
-            new_data[key] = json.loads(new_data[key]) if new_data[key] else {}
-        except json.JSONDecodeError:
-            console.print(f"[red]Error: Invalid JSON in field '{key}'[/red]")
-
-    diff = DeepDiff(old_data, new_data, ignore_order=True)
+    with phase("diff"):
+        diff = diff_jobs(old_data, new_data)
 
     if not diff:
         console.print("[green]No changes detected.[/green]")
@@ -151,22 +106,13 @@ def compare(job_id, version1, version2, latest, show_json):
     table.add_column("Old Value", style="red", min_width=30)
     table.add_column("New Value", style="green", min_width=30)
 
-    if "values_changed" in diff:
-        for field, change in diff["values_changed"].items():
-            clean_field = field.replace("root['", "").replace("']", "")
-            table.add_row(
-                clean_field, str(change["old_value"]), str(change["new_value"])
-            )
-
-    if "dictionary_item_added" in diff:
-        for field in diff["dictionary_item_added"]:
-            clean_field = field.replace("root['", "").replace("']", "")
-            table.add_row(clean_field, "-", str(new_data.get(clean_field, "-")))
-
-    if "dictionary_item_removed" in diff:
-        for field in diff["dictionary_item_removed"]:
-            clean_field = field.replace("root['", "").replace("']", "")
-            table.add_row(clean_field, str(old_data.get(clean_field, "-")), "-")
+    for change in diff:
+        table.add_row(
+            change["path"].lstrip("/"),
+            str(change.get("old", "-")),
+            str(change.get("value", "-")),
+        )
 
-    console.print(table)
+    with phase("render"):
+        console.print(table)
     conn.close()
@@ -0,0 +1,114 @@
+"""Fleet-wide drift report over every job in the database."""
+
+import collections
+import json
+import os
+import re
+import time
+
+import click
+from rich.console import Console
+from rich.table import Table
+from ml_json_cli.db import get_db_connection
+from ml_json_cli.drift import (
+    iter_baseline_pairs,
+    iter_drift,
+    iter_previous_pairs,
+    load_baseline,
+)
+
+console = Console()
+
+# List positions and JSON Patch "-" appends are folded so that changes to
+# e.g. different detectors are counted under the same field.
+POSITION_RE = re.compile(r"/(\d+|-)(?=/|$)")
+
+
+def field_path(path):
+    """Return ``path`` with list positions replaced by ``*``."""
+    return POSITION_RE.sub("/*", path)
+
+
+@click.command()
+@click.option(
+    "--baseline",
+    type=click.Path(),
+    multiple=True,
+    help="Job export (file, directory or glob) to compare against instead of "
+    "each job's previous version. May be repeated.",
+)
+@click.option(
+    "--output",
+    type=click.Path(dir_okay=False, writable=True, allow_dash=True),
+    help="Write one NDJSON record per drifted job ('-' for stdout).",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=os.cpu_count() or 1,
+    show_default="CPU count",
+    help="Processes used to diff jobs.",
+)
+@click.option(
+    "--top",
+    type=click.IntRange(min=0),
+    default=10,
+    show_default=True,
+    help="Number of most frequently changed fields to list.",
+)
+def drift(baseline, output, workers, top):
+    """Report which jobs changed, and how, across the whole fleet.
+
+    Every job is compared with its previous version, or with the matching
+    job in --baseline. Without a baseline, jobs that were never changed
+    count as unchanged.
+    """
+    out = console if output != "-" else Console(stderr=True)
+    if baseline:
+        try:
+            baseline_jobs = load_baseline(baseline)
+        except FileNotFoundError as e:
+            out.print(f"[red]Error: No such file or directory: {e}[/red]")
+            return
+        except ValueError as e:
+            out.print(f"[red]Error: Failed to parse baseline: {e}[/red]")
+            return
+
+    conn = get_db_connection()
+    started = time.perf_counter()
+    total = conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+    if baseline:
+        pairs = iter_baseline_pairs(conn, baseline_jobs)
+    else:
+        pairs = iter_previous_pairs(conn)
+
+    statuses = collections.Counter()
+    fields = collections.Counter()
+    with click.open_file(output or os.devnull, "w", encoding="utf-8") as f:
+        for record in iter_drift(pairs, workers=workers):
+            statuses[record["status"]] += 1
+            fields.update({field_path(op["path"]) for op in record["changes"]})
+            if record["status"] != "unchanged":
+                f.write(json.dumps(record) + "\n")
+    conn.close()
+    elapsed = time.perf_counter() - started
+
+    summary = Table(title="Drift summary")
+    summary.add_column("Status", style="cyan")
+    summary.add_column("Jobs", justify="right")
+    summary.add_row("changed", str(statuses["changed"]))
+    if baseline:
+        summary.add_row("new", str(statuses["new"]))
+        summary.add_row("missing", str(statuses["missing"]))
+    summary.add_row("unchanged", str(total - statuses["changed"] - statuses["new"]))
+    out.print(summary)
+
+    if fields and top:
+        table = Table(title="Most changed fields")
+        table.add_column("Field", style="cyan")
+        table.add_column("Jobs", justify="right")
+        for path, count in fields.most_common(top):
+            table.add_row(path, str(count))
+        out.print(table)
+
+    out.print(f"Compared {total} job(s) in {elapsed:.2f}s")
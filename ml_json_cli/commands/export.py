@@ -1,54 +1,144 @@
 import click
-import json
-import csv
-from ml_json_cli.db import get_db_connection
+from ml_json_cli.db import DATETIME_FORMATS, TIMESTAMP_FORMAT, get_db_connection
+from ml_json_cli.streaming import (
+    COMPRESSIONS,
+    WRITERS,
+    infer_compression,
+    open_output,
+)
+from ml_json_cli.json_parser import Job
+from ml_json_cli.versions import AS_OF_SQL, JOB_FIELDS, version_fields
 from rich.console import Console
 
 console = Console()
 
+EXPORT_FIELDS = ("job_id", "version", "timestamp", "content_hash") + JOB_FIELDS
+EXPORT_CHUNK_SIZE = 500
+
+HISTORY_SQL = f"""
+    SELECT job_id, version, timestamp, content_hash, encoding, payload,
+           {", ".join(JOB_FIELDS)}
+    FROM job_versions {{where}} ORDER BY job_id, version
+"""
+
+# The current definition is reported as the version it will be snapshotted as.
+CURRENT_SQL = f"""
+    SELECT job_id, current_version + 1 AS version, last_updated AS timestamp,
+           content_hash, NULL AS encoding, NULL AS payload, {", ".join(JOB_FIELDS)}
+    FROM jobs {{where}} ORDER BY job_id
+"""
+
+
+def parse_fields(value):
+    """Split a comma-separated ``--fields`` value, validating every name."""
+    if not value:
+        return list(EXPORT_FIELDS)
+    fields = [field.strip() for field in value.split(",") if field.strip()]
+    unknown = [field for field in fields if field not in EXPORT_FIELDS]
+    if unknown:
+        raise click.BadParameter(
+            f"unknown field(s) {', '.join(unknown)}; "
+            f"choose from {', '.join(EXPORT_FIELDS)}",
+            param_hint="--fields",
+        )
+    return fields
+
+
+def iter_export_records(conn, sql, params, fields, decode):
+    """Yield one record per row of ``sql``, fetching rows in chunks.
+
+    Versions kept in delta storage are rebuilt only when a job field is
+    exported; ``decode`` turns JSON fields into nested objects.
+    """
+    rebuild = any(field in JOB_FIELDS for field in fields)
+    cursor = conn.execute(sql, params)
+    while rows := cursor.fetchmany(EXPORT_CHUNK_SIZE):
+        for row in rows:
+            job = version_fields(conn, row["job_id"], row) if rebuild else {}
+            if rebuild and decode:
+                job = Job.from_row(job, row["job_id"])
+            yield {
+                field: job[field] if field in JOB_FIELDS else row[field]
+                for field in fields
+            }
+
 
 @click.command()
-@click.option("--job-id", type=str, required=True, help="Export job history")
+@click.option("--job-id", type=str, help="Export the history of one job.")
+@click.option("--all", "all_jobs", is_flag=True, help="Export every job.")
 @click.option(
-    "--format", type=click.Choice(["json", "csv"]), default="json", help="Export format"
+    "--current",
+    is_flag=True,
+    help="Export current definitions from `jobs` instead of version history.",
+)
+@click.option(
+    "--as-of",
+    type=click.DateTime(DATETIME_FORMATS),
+    help="Export every job as it was at this UTC time, e.g. for a fleet snapshot.",
+)
+@click.option(
+    "--format",
+    type=click.Choice(list(WRITERS)),
+    default="json",
+    help="Export format",
+)
+@click.option(
+    "--fields",
+    type=str,
+    help=f"Comma-separated fields to export (default: all of {', '.join(EXPORT_FIELDS)}).",
+)
+@click.option(
+    "--compression",
+    type=click.Choice(COMPRESSIONS),
+    help="Compress the output (default: inferred from a .gz or .zst suffix).",
 )
 @click.option(
     "--output",
-    type=click.Path(),
-    help="Output file (default: job_id.json or job_id.csv)",
+    type=click.Path(dir_okay=False, allow_dash=True),
+    help="Output file, '-' for stdout (default: job_id.<format> or jobs.<format>)",
 )
-def export(job_id, format, output):
-    """Export job history to JSON or CSV."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def export(job_id, all_jobs, current, as_of, format, fields, compression, output):
+    """Export job history to JSON, NDJSON, CSV or TSV, streaming rows as they are read."""
+    if bool(job_id) == all_jobs:
+        raise click.UsageError("Pass either --job-id or --all.")
+    if current and as_of:
+        raise click.UsageError("--current and --as-of cannot be combined.")
+    fields = parse_fields(fields)
 
-    cursor.execute(
-        "SELECT version, data, timestamp FROM job_versions WHERE job_id = ? ORDER BY timestamp DESC",
-        (job_id,),
-    )
-    versions = cursor.fetchall()
+    conn = get_db_connection()
+    if as_of:
+        sql = AS_OF_SQL.format(where="AND j.job_id = :job_id" if job_id else "")
+        params = {"as_of": as_of.strftime(TIMESTAMP_FORMAT), "job_id": job_id}
+    else:
+        where, params = ("WHERE job_id = ?", (job_id,)) if job_id else ("", ())
+        sql = (CURRENT_SQL if current else HISTORY_SQL).format(where=where)
 
-    if not versions:
+    if conn.execute(f"SELECT 1 FROM ({sql}) LIMIT 1", params).fetchone() is None:
+        target = f"job ID '{job_id}'" if job_id else "any job"
         console.print(
-            f"[red]Error: No history found for job ID '{job_id}'. Check if the job exists.[/red]"
+            f"[red]Error: No history found for {target}. Check if the job exists.[/red]"
         )
+        conn.close()
         return
 
     if not output:
-        output = f"{job_id}.{format}"
+        output = f"{job_id or 'jobs'}.{format}"
+    compression = compression or infer_compression(output)
+    out = console if output != "-" else Console(stderr=True)
 
     try:
-        if format == "json":
-            with open(output, "w") as f:
-                json.dump([dict(row) for row in versions], f, indent=4)
-        elif format == "csv":
-            with open(output, "w", newline="") as f:
-                writer = csv.writer(f)
-                writer.writerow(["Version", "Timestamp", "Data"])
-                for row in versions:
-                    writer.writerow([row["version"], row["timestamp"], row["data"]])
-        console.print(f"[green]Exported job history to [bold]{output}[/bold][/green]")
-    except Exception as e:
-        console.print(f"[red]Error: Failed to write to {output}. {str(e)}[/red]")
+        with open_output(output, compression) as f:
+            writer = WRITERS[format](f, fields)
+            for record in iter_export_records(
+                conn, sql, params, fields, decode=format in ("json", "ndjson")
+            ):
+                writer.write(record)
+            writer.close()
+        out.print(
+            f"[green]Exported job history to [bold]{output}[/bold] "
+            f"({writer.count} row(s))[/green]"
+        )
+    except OSError as e:
+        out.print(f"[red]Error: Failed to write to {output}. {str(e)}[/red]")
 
     conn.close()
@@ -1,21 +1,77 @@
 import click
-from ml_json_cli.db import get_db_connection
+from ml_json_cli.db import DATETIME_FORMATS, TIMESTAMP_FORMAT, get_db_connection
+from ml_json_cli.streaming import OUTPUT_FORMATS, write_rows
+
+HISTORY_FIELDS = ("job_id", "version", "timestamp")
+AS_OF_FIELDS = HISTORY_FIELDS + ("current",)
+
+
+def show_as_of(conn, as_of, job_id, output):
+    from ml_json_cli.versions import AS_OF_SQL
+
+    sql = AS_OF_SQL.format(where="AND j.job_id = :job_id" if job_id else "")
+    timestamp = as_of.strftime(TIMESTAMP_FORMAT)
+    cursor = conn.execute(sql, {"as_of": timestamp, "job_id": job_id})
+    if output != "table":
+        write_rows(
+            (
+                (
+                    row["job_id"],
+                    row["version"],
+                    row["timestamp"],
+                    bool(row["is_current"]),
+                )
+                for row in cursor
+            ),
+            AS_OF_FIELDS,
+            output,
+        )
+        return
+    rows = cursor.fetchall()
+    if not rows:
+        click.echo(f"No jobs found as of {timestamp}")
+        return
+    click.echo(f"Jobs as of {timestamp}:")
+    for row in rows:
+        current = " (current)" if row["is_current"] else ""
+        click.echo(
+            f"{row['job_id']}: version {row['version']} - {row['timestamp']}{current}"
+        )
 
 
 @click.command()
+@click.option("--job-id", type=str, help="Show history of changes for a job.")
 @click.option(
-    "--job-id", type=str, required=True, help="Show history of changes for a job."
+    "--as-of",
+    type=click.DateTime(DATETIME_FORMATS),
+    help="Show which version of every job (or of --job-id) was current at this "
+    "UTC time.",
 )
-def history(job_id):
+@click.option(
+    "--output",
+    type=click.Choice(["table", *OUTPUT_FORMATS]),
+    default="table",
+    help="Print lines (default) or stream rows as JSON, NDJSON or TSV.",
+)
+def history(job_id, as_of, output):
     """Show job version history."""
+    if not job_id and not as_of:
+        raise click.UsageError("Pass --job-id, --as-of or both.")
     conn = get_db_connection()
+    if as_of:
+        show_as_of(conn, as_of, job_id, output)
+        conn.close()
+        return
+
     cursor = conn.cursor()
 
     cursor.execute(
-        "SELECT version, timestamp FROM job_versions WHERE job_id = ? ORDER BY timestamp DESC",
+        "SELECT job_id, version, timestamp FROM job_versions WHERE job_id = ? ORDER BY timestamp DESC",
         (job_id,),
     )
-    if versions := cursor.fetchall():
+    if output != "table":
+        write_rows(cursor, HISTORY_FIELDS, output)
+    elif versions := cursor.fetchall():
         click.echo(f"History for Job: {job_id}")
         for row in versions:
             click.echo(f"Version {row['version']} - {row['timestamp']}")
@@ -1,106 +1,118 @@
 """@DOCSTRING"""
 
-import json
+import os
+import time
+
 import click
 from rich.console import Console
+from rich.markup import escape
+from ml_json_cli.audit_log import AuditLog
 from ml_json_cli.db import get_db_connection
+from ml_json_cli.loader import (
+    DEFAULT_BATCH_SIZE,
+    JobWriter,
+    expand_paths,
+    iter_load_events,
+)
+from ml_json_cli.perf import format_bytes, peak_rss_bytes, timed
 
 console = Console()
 
 
 @click.command()
-@click.argument("file_path", type=click.Path(exists=True))
-def load(file_path):
-    """Load an Elastic ML JSON file into the database, tracking changes."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+@click.argument("paths", nargs=-1, required=True)
+@click.option(
+    "--batch-size",
+    type=click.IntRange(min=1),
+    default=DEFAULT_BATCH_SIZE,
+    show_default=True,
+    help="Number of jobs written per transaction.",
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=os.cpu_count() or 1,
+    show_default="CPU count",
+    help="Parser processes used when loading several files.",
+)
+@click.option(
+    "--no-validate",
+    is_flag=True,
+    help="Load jobs without checking them against the job schema.",
+)
+@click.pass_context
+def load(ctx, paths, batch_size, workers, no_validate):
+    """Load Elastic ML JSON files into the database, tracking changes.
 
+    PATHS may be files, directories (searched recursively for .json,
+    .ndjson and .jsonl files) or glob patterns. A file that cannot be
+    parsed loads nothing, and the exit status is then 1.
+    """
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    except json.JSONDecodeError:
-        console.print(
-            f"[red]Error: Failed to parse JSON file. Check file formatting: {file_path}[/red]"
-        )
+        files = expand_paths(paths)
+    except FileNotFoundError as e:
+        console.print(f"[red]Error: No such file or directory: {e}[/red]")
         return
 
-    jobs = data if isinstance(data, list) else [data]
+    if not files:
+        console.print("[red]Error: No job files found.[/red]")
+        return
 
-    for job in jobs:
-        try:
-            job_id = job["job"]["job_id"]
-            description = job["job"].get("description", "")
-            groups = ", ".join(job["job"].get("groups", []))
-            analysis_config = json.dumps(job["job"].get("analysis_config", {}))
-            analysis_limits = json.dumps(job["job"].get("analysis_limits", {}))
+    conn = get_db_connection()
+    started = time.perf_counter()
+    skipped = 0
+    invalid = 0
+    failed = 0
 
-            try:
-                datafeed_config = json.dumps(
-                    job.get("datafeed", {}), ensure_ascii=False
-                )
-            except (TypeError, ValueError):
+    audit = AuditLog.from_context(conn)
+    with JobWriter(conn, batch_size=batch_size, audit=audit) as writer:
+        events = iter_load_events(files, workers=workers, validate=not no_validate)
+        for kind, path, payload in timed("parse", events):
+            if kind == "rows":
+                for row in payload:
+                    writer.add(row)
+            elif kind == "warning":
+                console.print(f"[red]Warning: {payload}[/red]")
+            elif kind == "skipped":
+                console.print(f"[red]Error: {payload} ({path}). Skipping entry.[/red]")
+                skipped += 1
+            elif kind == "invalid":
                 console.print(
-                    f"[red]Error: Unable to convert datafeed_config for job {job_id}. "
-                    f"Storing empty JSON.[/red]"
+                    f"[red]Error: Invalid job {escape(payload.job_id or '(no job_id)')} "
+                    f"({path}): {escape('; '.join(payload.errors))}. Skipping entry.[/red]"
                 )
-                datafeed_config = "{}"
-
-            try:
-                custom_settings = json.dumps(
-                    job["job"].get("custom_settings", {}), ensure_ascii=False
-                )
-            except (TypeError, ValueError):
+                invalid += 1
+            elif kind == "error":
                 console.print(
-                    f"[red]Warning: Invalid custom_settings format for job {job_id}."
-                    f"Storing empty JSON.[/red]"
-                )
-                custom_settings = "{}"
-
-            cursor.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
-            if cursor.fetchone():
-                cursor.execute(
-                    """
-                    INSERT INTO job_versions (job_id, version, description, groups, analysis_config,
-                                              analysis_limits, datafeed_config, custom_settings, timestamp)
-                    SELECT job_id, (SELECT IFNULL(MAX(version), 0) + 1 FROM job_versions WHERE job_id = ?),
-                           description, groups, analysis_config, analysis_limits,
-                           datafeed_config, custom_settings, last_updated
-                    FROM jobs WHERE job_id = ?
-                    """,
-                    (job_id, job_id),
+                    f"[red]Error: Failed to parse JSON file. Check file formatting: "
+                    f"{path}[/red]"
                 )
+                failed += 1
 
-            cursor.execute(
-                """
-                INSERT INTO jobs (job_id, description, groups, analysis_config, analysis_limits, datafeed_config, custom_settings, last_updated)
-                VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-                ON CONFLICT(job_id) DO UPDATE SET
-                description = CASE
-                    WHEN excluded.description != jobs.description THEN excluded.description
-                    ELSE jobs.description
-                END,
-                last_updated = CURRENT_TIMESTAMP
-            """,
-                (
-                    job_id,
-                    description,
-                    groups,
-                    analysis_config,
-                    analysis_limits,
-                    datafeed_config,
-                    custom_settings,
-                ),
-            )
-
-            conn.commit()
-
-        except KeyError as e:
-            console.print(
-                f"[red]Error: Missing key {str(e)} in job data. Skipping entry.[/red]"
-            )
-            continue
-
+    if audit.audit_id is not None:
+        audit.finish()
+        conn.commit()
     conn.close()
+    elapsed = time.perf_counter() - started
+    source = files[0] if len(files) == 1 else f"{len(files)} file(s)"
+    if failed:
+        console.print(
+            f"[red]Loaded {writer.processed} job(s) from {source}; "
+            f"{failed} file(s) could not be loaded.[/red]"
+        )
+    else:
+        console.print(
+            f"[green]Successfully loaded {writer.processed} job(s) from "
+            f"{source}.[/green]"
+        )
+    console.print(
+        f"{writer.new} new, {writer.changed} changed, {writer.unchanged} unchanged, "
+        f"{skipped} skipped, {invalid} invalid, {failed} file(s) failed"
+    )
     console.print(
-        f"[green]Successfully loaded {len(jobs)} job(s) from {file_path}.[/green]"
+        f"{writer.batches} batch(es) written in {elapsed:.2f}s "
+        f"({writer.processed / elapsed if elapsed else 0:.0f} jobs/s), "
+        f"peak RSS {format_bytes(peak_rss_bytes())}"
     )
+    if failed:
+        ctx.exit(1)
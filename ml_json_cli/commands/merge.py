@@ -1,64 +1,144 @@
-"""@DOCSTRING"""
+import json
 
 import click
+import ijson
+from ml_json_cli.audit_log import AuditLog
 from ml_json_cli.db import get_db_connection
+from ml_json_cli.json_parser import iter_jobs
+from ml_json_cli.merge import BASES, STRATEGIES, merge_jobs, three_way_merge
+from ml_json_cli.versions import JOB_FIELDS
+
+
+def parse_field_strategies(ctx, param, values):
+    """Turn repeated ``FIELD=STRATEGY`` options into a dict."""
+    overrides = {}
+    for value in values:
+        field, _, strategy = value.partition("=")
+        if field not in JOB_FIELDS or strategy not in STRATEGIES:
+            raise click.BadParameter(
+                f"expected FIELD=STRATEGY with FIELD one of {', '.join(JOB_FIELDS)} "
+                f"and STRATEGY one of {', '.join(STRATEGIES)}, got '{value}'"
+            )
+        overrides[field] = strategy
+    return overrides
 
 
 @click.command()
 @click.option(
     "--strategy",
-    type=click.Choice(["latest", "earliest", "most_common"]),
+    type=click.Choice(STRATEGIES),
     default="most_common",
     help="Conflict resolution strategy",
 )
-def merge(strategy):
-    """Merge multiple job exports into a consolidated dataset."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+@click.option(
+    "--field",
+    "field_strategies",
+    multiple=True,
+    metavar="FIELD=STRATEGY",
+    callback=parse_field_strategies,
+    help="Resolve one field with a different strategy; may be repeated.",
+)
+@click.option(
+    "--three-way",
+    "incoming",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Three-way merge the jobs in FILE (e.g. an updated module) into the "
+    "current definitions instead of merging stored versions.",
+)
+@click.option(
+    "--base",
+    type=click.Choice(BASES),
+    default="earliest",
+    show_default=True,
+    help="With --three-way, the stored version used as the common ancestor of "
+    "jobs that were never merged from upstream before.",
+)
+@click.option(
+    "--prefer",
+    type=click.Choice(["ours", "theirs"]),
+    default="ours",
+    show_default=True,
+    help="With --three-way, the side kept for conflicting changes.",
+)
+@click.option(
+    "--dry-run",
+    is_flag=True,
+    help="Show which jobs and fields would change without writing anything.",
+)
+def merge(strategy, field_strategies, incoming, base, prefer, dry_run):
+    """Merge multiple job exports into a consolidated dataset.
+
+    Each field is resolved separately across a job's stored versions, so
+    e.g. the most common analysis_config can be kept alongside the latest
+    description. Merged jobs are snapshotted first and can be undone.
 
-    cursor.execute(
-        "SELECT job_id, COUNT(*) FROM job_versions GROUP BY job_id HAVING COUNT(*) > 1"
+    With --three-way FILE, changes made upstream (in FILE) and locally
+    (in the current definitions) since the last upstream merge, or the
+    base version, are combined; paths changed differently on both sides
+    are reported as conflicts.
+    """
+    if incoming:
+        merge_incoming(incoming, base, prefer, dry_run)
+        return
+
+    strategies = {field: strategy for field in JOB_FIELDS}
+    strategies.update(field_strategies)
+    label = strategy + "".join(
+        f", {field}={value}" for field, value in field_strategies.items()
     )
-    jobs_to_merge = cursor.fetchall()
 
-    if not jobs_to_merge:
+    conn = get_db_connection()
+    merged, changes = merge_jobs(
+        conn, strategies, dry_run=dry_run, audit=AuditLog.from_context(conn)
+    )
+    conn.close()
+
+    if not merged:
         click.echo("No jobs found to merge.")
         return
 
-    for job in jobs_to_merge:
-        job_id = job["job_id"]
-        cursor.execute(
-            "SELECT data FROM job_versions WHERE job_id = ? ORDER BY timestamp DESC",
-            (job_id,),
+    if dry_run:
+        click.echo(
+            f"Dry run: merging {merged} jobs using strategy: {label} "
+            f"would change {len(changes)}"
         )
-        versions = cursor.fetchall()
-
-        if strategy == "latest":
-            merged_data = versions[0]["data"]
-            database_merge(cursor, merged_data, job_id)
-        elif strategy == "earliest":
-            merged_data = versions[-1]["data"]
-            database_merge(cursor, merged_data, job_id)
-        elif strategy == "most_common":
-            data_counts = {}
-            for version in versions:
-                data_counts[version["data"]] = data_counts.get(version["data"], 0) + 1
-            merged_data = max(data_counts, key=data_counts.get)
-            database_merge(cursor, merged_data, job_id)
-    conn.commit()
-    conn.close()
-    click.echo(f"Merged {len(jobs_to_merge)} jobs using strategy: {strategy}")
+        for change in changes:
+            click.echo(f"  {change.job_id}: {', '.join(change.fields)}")
+        return
+    click.echo(f"Merged {merged} jobs using strategy: {label} ({len(changes)} changed)")
 
 
-def database_merge(cursor, merged_data, job_id):
-    """Merge job data into the database.
+def merge_incoming(path, base, prefer, dry_run):
+    conn = get_db_connection()
+    audit = AuditLog.from_context(conn)
+    try:
+        result = three_way_merge(
+            conn,
+            iter_jobs(path),
+            base=base,
+            prefer=prefer,
+            dry_run=dry_run,
+            audit=audit,
+        )
+    except (ijson.JSONError, KeyError) as e:
+        conn.rollback()
+        conn.close()
+        raise click.ClickException(f"Failed to read jobs from {path}: {e}")
+    if audit.audit_id is not None:
+        audit.finish()
+        conn.commit()
+    conn.close()
 
-    This function updates the `jobs` table with the merged data and
-    updates the last_updated timestamp.
-    """
-    cursor.execute(
-        """
-            UPDATE jobs SET analysis_config = ?, last_updated = CURRENT_TIMESTAMP WHERE job_id = ?
-        """,
-        (merged_data, job_id),
+    for conflict in result.conflicts:
+        click.echo(
+            f"Conflict in {conflict['job_id']} at {conflict['path']}: "
+            f"ours {json.dumps(conflict['ours'])}, "
+            f"theirs {json.dumps(conflict['theirs'])}, "
+            f"base {json.dumps(conflict['base'])}"
+        )
+    prefix = "Dry run: would merge" if dry_run else "Merged"
+    click.echo(
+        f"{prefix} {result.processed} jobs from {path}: {result.new} new, "
+        f"{result.changed} changed, {result.unchanged} unchanged, "
+        f"{len(result.conflicts)} conflict(s) resolved to {prefer}"
     )
@@ -7,18 +7,65 @@ import sqlite3
 from datetime import datetime
 
 import click
-from fuzzywuzzy import fuzz
 from rich.console import Console
+from rich.markup import escape
 from rich.table import Table
 
 from ml_json_cli.db import get_db_connection
+from ml_json_cli.perf import phase
+from ml_json_cli.search_index import fuzzy_matches
+from ml_json_cli.streaming import OUTPUT_FORMATS, write_rows
 
 console = Console()
 
+# Control characters mark snippet matches so they survive markup escaping.
+MATCH_START, MATCH_END = "\x02", "\x03"
+
+SEARCH_FIELDS = (
+    "job_id",
+    "description",
+    "groups",
+    "bucket_span",
+    "influencers",
+    "model_memory_limit",
+    "detector_function",
+    "created_by",
+    "last_updated",
+)
+
+
+def quote_fts_query(text):
+    """Quote every term so FTS5 treats punctuation literally."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in text.split())
+
+
+def parse_cursor(ctx, param, value):
+    """Split an ``--after`` value into its ``(last_updated, job_id)`` key."""
+    if value is None:
+        return None
+    last_updated, sep, job_id = value.partition(",")
+    if not sep or not last_updated or not job_id:
+        raise click.BadParameter("expected 'LAST_UPDATED,JOB_ID'")
+    return last_updated, job_id
+
+
+def highlight_snippet(snippet):
+    """Render an FTS5 snippet with its matches highlighted."""
+    return (
+        escape(snippet or "")
+        .replace(MATCH_START, "[bold yellow]")
+        .replace(MATCH_END, "[/bold yellow]")
+    )
+
 
 @click.command()
 @click.option("--job-id", type=str, help="Search by job ID (case-insensitive)")
 @click.option("--fuzzy", type=str, help="Fuzzy search on job ID")
+@click.option(
+    "--text",
+    type=str,
+    help="Full-text search of job and detector descriptions, ranked by relevance",
+)
 @click.option("--group", type=str, help="Filter by job group (case-insensitive)")
 @click.option("--bucket-span", type=str, help="Filter by bucket span (e.g., '15m')")
 @click.option("--influencers", type=str, help="Filter by influencers (comma-separated)")
@@ -36,46 +83,155 @@ console = Console()
     "--end-date", type=str, help="Filter jobs updated before this date (YYYY-MM-DD)"
 )
 @click.option(
-    "--page", type=int, default=1, help="Page number for pagination (default: 1)"
+    "--page",
+    type=int,
+    default=1,
+    help="Page number of --text or --fuzzy results, which are ranked (default: 1)",
+)
+@click.option(
+    "--after",
+    callback=parse_cursor,
+    help="Show the jobs after this 'last_updated,job_id' cursor; each table page "
+    "prints the cursor of the next one (not with --text or --fuzzy)",
 )
 @click.option("--limit", type=int, default=10, help="Results per page (default: 10)")
+@click.option(
+    "--output",
+    type=click.Choice(["table", *OUTPUT_FORMATS]),
+    default="table",
+    help="Print a table (default) or stream rows as JSON, NDJSON or TSV",
+)
 def search(
     job_id,
     fuzzy,
+    text,
     group,
+    bucket_span,
+    influencers,
+    created_by,
+    model_memory_limit,
     detector_function,
     start_date,
     end_date,
     page,
+    after,
     limit,
+    output,
 ):
     """Search ML jobs in the database with enhanced filtering,
     fuzzy search, and pagination."""
+    ranked = bool(text or fuzzy)
+    if ranked and after:
+        raise click.UsageError("--after cannot be combined with --text or --fuzzy.")
+    if not ranked and page != 1:
+        raise click.UsageError(
+            "--page only applies to --text and --fuzzy; page through other "
+            "searches with --after."
+        )
+    fields = list(SEARCH_FIELDS)
+    if text:
+        fields.append("match")
+    if fuzzy:
+        fields.append("score")
+    match_start, match_end = (MATCH_START, MATCH_END) if output == "table" else ("", "")
+
     conn = get_db_connection()
-    conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
 
-    query = """
-        SELECT job_id, description, groups,
-               analysis_config, analysis_limits, datafeed_config,
-               custom_settings, last_updated
-        FROM jobs
-        WHERE 1=1
+    # Every filter is applied in SQL, before LIMIT/OFFSET, so pages are
+    # always full; multi-valued attributes are matched via their indexes.
+    columns = """
+        j.job_id, j.description, j.groups, a.bucket_span, a.influencers,
+        a.model_memory_limit, a.detector_function, a.created_by, j.last_updated
     """
-    params = []
+    scores = {}
+    if fuzzy:
+        scores = dict(fuzzy_matches(cursor, fuzzy))
+        if not scores:
+            if output != "table":
+                write_rows([], fields, output)
+            else:
+                console.print("[red]No jobs found matching your search criteria.[/red]")
+            conn.close()
+            return
+    ranked_ids = json.dumps(list(scores))
+
+    if text:
+        query = f"""
+            SELECT {columns},
+                   snippet(jobs_fts, -1, '{match_start}', '{match_end}', '…', 12)
+            FROM jobs_fts
+            JOIN job_attributes a ON a.id = jobs_fts.rowid
+            JOIN jobs j ON j.job_id = a.job_id
+            WHERE jobs_fts MATCH ?
+        """
+        order_by = "bm25(jobs_fts), j.job_id"
+        params = [text]
+        if fuzzy:
+            query += " AND j.job_id IN (SELECT value FROM json_each(?))"
+            params.append(ranked_ids)
+    elif fuzzy:
+        # Fuzzy matches arrive best first; their array position is the order.
+        query = f"""
+            SELECT {columns}
+            FROM json_each(?) ranked
+            JOIN jobs j ON j.job_id = ranked.value
+            LEFT JOIN job_attributes a ON a.job_id = j.job_id
+            WHERE 1=1
+        """
+        order_by = "ranked.key"
+        params = [ranked_ids]
+    else:
+        query = f"""
+            SELECT {columns}
+            FROM jobs j
+            LEFT JOIN job_attributes a ON a.job_id = j.job_id
+            WHERE 1=1
+        """
+        # Keyset pagination: pages continue after the last (last_updated,
+        # job_id) shown, which the index seeks to instead of skipping rows.
+        order_by = "j.last_updated DESC, j.job_id DESC"
+        params = []
+        if after:
+            query += " AND (j.last_updated, j.job_id) < (?, ?)"
+            params.extend(after)
 
     if job_id:
-        query += " AND LOWER(job_id) LIKE ?"
+        query += " AND LOWER(j.job_id) LIKE ?"
         params.append(f"%{job_id.lower()}%")
 
     if group:
-        query += " AND LOWER(groups) LIKE ?"
-        params.append(f"%{group.lower()}%")
+        query += " AND j.job_id IN (SELECT job_id FROM job_groups WHERE group_name = ?)"
+        params.append(group)
+
+    for column, value in (
+        ("bucket_span", bucket_span),
+        ("model_memory_limit", model_memory_limit),
+        ("created_by", created_by),
+    ):
+        if value:
+            query += f" AND a.{column} = ?"
+            params.append(value)
+
+    if detector_function:
+        query += (
+            " AND j.job_id IN (SELECT job_id FROM job_detectors WHERE function = ?)"
+        )
+        params.append(detector_function)
+
+    if influencers:
+        for influencer in (item.strip() for item in influencers.split(",")):
+            if influencer:
+                query += (
+                    " AND j.job_id IN"
+                    " (SELECT job_id FROM job_influencers WHERE influencer = ?)"
+                )
+                params.append(influencer)
 
     if start_date:
         try:
             datetime.strptime(start_date, "%Y-%m-%d")
-            query += " AND last_updated >= ?"
+            query += " AND j.last_updated >= ?"
             params.append(start_date)
         except ValueError:
             console.print(
@@ -86,7 +242,7 @@ def search(
     if end_date:
         try:
             datetime.strptime(end_date, "%Y-%m-%d")
-            query += " AND last_updated <= ?"
+            query += " AND j.last_updated <= ?"
             params.append(end_date)
         except ValueError:
             console.print(
@@ -94,17 +250,41 @@ def search(
             )
             return
 
-    query += " ORDER BY last_updated DESC LIMIT ? OFFSET ?"
-    params.extend((limit, (page - 1) * limit))
-    cursor.execute(query, tuple(params))
-    jobs = cursor.fetchall()
+    query += f" ORDER BY {order_by} LIMIT ?"
+    params.append(limit)
+    if ranked:
+        query += " OFFSET ?"
+        params.append((page - 1) * limit)
+    with phase("query"):
+        try:
+            cursor.execute(query, tuple(params))
+        except sqlite3.OperationalError:
+            if not text:
+                raise
+            # Not valid FTS5 syntax (e.g. "lateral-movement"); match the terms.
+            params[0] = quote_fts_query(text)
+            cursor.execute(query, tuple(params))
+
+    if output != "table":
+        rows = cursor
+        if fuzzy:
+            rows = (tuple(row) + (round(scores[row["job_id"]], 1),) for row in cursor)
+        with phase("write"):
+            write_rows(rows, fields, output)
+        conn.close()
+        return
+
+    with phase("query"):
+        jobs = cursor.fetchall()
 
     if not jobs:
         console.print("[red]No jobs found matching your search criteria.[/red]")
         conn.close()
         return
 
-    table = Table(title=f"ML Jobs (Page {page})", show_lines=True)
+    table = Table(
+        title=f"ML Jobs (Page {page})" if ranked else "ML Jobs", show_lines=True
+    )
     table.add_column("Job ID", style="cyan")
     table.add_column("Description", style="white")
     table.add_column("Groups", style="white")
@@ -114,72 +294,25 @@ def search(
     table.add_column("Detector Function", style="white")
     table.add_column("Created By", style="white")
     table.add_column("Last Updated", style="white")
-
-    results = []
+    if text:
+        table.add_column("Match", style="white")
+    if fuzzy:
+        table.add_column("Score", style="white")
 
     for job in jobs:
-        bucket_span_value = "-"
-        influencers_value = "-"
-        detector_function_value = "-"
-        created_by_value = "-"
-
-        try:
-            analysis_config = (
-                json.loads(job["analysis_config"]) if job["analysis_config"] else {}
-            )
-            bucket_span_value = analysis_config.get("bucket_span", "-")
-            influencers_value = ", ".join(analysis_config.get("influencers", []))
-            if analysis_config.get("detectors"):
-                detector_function_value = analysis_config["detectors"][0].get(
-                    "function", "-"
-                )
-        except json.JSONDecodeError:
-            console.print(
-                f"[red]Warning: Invalid JSON in analysis_config for job {job['job_id']}[/red]"
-            )
-
-        try:
-            custom_settings = (
-                json.loads(job["custom_settings"]) if job["custom_settings"] else {}
-            )
-            created_by_value = custom_settings.get("created_by", "-")
-        except json.JSONDecodeError:
-            console.print(
-                f"[red]Warning: Invalid JSON in custom_settings for job {job['job_id']}[/red]"
-            )
-
-        try:
-            analysis_limits = (
-                json.loads(job["analysis_limits"]) if job["analysis_limits"] else {}
-            )
-            model_memory_limit_value = analysis_limits.get("model_memory_limit", "-")
-        except json.JSONDecodeError:
-            console.print(
-                f"[red]Warning: Invalid JSON in analysis_limits for job {job['job_id']}[/red]"
-            )
+        values = [escape(str(value)) if value else "-" for value in job[:9]]
+        if text:
+            values.append(highlight_snippet(job[9]))
+        if fuzzy:
+            values.append(f"{scores[job['job_id']]:.0f}")
+        table.add_row(*values)
 
-        if detector_function and detector_function_value != detector_function:
-            continue
-
-        if fuzzy and fuzz.partial_ratio(fuzzy.lower(), job["job_id"].lower()) < 80:
-            continue
-
-        results.append(
-            (
-                job["job_id"],
-                job["description"],
-                job["groups"],
-                bucket_span_value,
-                influencers_value,
-                model_memory_limit_value,
-                detector_function_value,
-                created_by_value,
-                job["last_updated"],
-            )
+    with phase("render"):
+        console.print(table)
+    if not ranked and len(jobs) == limit:
+        last = jobs[-1]
+        console.print(
+            f"Next page: --after '{escape(last['last_updated'])},"
+            f"{escape(last['job_id'])}'"
         )
-
-    for row in results:
-        table.add_row(*row)
-
-    console.print(table)
     conn.close()
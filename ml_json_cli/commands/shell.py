@@ -0,0 +1,109 @@
+"""Interactive shell (``mlcli shell``) with completion and warm state."""
+
+import shlex
+import sys
+import readline
+
+import click
+from rich.console import Console
+from rich.table import Table
+from ml_json_cli.completion import CompletionCache, complete
+from ml_json_cli.session import Session
+
+console = Console()
+
+
+def make_completer(group, cache):
+    """Returns a readline completer for the commands of ``group``.
+
+    Readline calls it with increasing ``state`` for one TAB press, so
+    candidates are computed once at ``state == 0`` and then indexed.
+    """
+    matches = []
+
+    def completer(text, state):
+        if state == 0:
+            line = readline.get_line_buffer()[: readline.get_begidx()]
+            matches[:] = complete(group, cache, line, text)
+        return matches[state] if state < len(matches) else None
+
+    return completer
+
+
+def setup_readline(group, cache):
+    """Enables history and tab completion in the interactive shell."""
+    if sys.platform in ["darwin", "linux"]:
+        readline.parse_and_bind("tab: complete")
+        readline.set_completer_delims(" \t\n")
+        readline.set_completer(make_completer(group, cache))
+        readline.set_history_length(1000)
+
+
+def print_stats(session):
+    """Prints the session's job cache counters and command timings."""
+    stats = session.stats()
+    console.print(
+        f"Job cache: {stats['job_cache_hits']} hit(s), "
+        f"{stats['job_cache_misses']} miss(es), {stats['job_cache_size']} cached"
+    )
+    table = Table(title="Command timings")
+    table.add_column("Command", style="cyan")
+    table.add_column("Runs", justify="right")
+    table.add_column("Total (ms)", justify="right")
+    table.add_column("Mean (ms)", justify="right")
+    table.add_column("Last (ms)", justify="right")
+    for name, runs, total, last in stats["commands"]:
+        table.add_row(
+            name,
+            str(runs),
+            f"{total * 1000:.1f}",
+            f"{total * 1000 / runs:.1f}",
+            f"{last * 1000:.1f}",
+        )
+    console.print(table)
+
+
+def run_command(group, session, args):
+    """Runs one shell line through the CLI without exiting the shell."""
+    try:
+        session.run(
+            args[0],
+            lambda: group.main(args=args, prog_name="mlcli", standalone_mode=False),
+        )
+    except click.ClickException as e:
+        e.show()
+    except click.Abort:
+        console.print("[bold yellow]Aborted.[/bold yellow]")
+
+
+@click.command()
+@click.pass_context
+def shell(ctx):
+    """Start an interactive CLI session (mlcli>)"""
+    console.print(
+        "[bold green]Entering interactive mode. Type 'exit' or 'quit' to leave.[/bold green]"
+    )
+
+    group = ctx.find_root().command
+    cache = CompletionCache()
+    setup_readline(group, cache)
+
+    with Session() as session:
+        while True:
+            try:
+                command = input("mlcli> ").strip()
+                if command.lower() in {"exit", "quit"}:
+                    console.print("[bold yellow]Exiting mlcli...[/bold yellow]")
+                    break
+                if command == ".stats":
+                    print_stats(session)
+                elif command:
+                    run_command(group, session, shlex.split(command))
+            except KeyboardInterrupt:
+                console.print(
+                    "\n[bold yellow]Use 'exit' or 'quit' to leave.[/bold yellow]"
+                )
+            except EOFError:
+                console.print("\n[bold yellow]Exiting mlcli...[/bold yellow]")
+                break
+    cache.close()
@@ -0,0 +1,106 @@
+"""Fleet-level aggregates over typed job attributes."""
+
+import math
+
+import click
+from rich.console import Console
+from rich.table import Table
+from ml_json_cli import analytics
+from ml_json_cli.analytics import AGGREGATES, CATEGORY_COLUMNS, METRIC_COLUMNS, SOURCES
+from ml_json_cli.db import get_db_connection
+from ml_json_cli.perf import format_bytes
+
+console = Console()
+
+
+def format_value(metric, aggregate, value):
+    if aggregate == "count":
+        return str(int(value))
+    if math.isnan(value):
+        return "-"
+    if metric == "model_memory_bytes":
+        return format_bytes(int(value))
+    if metric == "bucket_span_seconds":
+        return f"{value:g}s"
+    return f"{value:g}"
+
+
+@click.command()
+@click.option(
+    "--by",
+    "keys",
+    type=click.Choice(CATEGORY_COLUMNS),
+    multiple=True,
+    help="Column to group by; may be repeated.",
+)
+@click.option(
+    "--metric",
+    type=click.Choice(METRIC_COLUMNS),
+    default="model_memory_bytes",
+    show_default=True,
+    help="Numeric column to aggregate.",
+)
+@click.option(
+    "--agg",
+    "aggregates",
+    type=click.Choice(AGGREGATES),
+    multiple=True,
+    help="Aggregate to compute; may be repeated (default: count, sum, mean).",
+)
+@click.option(
+    "--source",
+    type=click.Choice(SOURCES),
+    default="jobs",
+    show_default=True,
+    help="Current definitions, version history, or both.",
+)
+@click.option(
+    "--parquet",
+    type=click.Path(dir_okay=False),
+    help="Also write the extracted columns to a Parquet file (requires pyarrow).",
+)
+def stats(keys, metric, aggregates, source, parquet):
+    """Aggregate job attributes, e.g. total model memory per created_by.
+
+    Memory limits such as "64mb" are parsed to bytes and durations such as
+    "15m" to seconds before aggregating.
+    """
+    aggregates = aggregates or ("count", "sum", "mean")
+    conn = get_db_connection()
+    columns = analytics.extract_columns(conn, source)
+    conn.close()
+    if "group" in keys:
+        columns = analytics.explode_groups(columns)
+
+    if parquet:
+        try:
+            analytics.write_parquet(columns, parquet)
+        except ImportError:
+            console.print(
+                "[red]Error: Parquet output requires pyarrow "
+                "(pip install ml-json-cli\\[parquet]).[/red]"
+            )
+            return
+        console.print(
+            f"[green]Wrote {len(columns['version'])} row(s) to {parquet}[/green]"
+        )
+
+    if not len(columns["version"]):
+        console.print("[yellow]No jobs found.[/yellow]")
+        return
+
+    labels, results = analytics.group_by(columns, keys, metric, aggregates)
+    table = Table(title=f"{metric} by {', '.join(keys) or 'all jobs'} ({source})")
+    for key in keys or ("scope",):
+        table.add_column(key, style="cyan")
+    for aggregate in aggregates:
+        table.add_column(aggregate, justify="right")
+    for index, label in enumerate(labels):
+        table.add_row(
+            *(label or ("all",)),
+            *(
+                format_value(metric, aggregate, results[aggregate][index])
+                for aggregate in aggregates
+            ),
+        )
+    console.print(table)
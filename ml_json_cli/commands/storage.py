@@ -0,0 +1,86 @@
+"""Show or change how job versions are stored."""
+
+import click
+from rich.console import Console
+from rich.table import Table
+from ml_json_cli.audit_log import AuditLog
+from ml_json_cli.db import get_db_connection, set_setting
+from ml_json_cli.versions import (
+    JOB_FIELDS,
+    STORAGE_MODES,
+    rewrite_versions,
+    storage_settings,
+)
+
+console = Console()
+
+REWRITE_COMMIT_EVERY = 100
+
+
+def print_usage(conn):
+    mode, interval = storage_settings(conn)
+    console.print(f"Version storage: [bold]{mode}[/bold] (snapshot every {interval})")
+    table = Table(title="job_versions")
+    table.add_column("Encoding", style="cyan")
+    table.add_column("Rows", justify="right")
+    table.add_column("Bytes", justify="right")
+    size = " + ".join(f"IFNULL(LENGTH({field}), 0)" for field in JOB_FIELDS)
+    for row in conn.execute(
+        f"""
+        SELECT IFNULL(encoding, 'full') AS encoding, COUNT(*) AS count,
+               SUM(IFNULL(LENGTH(payload), 0) + {size}) AS bytes
+        FROM job_versions GROUP BY 1 ORDER BY 1
+        """
+    ):
+        table.add_row(row["encoding"], str(row["count"]), str(row["bytes"]))
+    console.print(table)
+
+
+@click.command()
+@click.option(
+    "--mode",
+    type=click.Choice(STORAGE_MODES),
+    help="Storage mode for new versions: full copies, or snapshots plus deltas.",
+)
+@click.option(
+    "--snapshot-interval",
+    type=click.IntRange(min=1),
+    help="In delta mode, store a full snapshot every N versions of a job.",
+)
+@click.option(
+    "--rewrite",
+    is_flag=True,
+    help="Re-encode all existing versions in the current mode and compact the database.",
+)
+def storage(mode, snapshot_interval, rewrite):
+    """Show or change the storage mode of job versions."""
+    conn = get_db_connection()
+    audit = AuditLog.from_context(conn)
+    if mode:
+        set_setting(conn, "version_storage", mode)
+    if snapshot_interval:
+        set_setting(conn, "snapshot_interval", snapshot_interval)
+    if mode or snapshot_interval or rewrite:
+        audit.flush()
+    conn.commit()
+
+    if rewrite:
+        mode, interval = storage_settings(conn)
+        job_ids = [
+            row[0] for row in conn.execute("SELECT DISTINCT job_id FROM job_versions")
+        ]
+        for count, job_id in enumerate(job_ids, 1):
+            rewrite_versions(conn, job_id, mode, interval)
+            if count % REWRITE_COMMIT_EVERY == 0:
+                conn.commit()
+        conn.commit()
+        conn.execute("VACUUM")
+        console.print(
+            f"[green]Rewrote the history of {len(job_ids)} job(s) in {mode} mode.[/green]"
+        )
+
+    if audit.audit_id is not None:
+        audit.finish()
+        conn.commit()
+    print_usage(conn)
+    conn.close()
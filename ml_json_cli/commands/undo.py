@@ -1,5 +1,8 @@
 import click
+from ml_json_cli.audit_log import AuditLog
 from ml_json_cli.db import get_db_connection
+from ml_json_cli.search_index import reindex_jobs
+from ml_json_cli.versions import read_version
 from rich.console import Console
 
 console = Console()
@@ -14,7 +17,8 @@ def undo(job_id):
 
     cursor.execute(
         """
-        SELECT * FROM job_versions WHERE job_id = ? ORDER BY version DESC LIMIT 1
+        SELECT version, content_hash FROM job_versions
+        WHERE job_id = ? ORDER BY version DESC LIMIT 1
     """,
         (job_id,),
     )
@@ -28,37 +32,54 @@ def undo(job_id):
         conn.close()
         return
 
+    fields = read_version(conn, job_id, job_version["version"])
+    current = cursor.execute(
+        "SELECT content_hash FROM jobs WHERE job_id = ?", (job_id,)
+    ).fetchone()
+
     cursor.execute(
         """
-        DELETE FROM jobs WHERE job_id = ?
+        DELETE FROM job_versions WHERE job_id = ? AND version = ?
     """,
-        (job_id,),
+        (job_id, job_version["version"]),
     )
 
     cursor.execute(
         """
         INSERT INTO jobs (job_id, description, groups, analysis_config, analysis_limits,
-                          datafeed_config, custom_settings, last_updated)
-        VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+                          datafeed_config, custom_settings, content_hash, last_updated,
+                          current_version)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP,
+                IFNULL((SELECT MAX(version) FROM job_versions WHERE job_id = ?), 0))
+        ON CONFLICT(job_id) DO UPDATE SET
+            description = excluded.description,
+            groups = excluded.groups,
+            analysis_config = excluded.analysis_config,
+            analysis_limits = excluded.analysis_limits,
+            datafeed_config = excluded.datafeed_config,
+            custom_settings = excluded.custom_settings,
+            content_hash = excluded.content_hash,
+            last_updated = CURRENT_TIMESTAMP,
+            current_version = excluded.current_version
     """,
         (
-            job_version["job_id"],
-            job_version["description"],
-            job_version["groups"],
-            job_version["analysis_config"],
-            job_version["analysis_limits"],
-            job_version["datafeed_config"],
-            job_version["custom_settings"],
+            job_id,
+            fields["description"],
+            fields["groups"],
+            fields["analysis_config"],
+            fields["analysis_limits"],
+            fields["datafeed_config"],
+            fields["custom_settings"],
+            job_version["content_hash"],
+            job_id,
         ),
     )
 
-    cursor.execute(
-        """
-        DELETE FROM job_versions WHERE job_id = ? AND version = ?
-    """,
-        (job_id, job_version["version"]),
-    )
+    reindex_jobs(cursor, [job_id])
 
+    audit = AuditLog.from_context(conn)
+    audit.record(job_id, current and current[0], job_version["content_hash"])
+    audit.finish()
     conn.commit()
     conn.close()
 
@@ -0,0 +1,74 @@
+"""Validate job files or stored jobs against the Elastic ML job schema."""
+
+import os
+
+import click
+from rich.console import Console
+from rich.markup import escape
+from ml_json_cli.db import get_db_connection
+from ml_json_cli.loader import expand_paths
+from ml_json_cli.validation import validate_files, validate_stored
+
+console = Console()
+
+
+@click.command()
+@click.argument("paths", nargs=-1)
+@click.option(
+    "--db", "stored", is_flag=True, help="Validate the current jobs in the database."
+)
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=os.cpu_count() or 1,
+    show_default="CPU count",
+    help="Processes that validate files or chunks of stored jobs in parallel.",
+)
+@click.pass_context
+def validate(ctx, paths, stored, workers):
+    """Check job files, or the stored jobs with --db, without loading anything.
+
+    PATHS may be files, directories or glob patterns, as for load. Every
+    invalid job is listed with all of its problems; the exit status is 1
+    when a job is invalid or a file cannot be parsed.
+    """
+    if bool(paths) == stored:
+        raise click.UsageError("Pass either PATHS or --db.")
+
+    conn = None
+    if stored:
+        conn = get_db_connection()
+        results = validate_stored(conn, workers=workers)
+    else:
+        try:
+            files = expand_paths(paths)
+        except FileNotFoundError as e:
+            console.print(f"[red]Error: No such file or directory: {e}[/red]")
+            ctx.exit(1)
+        results = validate_files(files, workers=workers)
+
+    checked = invalid = failed = 0
+    for path, count, invalid_jobs, error in results:
+        checked += count
+        for job in invalid_jobs:
+            invalid += 1
+            source = "" if stored else f" ({escape(job.source)})"
+            console.print(f"[red]{escape(job.job_id or '(no job_id)')}[/red]{source}:")
+            for message in job.errors:
+                console.print(f"  - {escape(message)}")
+        if error:
+            failed += 1
+            console.print(
+                f"[red]Error: Failed to parse {escape(path)}: {escape(error)}[/red]"
+            )
+    if conn is not None:
+        conn.close()
+
+    color = "red" if invalid or failed else "green"
+    console.print(
+        f"[{color}]Validated {checked} job(s): {invalid} invalid"
+        + (f", {failed} file(s) failed" if failed else "")
+        + f"[/{color}]"
+    )
+    if invalid or failed:
+        ctx.exit(1)
@@ -0,0 +1,148 @@
+"""Tab completion for the interactive shell.
+
+Job IDs are kept in a sorted in-process list and matched by prefix with
+``bisect``. The list is reloaded only when ``PRAGMA data_version`` reports
+that another connection committed to the database, so repeated TAB presses
+cost no queries at all.
+"""
+
+import bisect
+import shlex
+
+import click
+
+from ml_json_cli.db import open_connection
+
+SHELL_COMMANDS = (".stats", "exit", "quit")
+JOB_ID_PARAMS = ("job_id",)
+VERSION_PARAMS = ("version1", "version2")
+
+
+def _prefixed(values, prefix):
+    """Return the items of the sorted list ``values`` starting with ``prefix``."""
+    start = bisect.bisect_left(values, prefix)
+    end = start
+    while end < len(values) and values[end].startswith(prefix):
+        end += 1
+    return values[start:end]
+
+
+class CompletionCache:
+    """Job IDs and version numbers cached until the database changes.
+
+    The cache needs a connection of its own: ``PRAGMA data_version`` does not
+    change for commits made through the same connection.
+    """
+
+    def __init__(self, connect=open_connection):
+        self._connect = connect
+        self._conn = None
+        self._data_version = None
+        self._job_ids = []
+        self._versions = {}
+
+    def _refresh(self):
+        if self._conn is None:
+            self._conn = self._connect()
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._job_ids = [
+                row[0]
+                for row in self._conn.execute("SELECT job_id FROM jobs ORDER BY job_id")
+            ]
+            self._versions = {}
+            self._data_version = data_version
+
+    def job_ids(self, prefix=""):
+        """Return the job IDs starting with ``prefix``, in sorted order."""
+        self._refresh()
+        return _prefixed(self._job_ids, prefix)
+
+    def versions(self, job_id, prefix=""):
+        """Return the version numbers of ``job_id`` starting with ``prefix``."""
+        self._refresh()
+        if job_id not in self._versions:
+            self._versions[job_id] = [
+                str(row[0])
+                for row in self._conn.execute(
+                    "SELECT version FROM job_versions WHERE job_id = ? ORDER BY version",
+                    (job_id,),
+                )
+            ]
+        return [
+            version for version in self._versions[job_id] if version.startswith(prefix)
+        ]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def _option_value(tokens, names):
+    """Return the value following the last of ``names`` in ``tokens``."""
+    for index in range(len(tokens) - 2, -1, -1):
+        if tokens[index] in names:
+            return tokens[index + 1]
+    return None
+
+
+def _find_option(command, token):
+    for param in command.params:
+        if (
+            isinstance(param, click.Option)
+            and token in param.opts + param.secondary_opts
+        ):
+            return param
+    return None
+
+
+def complete(group, cache, line, text):
+    """Return completion candidates for ``text`` at the end of ``line``.
+
+    ``line`` is the input up to the start of the word being completed.
+    Completes command names, option names, job IDs, version numbers and
+    ``click.Choice`` values depending on the preceding tokens.
+    """
+    try:
+        tokens = shlex.split(line)
+    except ValueError:
+        tokens = line.split()
+
+    if not tokens:
+        names = sorted(group.list_commands(None)) + list(SHELL_COMMANDS)
+        return [name for name in names if name.startswith(text)]
+
+    command = group.get_command(None, tokens[0])
+    if command is None:
+        return []
+
+    previous = _find_option(command, tokens[-1]) if len(tokens) > 1 else None
+    if previous is not None and not previous.is_flag and not previous.count:
+        if previous.name in JOB_ID_PARAMS:
+            return cache.job_ids(text)
+        if previous.name in VERSION_PARAMS:
+            job_id = _option_value(tokens, ("--job-id",))
+            return cache.versions(job_id, text) if job_id else []
+        if isinstance(previous.type, click.Choice):
+            return [
+                choice for choice in previous.type.choices if choice.startswith(text)
+            ]
+        return []
+
+    if text.startswith("-"):
+        names = sorted(
+            name
+            for param in command.params
+            if isinstance(param, click.Option)
+            for name in param.opts + param.secondary_opts
+            if name.startswith("--")
+        )
+        return [name for name in names + ["--help"] if name.startswith(text)]
+
+    if any(
+        isinstance(param, click.Argument) and param.name in JOB_ID_PARAMS
+        for param in command.params
+    ):
+        return cache.job_ids(text)
+    return []
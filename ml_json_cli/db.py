@@ -1,19 +1,125 @@
+"""SQLite storage for ML jobs: connection profile and schema migrations.
+
+Every connection is opened through ``get_db_connection``, which applies the
+tuned pragmas below and brings the schema up to date. While an interactive
+``Session`` is active it returns the session's shared connection instead. Schema changes are
+appended to ``MIGRATIONS`` and tracked with ``PRAGMA user_version``, so
+existing databases are upgraded in place the next time they are opened.
+"""
+
 import sqlite3
-import os
+
+from ml_json_cli import perf
 
 DB_FILE = "ml_jobs.db"
 
+BUSY_TIMEOUT_MS = 5000
+
+# Stored timestamps are UTC and start with the layout of CURRENT_TIMESTAMP.
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Accepted by options that take a (UTC) point in time, such as --as-of.
+DATETIME_FORMATS = ["%Y-%m-%d", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S"]
+
+# WAL lets search/history read while a load is writing; NORMAL sync is
+# durable across application crashes and only fsyncs at checkpoints.
+CONNECTION_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("mmap_size", 256 * 1024 * 1024),
+    ("cache_size", -64 * 1024),
+    ("temp_store", "MEMORY"),
+    ("busy_timeout", BUSY_TIMEOUT_MS),
+)
+
+
+# Connection shared by every command while a ``Session`` is active.
+shared_connection = None
+
 
 def get_db_connection():
-    conn = sqlite3.connect(DB_FILE)
+    """Return a connection to the job database.
+
+    Inside a ``Session`` this is the session's shared connection, whose
+    ``close`` is a no-op; otherwise a new connection is opened.
+    """
+    if shared_connection is not None:
+        return shared_connection
+    return open_connection()
+
+
+def open_connection(factory=sqlite3.Connection, cached_statements=128):
+    """Open a tuned connection to the job database, migrating it if needed."""
+    conn = sqlite3.connect(
+        DB_FILE,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        factory=factory,
+        cached_statements=cached_statements,
+    )
     conn.row_factory = sqlite3.Row
+    perf.trace_connection(conn)
+    for name, value in CONNECTION_PRAGMAS:
+        conn.execute(f"PRAGMA {name} = {value}")
+    migrate(conn)
     return conn
 
 
 def init_db():
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    """Create or upgrade the database schema."""
+    conn = open_connection()
+    conn.close()
+
+
+def get_setting(conn, key, default=None):
+    """Return the value stored for ``key`` in ``settings``, or ``default``."""
+    row = conn.execute("SELECT value FROM settings WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else default
+
+
+def set_setting(conn, key, value):
+    """Store ``value`` for ``key`` in ``settings``; the caller commits."""
+    conn.execute(
+        "INSERT INTO settings (key, value) VALUES (?, ?)"
+        " ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, str(value)),
+    )
+
+
+def schema_version(conn):
+    """Return the migration level recorded in ``PRAGMA user_version``."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """Apply pending migrations in a single immediate transaction.
+
+    Returns the resulting schema version. The version is re-read after the
+    write lock is taken so that concurrent processes migrate only once. A
+    migration returns ``True`` when the search index tables must be rebuilt,
+    which happens once after all pending migrations have run.
+    """
+    if schema_version(conn) >= len(MIGRATIONS):
+        return len(MIGRATIONS)
+
+    from ml_json_cli.search_index import reindex_all
+
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        cursor = conn.cursor()
+        rebuild_index = False
+        for version in range(schema_version(conn), len(MIGRATIONS)):
+            rebuild_index |= bool(MIGRATIONS[version](cursor))
+            cursor.execute(f"PRAGMA user_version = {version + 1}")
+        if rebuild_index:
+            reindex_all(cursor)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return len(MIGRATIONS)
+
 
+def _create_base_schema(cursor):
     cursor.execute(
         """
         CREATE TABLE IF NOT EXISTS jobs (
@@ -47,22 +153,295 @@ def init_db():
     """
     )
 
+
+def _add_version_counter(cursor):
+    """Replace the ``increment_version`` trigger with an indexed counter.
+
+    Versions are allocated from ``jobs.current_version`` and enforced unique
+    by an index on ``(job_id, version)``, so allocation no longer scans
+    ``job_versions``. Safe to run repeatedly.
+    """
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(jobs)")}
+    if "current_version" not in columns:
+        cursor.execute(
+            "ALTER TABLE jobs ADD COLUMN current_version INTEGER NOT NULL DEFAULT 0"
+        )
+
+    cursor.execute("DROP TRIGGER IF EXISTS increment_version")
+
+    if not _index_exists(cursor, "idx_job_versions_job_version"):
+        # Histories written by the trigger may contain duplicate or missing
+        # version numbers; renumber those jobs in insertion order first.
+        cursor.execute(
+            """
+            SELECT DISTINCT job_id FROM job_versions
+            GROUP BY job_id, version HAVING COUNT(*) > 1 OR version IS NULL
+            """
+        )
+        for (job_id,) in cursor.fetchall():
+            cursor.execute(
+                """
+                UPDATE job_versions SET version = (
+                    SELECT COUNT(*) FROM job_versions v
+                    WHERE v.job_id = job_versions.job_id AND v.id <= job_versions.id
+                )
+                WHERE job_id = ?
+                """,
+                (job_id,),
+            )
+        cursor.execute(
+            """
+            CREATE UNIQUE INDEX idx_job_versions_job_version
+            ON job_versions (job_id, version)
+            """
+        )
+        cursor.execute(
+            """
+            UPDATE jobs SET current_version = IFNULL(
+                (SELECT MAX(version) FROM job_versions v WHERE v.job_id = jobs.job_id), 0
+            )
+            """
+        )
+
+
+def _execute_statements(cursor, script):
+    """Run ``;``-separated statements inside the migration transaction.
+
+    Unlike ``executescript`` this does not commit first, so a failing
+    migration is rolled back as a whole.
+    """
+    for statement in script.split(";"):
+        if statement.strip():
+            cursor.execute(statement)
+
+
+def _index_exists(cursor, name):
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)
+    )
+    return cursor.fetchone() is not None
+
+
+def _add_content_hash(cursor):
+    """Store a canonical content hash on current and historical rows."""
+    from ml_json_cli.json_parser import row_content_hash
+
+    for table in ("jobs", "job_versions"):
+        columns = {row[1] for row in cursor.execute(f"PRAGMA table_info({table})")}
+        if "content_hash" not in columns:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN content_hash TEXT")
+        last_rowid = 0
+        while rows := cursor.execute(
+            f"SELECT rowid AS row_key, * FROM {table}"
+            " WHERE rowid > ? ORDER BY rowid LIMIT 1000",
+            (last_rowid,),
+        ).fetchall():
+            cursor.executemany(
+                f"UPDATE {table} SET content_hash = ? WHERE rowid = ?",
+                [(row_content_hash(row), row["row_key"]) for row in rows],
+            )
+            last_rowid = rows[-1]["row_key"]
     cursor.execute(
         """
-        CREATE TRIGGER IF NOT EXISTS increment_version
-        AFTER INSERT ON job_versions
-        FOR EACH ROW
-        WHEN (SELECT COUNT(*) FROM job_versions WHERE job_id = NEW.job_id) > 0
-        BEGIN
-            UPDATE job_versions SET version = (SELECT MAX(version) + 1 FROM job_versions WHERE job_id = NEW.job_id)
-            WHERE id = NEW.id;
-        END;
+        CREATE INDEX IF NOT EXISTS idx_job_versions_job_hash
+        ON job_versions (job_id, content_hash)
         """
     )
 
-    conn.commit()
-    conn.close()
+
+def _add_search_index(cursor):
+    """Materialize searchable job attributes into indexed side tables."""
+    _execute_statements(
+        cursor,
+        """
+        CREATE TABLE IF NOT EXISTS job_attributes (
+            id INTEGER PRIMARY KEY,
+            job_id TEXT NOT NULL UNIQUE,
+            bucket_span TEXT COLLATE NOCASE,
+            model_memory_limit TEXT COLLATE NOCASE,
+            created_by TEXT COLLATE NOCASE,
+            detector_function TEXT,
+            influencers TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_job_attributes_bucket_span
+            ON job_attributes (bucket_span);
+        CREATE INDEX IF NOT EXISTS idx_job_attributes_model_memory_limit
+            ON job_attributes (model_memory_limit);
+        CREATE INDEX IF NOT EXISTS idx_job_attributes_created_by
+            ON job_attributes (created_by);
+
+        CREATE TABLE IF NOT EXISTS job_detectors (
+            job_id TEXT NOT NULL,
+            detector_index INTEGER NOT NULL,
+            function TEXT COLLATE NOCASE,
+            PRIMARY KEY (job_id, detector_index)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_job_detectors_function
+            ON job_detectors (function, job_id);
+
+        CREATE TABLE IF NOT EXISTS job_influencers (
+            job_id TEXT NOT NULL,
+            influencer TEXT NOT NULL COLLATE NOCASE,
+            PRIMARY KEY (job_id, influencer)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_job_influencers_influencer
+            ON job_influencers (influencer, job_id);
+
+        CREATE TABLE IF NOT EXISTS job_groups (
+            job_id TEXT NOT NULL,
+            group_name TEXT NOT NULL COLLATE NOCASE,
+            PRIMARY KEY (job_id, group_name)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_job_groups_group_name
+            ON job_groups (group_name, job_id);
+
+        CREATE INDEX IF NOT EXISTS idx_jobs_last_updated ON jobs (last_updated);
+        """,
+    )
+    return True
+
+
+def _add_full_text_index(cursor):
+    """Index job and detector descriptions with FTS5.
+
+    Rows are keyed by ``job_attributes.id`` so that a job's entry can be
+    replaced without scanning the index.
+    """
+    cursor.execute(
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+            description, detector_description, tokenize = 'porter unicode61'
+        )
+        """
+    )
+    return True
+
+
+def _add_job_id_trigrams(cursor):
+    """Index lower-cased job ID trigrams to shortlist fuzzy matches."""
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS job_id_trigrams (
+            gram TEXT NOT NULL,
+            job_id TEXT NOT NULL,
+            PRIMARY KEY (gram, job_id)
+        ) WITHOUT ROWID
+        """
+    )
+    return True
+
+
+def _add_version_storage(cursor):
+    """Add ``settings`` and the columns of encoded ``job_versions`` rows.
+
+    Rows written in delta storage mode keep their fields in ``payload``
+    (see ``versions.py``) and leave the plain field columns ``NULL``.
+    """
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        )
+        """
+    )
+    columns = {row[1] for row in cursor.execute("PRAGMA table_info(job_versions)")}
+    if "encoding" not in columns:
+        cursor.execute("ALTER TABLE job_versions ADD COLUMN encoding TEXT")
+    if "payload" not in columns:
+        cursor.execute("ALTER TABLE job_versions ADD COLUMN payload BLOB")
+
+
+def _add_audit_log(cursor):
+    """Add the append-only audit log of mutating commands (see ``audit_log.py``).
+
+    Timestamps are UTC with milliseconds so that entries written within the
+    same second still sort in order.
+    """
+    _execute_statements(
+        cursor,
+        """
+        CREATE TABLE IF NOT EXISTS audit_log (
+            id INTEGER PRIMARY KEY,
+            timestamp TEXT NOT NULL
+                DEFAULT (strftime('%Y-%m-%d %H:%M:%f', 'now')),
+            command TEXT NOT NULL,
+            arguments TEXT NOT NULL,
+            user TEXT,
+            duration_ms REAL,
+            job_count INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_audit_log_timestamp
+            ON audit_log (timestamp);
+
+        CREATE TABLE IF NOT EXISTS audit_log_jobs (
+            audit_id INTEGER NOT NULL REFERENCES audit_log (id),
+            job_id TEXT NOT NULL,
+            old_hash TEXT,
+            new_hash TEXT,
+            PRIMARY KEY (audit_id, job_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_audit_log_jobs_job_id
+            ON audit_log_jobs (job_id, audit_id);
+        """,
+    )
+
+
+def _add_version_timestamp_index(cursor):
+    """Index versions by time for point-in-time (``--as-of``) lookups."""
+    cursor.execute(
+        """
+        CREATE INDEX IF NOT EXISTS idx_job_versions_job_timestamp
+        ON job_versions (job_id, timestamp, version)
+        """
+    )
+
+
+def _add_keyset_index(cursor):
+    """Index jobs by ``(last_updated, job_id)`` for keyset pagination in search."""
+    _execute_statements(
+        cursor,
+        """
+        DROP INDEX IF EXISTS idx_jobs_last_updated;
+        CREATE INDEX IF NOT EXISTS idx_jobs_last_updated_job_id
+            ON jobs (last_updated, job_id);
+        """,
+    )
+
+
+def _add_upstream_jobs(cursor):
+    """Keep the last upstream definition merged into each job.
+
+    ``mlcli merge --three-way`` uses it as the common ancestor of the next
+    upstream merge, since ``job_versions`` only holds local states.
+    """
+    cursor.execute(
+        """
+        CREATE TABLE IF NOT EXISTS upstream_jobs (
+            job_id TEXT PRIMARY KEY,
+            description TEXT,
+            groups TEXT,
+            analysis_config TEXT,
+            analysis_limits TEXT,
+            datafeed_config TEXT,
+            custom_settings TEXT,
+            content_hash TEXT,
+            merged_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
 
 
-if not os.path.exists(DB_FILE):
-    init_db()
+MIGRATIONS = [
+    _create_base_schema,
+    _add_version_counter,
+    _add_content_hash,
+    _add_search_index,
+    _add_full_text_index,
+    _add_job_id_trigrams,
+    _add_version_storage,
+    _add_audit_log,
+    _add_version_timestamp_index,
+    _add_keyset_index,
+    _add_upstream_jobs,
+]
@@ -0,0 +1,262 @@
+"""Structural diff of Elastic ML job definitions.
+
+``diff_jobs`` compares two jobs (``json_parser.Job`` objects, as returned by
+``versions.fetch_job``, or dicts of decoded fields) and returns a JSON-Patch
+style list of operations that turns the old job into the new one. Unlike a
+generic deep diff it knows the shape of a job: detectors are matched by
+``detector_index`` (or by position when two detectors share an index),
+groups, influencers and datafeed indices are compared as sets, and
+top-level fields that are equal are skipped without being walked, or
+decoded when both jobs store the same text.
+
+``merge_three_way`` uses the same structure for a three-way merge: changes
+made on either side since a common base are combined, and paths changed
+differently on both sides are reported as conflicts.
+"""
+
+from ml_json_cli.json_parser import Job
+
+# Lists whose order carries no meaning; paths are JSON Pointers.
+SET_PATHS = frozenset(
+    ("/groups", "/analysis_config/influencers", "/datafeed_config/indices")
+)
+# Lists of objects matched by a key rather than by position.
+KEYED_PATHS = {"/analysis_config/detectors": "detector_index"}
+
+
+def _escape(key):
+    return str(key).replace("~", "~0").replace("/", "~1")
+
+
+def _same(old, new):
+    return type(old) is type(new) and old == new
+
+
+def _hashable(value):
+    return (
+        value if isinstance(value, (str, int, float, bool, type(None))) else repr(value)
+    )
+
+
+def _diff_set(old, new, path, ops):
+    new_keys = {_hashable(value) for value in new}
+    old_keys = {_hashable(value) for value in old}
+    # Removals go last-index-first so that the patch can be applied in order.
+    for index in range(len(old) - 1, -1, -1):
+        if _hashable(old[index]) not in new_keys:
+            ops.append({"op": "remove", "path": f"{path}/{index}", "old": old[index]})
+    for value in new:
+        if _hashable(value) not in old_keys:
+            ops.append({"op": "add", "path": f"{path}/-", "value": value})
+
+
+def _by_key(items, key):
+    """Map each item's ``key`` (or its position) to ``(position, item)``.
+
+    Returns None when two items share a key, e.g. an explicit
+    ``detector_index`` equal to the position of a detector without one.
+    """
+    keyed = {}
+    for position, item in enumerate(items):
+        item_key = item.get(key, position) if isinstance(item, dict) else position
+        if item_key in keyed:
+            return None
+        keyed[item_key] = (position, item)
+    return keyed
+
+
+def _keyed(lists, key):
+    """Key each of ``lists`` by ``key``, or all by position if any collides."""
+    keyed = [_by_key(items, key) for items in lists]
+    if None in keyed:
+        return [
+            {position: (position, item) for position, item in enumerate(items)}
+            for items in lists
+        ]
+    return keyed
+
+
+def _diff_keyed(old, new, path, key, ops):
+    old_items, new_items = _keyed((old, new), key)
+    for item_key, (position, item) in old_items.items():
+        if item_key in new_items:
+            _diff(item, new_items[item_key][1], f"{path}/{position}", ops)
+    removed = [
+        (position, item)
+        for item_key, (position, item) in old_items.items()
+        if item_key not in new_items
+    ]
+    for position, item in sorted(removed, key=lambda pair: -pair[0]):
+        ops.append({"op": "remove", "path": f"{path}/{position}", "old": item})
+    for item_key, (_, item) in new_items.items():
+        if item_key not in old_items:
+            ops.append({"op": "add", "path": f"{path}/-", "value": item})
+
+
+def _diff(old, new, path, ops):
+    if _same(old, new):
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for key, value in old.items():
+            child = f"{path}/{_escape(key)}"
+            if key not in new:
+                ops.append({"op": "remove", "path": child, "old": value})
+            else:
+                _diff(value, new[key], child, ops)
+        for key, value in new.items():
+            if key not in old:
+                ops.append(
+                    {"op": "add", "path": f"{path}/{_escape(key)}", "value": value}
+                )
+    elif isinstance(old, list) and isinstance(new, list) and path in SET_PATHS:
+        _diff_set(old, new, path, ops)
+    elif isinstance(old, list) and isinstance(new, list) and path in KEYED_PATHS:
+        _diff_keyed(old, new, path, KEYED_PATHS[path], ops)
+    else:
+        ops.append({"op": "replace", "path": path, "old": old, "value": new})
+
+
+def _groups(value):
+    """Stored groups are a ``", "`` joined string; diff them as a list."""
+    if isinstance(value, str):
+        return [group for group in value.split(", ") if group]
+    return value
+
+
+def diff_jobs(old, new):
+    """Return the JSON-Patch style operations turning job ``old`` into ``new``.
+
+    Each operation has ``op`` (``add``, ``remove`` or ``replace``) and a JSON
+    Pointer ``path``; ``value`` holds the new value and ``old`` the value
+    being removed or replaced. Operations apply in order as a JSON Patch once
+    the ``old`` keys are dropped.
+    """
+    ops = []
+    stored = isinstance(old, Job) and isinstance(new, Job)
+    for field in list(old) + [field for field in new if field not in old]:
+        if (
+            stored
+            and old.text(field) is not None
+            and old.text(field) == new.text(field)
+        ):
+            continue
+        old_value = old.get(field)
+        new_value = new.get(field)
+        if _same(old_value, new_value):
+            continue
+        path = f"/{_escape(field)}"
+        if field == "groups":
+            old_value, new_value = _groups(old_value), _groups(new_value)
+        if field not in new:
+            ops.append({"op": "remove", "path": path, "old": old_value})
+        elif field not in old:
+            ops.append({"op": "add", "path": path, "value": new_value})
+        else:
+            _diff(old_value, new_value, path, ops)
+    return ops
+
+
+# Stands in for a key that is absent on one side of a three-way merge.
+_MISSING = object()
+
+
+def _present(value):
+    return None if value is _MISSING else value
+
+
+def _merge_set(base, ours, theirs):
+    base_keys = {_hashable(value) for value in base}
+    ours_keys = {_hashable(value) for value in ours}
+    theirs_keys = {_hashable(value) for value in theirs}
+    kept = [
+        value
+        for value in ours
+        if _hashable(value) not in base_keys or _hashable(value) in theirs_keys
+    ]
+    added = [
+        value
+        for value in theirs
+        if _hashable(value) not in base_keys and _hashable(value) not in ours_keys
+    ]
+    return kept + added
+
+
+def _merge_keyed(base, ours, theirs, path, key, prefer, conflicts):
+    base_items, ours_items, theirs_items = _keyed((base, ours, theirs), key)
+    merged = []
+    for item_key in list(ours_items) + [k for k in theirs_items if k not in ours_items]:
+        item = _merge(
+            base_items.get(item_key, (None, _MISSING))[1],
+            ours_items.get(item_key, (None, _MISSING))[1],
+            theirs_items.get(item_key, (None, _MISSING))[1],
+            f"{path}/{_escape(item_key)}",
+            prefer,
+            conflicts,
+        )
+        if item is not _MISSING:
+            merged.append(item)
+    return merged
+
+
+def _merge(base, ours, theirs, path, prefer, conflicts):
+    if _same(ours, theirs) or _same(base, theirs):
+        return ours
+    if _same(base, ours):
+        return theirs
+    if isinstance(ours, dict) and isinstance(theirs, dict):
+        base = base if isinstance(base, dict) else {}
+        merged = {}
+        for key in list(ours) + [key for key in theirs if key not in ours]:
+            value = _merge(
+                base.get(key, _MISSING),
+                ours.get(key, _MISSING),
+                theirs.get(key, _MISSING),
+                f"{path}/{_escape(key)}",
+                prefer,
+                conflicts,
+            )
+            if value is not _MISSING:
+                merged[key] = value
+        return merged
+    if isinstance(ours, list) and isinstance(theirs, list):
+        base = base if isinstance(base, list) else []
+        if path in SET_PATHS:
+            return _merge_set(base, ours, theirs)
+        if path in KEYED_PATHS:
+            return _merge_keyed(
+                base, ours, theirs, path, KEYED_PATHS[path], prefer, conflicts
+            )
+    conflicts.append(
+        {
+            "path": path,
+            "base": _present(base),
+            "ours": _present(ours),
+            "theirs": _present(theirs),
+        }
+    )
+    return theirs if prefer == "theirs" else ours
+
+
+def merge_three_way(base, ours, theirs, prefer="ours"):
+    """Three-way merge decoded jobs ``ours`` and ``theirs`` against ``base``.
+
+    Returns ``(merged, conflicts)``. A change made on one side only is
+    applied; set-like lists merge additions and removals from both sides and
+    detectors are merged one by one by ``detector_index``. Each path changed
+    differently on both sides is a conflict with ``path``, ``base``, ``ours``
+    and ``theirs`` (``None`` when absent), resolved to the ``prefer`` side.
+    Detector paths use the ``detector_index`` instead of the list position,
+    unless detectors share an index and are matched by position instead.
+    """
+    conflicts = []
+    merged = {}
+    for field in list(ours) + [field for field in theirs if field not in ours]:
+        values = [job.get(field, _MISSING) for job in (base, ours, theirs)]
+        if field == "groups":
+            values = [
+                value if value is _MISSING else _groups(value) for value in values
+            ]
+        value = _merge(*values, f"/{_escape(field)}", prefer, conflicts)
+        if value is not _MISSING:
+            merged[field] = value
+    return merged, conflicts
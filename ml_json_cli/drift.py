@@ -0,0 +1,143 @@
+"""Fleet-wide drift: diff every job against its previous version or a baseline.
+
+Candidate pairs are streamed from a single query, and pairs whose content
+hashes match are dropped before any JSON is decoded. The remaining pairs are
+diffed with ``diff_jobs``, in a process pool when more than one worker is
+requested. Pairs are ``(job_id, old_hash, old, new_hash, new)`` where ``old``
+and ``new`` are tuples of raw ``JOB_FIELDS`` values, or ``None`` when the job
+is missing on that side.
+"""
+
+import collections
+import multiprocessing
+
+from ml_json_cli.diffing import diff_jobs
+from ml_json_cli.json_parser import Job
+from ml_json_cli.loader import QUEUE_DEPTH, expand_paths, iter_file_events
+from ml_json_cli.versions import JOB_FIELDS, version_fields
+
+DRIFT_CHUNK_SIZE = 200
+
+PREVIOUS_SQL = f"""
+    SELECT j.job_id, v.content_hash AS old_hash, v.version, v.encoding, v.payload,
+           {", ".join(f"v.{field} AS {field}" for field in JOB_FIELDS)},
+           j.content_hash AS new_hash,
+           {", ".join(f"j.{field} AS new_{field}" for field in JOB_FIELDS)}
+    FROM jobs j
+    JOIN job_versions v ON v.job_id = j.job_id AND v.version = j.current_version
+    WHERE v.content_hash IS NOT j.content_hash
+    ORDER BY j.job_id
+"""
+
+CURRENT_SQL = f"""
+    SELECT job_id, content_hash, {", ".join(JOB_FIELDS)}
+    FROM jobs ORDER BY job_id
+"""
+
+
+def iter_previous_pairs(conn, chunk_size=DRIFT_CHUNK_SIZE):
+    """Yield a pair for every job that differs from its previous version.
+
+    Jobs that were never changed have no previous version and are skipped.
+    Versions kept in delta storage are rebuilt one at a time.
+    """
+    cursor = conn.execute(PREVIOUS_SQL)
+    while rows := cursor.fetchmany(chunk_size):
+        for row in rows:
+            fields = version_fields(conn, row["job_id"], row)
+            old = tuple(fields[field] for field in JOB_FIELDS)
+            new = tuple(row[f"new_{field}"] for field in JOB_FIELDS)
+            yield row["job_id"], row["old_hash"], old, row["new_hash"], new
+
+
+def load_baseline(paths):
+    """Return ``{job_id: (content_hash, fields)}`` for the jobs in ``paths``.
+
+    Raises ``FileNotFoundError`` for missing paths and ``ValueError`` for
+    files that cannot be parsed.
+    """
+    baseline = {}
+    for path in expand_paths(paths):
+        for kind, _, payload in iter_file_events(path):
+            if kind == "rows":
+                for row in payload:
+                    fields = tuple(getattr(row, field) for field in JOB_FIELDS)
+                    baseline[row.job_id] = (row.content_hash, fields)
+            elif kind == "error":
+                raise ValueError(f"{path}: {payload}")
+    return baseline
+
+
+def iter_baseline_pairs(conn, baseline, chunk_size=DRIFT_CHUNK_SIZE):
+    """Yield a pair for every job that differs from ``baseline``.
+
+    Baseline jobs missing from the database are yielded last, with ``new``
+    set to ``None``.
+    """
+    remaining = dict(baseline)
+    cursor = conn.execute(CURRENT_SQL)
+    while rows := cursor.fetchmany(chunk_size):
+        for row in rows:
+            old_hash, old = remaining.pop(row["job_id"], (None, None))
+            if old_hash == row["content_hash"]:
+                continue
+            new = tuple(row[field] for field in JOB_FIELDS)
+            yield row["job_id"], old_hash, old, row["content_hash"], new
+    for job_id, (old_hash, old) in sorted(remaining.items()):
+        yield job_id, old_hash, old, None, None
+
+
+def drift_record(pair):
+    """Return the drift record of one pair."""
+    job_id, _, old, _, new = pair
+    if old is None:
+        return {"job_id": job_id, "status": "new", "changes": []}
+    if new is None:
+        return {"job_id": job_id, "status": "missing", "changes": []}
+    changes = diff_jobs(
+        Job.from_row(dict(zip(JOB_FIELDS, old)), job_id),
+        Job.from_row(dict(zip(JOB_FIELDS, new)), job_id),
+    )
+    return {
+        "job_id": job_id,
+        "status": "changed" if changes else "unchanged",
+        "changes": changes,
+    }
+
+
+def _drift_chunk(pairs):
+    return [drift_record(pair) for pair in pairs]
+
+
+def _chunks(pairs, chunk_size):
+    chunk = []
+    for pair in pairs:
+        chunk.append(pair)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_drift(pairs, workers=1, chunk_size=DRIFT_CHUNK_SIZE):
+    """Yield drift records for ``pairs``, diffing chunks in a process pool.
+
+    ``pairs`` is consumed in the calling thread, since it usually reads from
+    a SQLite cursor, and at most ``workers * QUEUE_DEPTH`` chunks are in
+    flight at once. Records are yielded in the order of ``pairs``.
+    """
+    if workers <= 1:
+        for pair in pairs:
+            yield drift_record(pair)
+        return
+
+    ctx = multiprocessing.get_context()
+    with ctx.Pool(workers) as pool:
+        pending = collections.deque()
+        for chunk in _chunks(pairs, chunk_size):
+            pending.append(pool.apply_async(_drift_chunk, (chunk,)))
+            if len(pending) >= workers * QUEUE_DEPTH:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
@@ -0,0 +1,458 @@
+"""Incremental parsing of Elastic ML job exports.
+
+Jobs are read with ``ijson`` so that large module exports never have to be
+held in memory as a whole, and are normalized into ``JobRow`` tuples that
+match the column layout of the ``jobs`` table, plus the ``JobAttributes``
+that feed the search index.
+
+``Job`` is the one model of a job definition shared by every command: it
+wraps a parsed document or a stored row, decodes each JSON field only when
+it is first read and encodes back to a ``JobRow``.
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+from collections.abc import Mapping
+
+import ijson
+
+NDJSON_EXTENSIONS = (".ndjson", ".jsonl")
+
+JobRow = namedtuple(
+    "JobRow",
+    [
+        "job_id",
+        "description",
+        "groups",
+        "analysis_config",
+        "analysis_limits",
+        "datafeed_config",
+        "custom_settings",
+        "content_hash",
+        "attributes",
+    ],
+)
+
+# JobRow fields stored in the ``jobs`` table, in column order.
+JOB_COLUMNS = JobRow._fields[:-1]
+
+JobAttributes = namedtuple(
+    "JobAttributes",
+    [
+        "bucket_span",
+        "model_memory_limit",
+        "created_by",
+        "detectors",
+        "influencers",
+        "groups",
+        "description",
+        "detector_descriptions",
+    ],
+)
+
+# Columns holding JSON documents, as opposed to plain text.
+JSON_FIELDS = (
+    "analysis_config",
+    "analysis_limits",
+    "datafeed_config",
+    "custom_settings",
+)
+# The fields of a job definition, as stored in ``jobs`` and ``job_versions``.
+JOB_FIELDS = ("description", "groups") + JSON_FIELDS
+
+
+def _first_token(f):
+    """Return the first non-whitespace byte of a binary file, then rewind."""
+    start = f.tell()
+    while True:
+        char = f.read(1)
+        if not char or not char.isspace():
+            break
+    f.seek(start)
+    return char
+
+
+def iter_jobs(file_path):
+    """Yield job documents from an Elastic ML export one at a time.
+
+    The file may contain a single ``{"job": ..., "datafeed": ...}`` document,
+    a JSON array of them, or (for ``.ndjson``/``.jsonl`` files) one document
+    per line. Raises ``ijson.JSONError`` on malformed input.
+    """
+    with open(file_path, "rb") as f:
+        if f.read(3) != b"\xef\xbb\xbf":
+            f.seek(0)
+        if os.path.splitext(file_path)[1].lower() in NDJSON_EXTENSIONS:
+            yield from ijson.items(f, "", use_float=True, multiple_values=True)
+            return
+        prefix = "item" if _first_token(f) == b"[" else ""
+        yield from ijson.items(f, prefix, use_float=True)
+
+
+def canonical_json(value):
+    """Serialize ``value`` deterministically (sorted keys, no whitespace)."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def content_hash(
+    description,
+    groups,
+    analysis_config,
+    analysis_limits,
+    datafeed_config,
+    custom_settings,
+):
+    """Return the SHA-256 of a job's canonical content.
+
+    The JSON fields are passed decoded, so formatting and key order in the
+    source file do not affect the hash.
+    """
+    payload = canonical_json(
+        [
+            description,
+            groups,
+            analysis_config,
+            analysis_limits,
+            datafeed_config,
+            custom_settings,
+        ]
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _decode(text):
+    if not text:
+        return {}
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
+
+
+def row_content_hash(row):
+    """Compute ``content_hash`` for a stored ``jobs``/``job_versions`` row."""
+    return content_hash(
+        row["description"] or "",
+        row["groups"] or "",
+        *(_decode(row[field]) for field in JSON_FIELDS),
+    )
+
+
+# Elasticsearch byte and time units, as used by model_memory_limit and
+# bucket_span. A unitless model_memory_limit is a number of MiB.
+MEMORY_UNITS = {
+    "b": 1,
+    "kb": 1024,
+    "mb": 1024**2,
+    "gb": 1024**3,
+    "tb": 1024**4,
+    "pb": 1024**5,
+}
+DURATION_UNITS = {
+    "nanos": 1e-9,
+    "micros": 1e-6,
+    "ms": 1e-3,
+    "s": 1,
+    "m": 60,
+    "h": 3600,
+    "d": 86400,
+}
+UNIT_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([a-z]*)\s*$", re.IGNORECASE)
+
+
+def _parse_units(value, units, default_unit):
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value * units[default_unit] if default_unit else None
+    match = UNIT_RE.match(str(value))
+    if not match:
+        return None
+    unit = match.group(2).lower() or default_unit
+    if unit not in units:
+        return None
+    return float(match.group(1)) * units[unit]
+
+
+def parse_memory(value):
+    """Convert a memory limit such as ``"15mb"`` to bytes, or ``None``."""
+    size = _parse_units(value, MEMORY_UNITS, "mb")
+    return None if size is None else int(size)
+
+
+def parse_duration(value):
+    """Convert a time value such as ``"12m"`` to seconds, or ``None``."""
+    return _parse_units(value, DURATION_UNITS, None)
+
+
+def _as_dict(value):
+    return value if isinstance(value, dict) else {}
+
+
+# Fields stored empty, with a warning, when they cannot be serialized; the
+# others raise ``TypeError``. Only these are stored without ASCII escapes,
+# as they always have been, so that stored text stays byte-identical.
+LENIENT_FIELDS = ("datafeed_config", "custom_settings")
+
+
+def _encode(value, field, job_id, warn):
+    """Return ``(value, text)`` for storing ``field`` of a job."""
+    if field not in LENIENT_FIELDS:
+        return value, json.dumps(value)
+    try:
+        return value, json.dumps(value, ensure_ascii=False)
+    except (TypeError, ValueError):
+        if warn:
+            warn(f"Unable to convert {field} for job {job_id}. Storing empty JSON.")
+        return {}, "{}"
+
+
+class Detector:
+    """One detector of a job's ``analysis_config``.
+
+    ``index`` is the explicit ``detector_index``, or None when the detector
+    has none.
+    """
+
+    __slots__ = (
+        "index",
+        "function",
+        "field_name",
+        "by_field_name",
+        "over_field_name",
+        "partition_field_name",
+        "description",
+    )
+
+    def __init__(self, detector):
+        get = detector.get
+        self.index = get("detector_index")
+        self.function = get("function")
+        self.field_name = get("field_name")
+        self.by_field_name = get("by_field_name")
+        self.over_field_name = get("over_field_name")
+        self.partition_field_name = get("partition_field_name")
+        self.description = get("detector_description")
+
+
+class Datafeed:
+    """The identifying fields of a job's datafeed."""
+
+    __slots__ = ("datafeed_id", "job_id", "indices")
+
+    def __init__(self, datafeed):
+        self.datafeed_id = datafeed.get("datafeed_id")
+        self.job_id = datafeed.get("job_id")
+        self.indices = tuple(datafeed.get("indices") or ())
+
+
+# Marks a JSON field of a stored ``Job`` that has not been decoded yet.
+_UNDECODED = object()
+
+
+class _JsonField:
+    """A ``Job`` field kept as its stored JSON text until first read."""
+
+    def __set_name__(self, owner, name):
+        self.value = f"_{name}"
+        self.text = f"_{name}_text"
+
+    def __get__(self, job, owner=None):
+        if job is None:
+            return self
+        value = getattr(job, self.value)
+        if value is _UNDECODED:
+            value = _decode(getattr(job, self.text))
+            setattr(job, self.value, value)
+        return value
+
+
+class Job(Mapping):
+    """A job definition whose JSON fields are decoded on first access.
+
+    ``from_row`` wraps a stored ``jobs``/``job_versions`` row, or the fields
+    rebuilt by ``versions.version_fields``, without decoding anything;
+    ``from_document`` wraps a parsed export document. A job reads as a
+    mapping of ``versions.JOB_FIELDS`` (``groups`` as its stored ``", "``
+    joined text), so only the fields a command touches are decoded.
+    ``to_row`` encodes it for the ``jobs`` table. Decoded values may be
+    shared and must not be modified.
+    """
+
+    __slots__ = (
+        "job_id",
+        "description",
+        "groups",
+        "_analysis_config",
+        "_analysis_config_text",
+        "_analysis_limits",
+        "_analysis_limits_text",
+        "_datafeed_config",
+        "_datafeed_config_text",
+        "_custom_settings",
+        "_custom_settings_text",
+    )
+
+    analysis_config = _JsonField()
+    analysis_limits = _JsonField()
+    datafeed_config = _JsonField()
+    custom_settings = _JsonField()
+
+    @classmethod
+    def from_row(cls, row, job_id=None):
+        """Wrap stored fields; ``job_id`` defaults to ``row["job_id"]``."""
+        job = cls.__new__(cls)
+        job.job_id = row["job_id"] if job_id is None else job_id
+        job.description = row["description"]
+        job.groups = row["groups"]
+        job._analysis_config = _UNDECODED
+        job._analysis_config_text = row["analysis_config"]
+        job._analysis_limits = _UNDECODED
+        job._analysis_limits_text = row["analysis_limits"]
+        job._datafeed_config = _UNDECODED
+        job._datafeed_config_text = row["datafeed_config"]
+        job._custom_settings = _UNDECODED
+        job._custom_settings_text = row["custom_settings"]
+        return job
+
+    @classmethod
+    def from_document(cls, document):
+        """Wrap a ``{"job": ..., "datafeed": ...}`` export document.
+
+        Raises ``KeyError`` when it has no ``job.job_id``.
+        """
+        fields = document["job"]
+        job = cls.__new__(cls)
+        job.job_id = fields["job_id"]
+        job.description = fields.get("description", "")
+        job.groups = ", ".join(fields.get("groups", []))
+        job._analysis_config = fields.get("analysis_config", {})
+        job._analysis_config_text = None
+        job._analysis_limits = fields.get("analysis_limits", {})
+        job._analysis_limits_text = None
+        job._datafeed_config = document.get("datafeed", {})
+        job._datafeed_config_text = None
+        job._custom_settings = fields.get("custom_settings", {})
+        job._custom_settings_text = None
+        return job
+
+    def __getitem__(self, field):
+        if field not in JOB_FIELDS:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def __contains__(self, field):
+        return field in JOB_FIELDS
+
+    def __iter__(self):
+        return iter(JOB_FIELDS)
+
+    def __len__(self):
+        return len(JOB_FIELDS)
+
+    def __repr__(self):
+        return f"Job({self.job_id!r})"
+
+    def text(self, field):
+        """Return the stored JSON text of ``field``, or None if not stored."""
+        if field in ("description", "groups"):
+            return getattr(self, field)
+        return getattr(self, f"_{field}_text")
+
+    @property
+    def group_list(self):
+        return [group for group in (self.groups or "").split(", ") if group]
+
+    @property
+    def detectors(self):
+        """The detectors as ``Detector`` objects; non-object entries are skipped."""
+        detectors = _as_dict(self.analysis_config).get("detectors")
+        if not isinstance(detectors, list):
+            return ()
+        return tuple(
+            Detector(detector) for detector in detectors if isinstance(detector, dict)
+        )
+
+    @property
+    def datafeed(self):
+        return Datafeed(_as_dict(self.datafeed_config))
+
+    def attributes(self):
+        """Collect the ``JobAttributes`` that feed the search index.
+
+        ``detectors`` is a tuple of ``(index, function)`` pairs. Fields that
+        are not JSON objects are treated as empty; ``datafeed_config`` is
+        never decoded.
+        """
+        analysis_config = _as_dict(self.analysis_config)
+        # Read from the dicts: building ``Detector`` objects would cost as
+        # much as decoding the fields.
+        detectors = analysis_config.get("detectors")
+        if not isinstance(detectors, list):
+            detectors = ()
+        detectors = [detector for detector in detectors if isinstance(detector, dict)]
+        return JobAttributes(
+            bucket_span=analysis_config.get("bucket_span"),
+            model_memory_limit=_as_dict(self.analysis_limits).get("model_memory_limit"),
+            created_by=_as_dict(self.custom_settings).get("created_by"),
+            detectors=tuple(
+                (detector.get("detector_index", position), detector.get("function"))
+                for position, detector in enumerate(detectors)
+            ),
+            influencers=tuple(analysis_config.get("influencers") or ()),
+            groups=tuple(self.group_list),
+            description=self.description or "",
+            detector_descriptions=tuple(
+                detector["detector_description"]
+                for detector in detectors
+                if detector.get("detector_description")
+            ),
+        )
+
+    def document(self):
+        """Rebuild the export document of the job."""
+        fields = {
+            "job_id": self.job_id,
+            "description": self.description or "",
+            "groups": self.group_list,
+            "analysis_config": self.analysis_config,
+            "analysis_limits": self.analysis_limits,
+            "custom_settings": self.custom_settings,
+        }
+        return {"job": fields, "datafeed": self.datafeed_config}
+
+    def to_row(self, warn=None):
+        """Encode the job as a ``JobRow``, reusing stored JSON text.
+
+        ``warn`` is called with a message when one of ``LENIENT_FIELDS``
+        cannot be serialized and is stored empty instead.
+        """
+        texts = {}
+        values = {}
+        for field in JSON_FIELDS:
+            value = getattr(self, field)
+            text = getattr(self, f"_{field}_text")
+            if text is None:
+                value, text = _encode(value, field, self.job_id, warn)
+            values[field] = value
+            texts[field] = text
+        return JobRow(
+            job_id=self.job_id,
+            description=self.description,
+            groups=self.groups,
+            content_hash=content_hash(self.description, self.groups, **values),
+            attributes=self.attributes(),
+            **texts,
+        )
+
+
+def normalize_job(document, warn=None):
+    """Convert a job document into a ``JobRow``.
+
+    Raises ``KeyError`` when the document has no ``job.job_id``. ``warn`` is
+    called with a message when a field cannot be serialized.
+    """
+    return Job.from_document(document).to_row(warn)
@@ -0,0 +1,302 @@
+"""Batched database writer for normalized jobs.
+
+``JobWriter`` groups ``JobRow`` tuples into batches and writes each batch
+with ``executemany`` inside a single transaction, so loading thousands of
+jobs costs one commit per batch instead of one per job.
+
+``iter_load_events`` parses, validates and normalizes input files,
+optionally in a process pool. Workers stream their rows to the caller over a bounded queue
+so that a single connection performs every write.
+"""
+
+import glob
+import json
+import multiprocessing
+import os
+import queue as queue_module
+
+import ijson
+
+from ml_json_cli.json_parser import (
+    JOB_COLUMNS,
+    NDJSON_EXTENSIONS,
+    iter_jobs,
+    normalize_job,
+)
+from ml_json_cli import perf
+from ml_json_cli.search_index import write_attributes
+from ml_json_cli.validation import InvalidJob, document_job_id, validate_job
+from ml_json_cli.versions import snapshot_jobs, storage_settings
+
+SNAPSHOT_SQL = """
+    INSERT INTO job_versions (job_id, version, description, groups, analysis_config,
+                              analysis_limits, datafeed_config, custom_settings,
+                              content_hash, timestamp)
+    SELECT job_id, current_version + 1, description, groups, analysis_config, analysis_limits,
+           datafeed_config, custom_settings, content_hash, last_updated
+    FROM jobs WHERE job_id = ?
+"""
+
+UPSERT_SQL = """
+    INSERT INTO jobs (job_id, description, groups, analysis_config, analysis_limits,
+                      datafeed_config, custom_settings, content_hash, last_updated)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT(job_id) DO UPDATE SET
+        description = excluded.description,
+        groups = excluded.groups,
+        analysis_config = excluded.analysis_config,
+        analysis_limits = excluded.analysis_limits,
+        datafeed_config = excluded.datafeed_config,
+        custom_settings = excluded.custom_settings,
+        content_hash = excluded.content_hash,
+        last_updated = CURRENT_TIMESTAMP,
+        current_version = jobs.current_version + 1
+"""
+
+EXISTING_HASHES_SQL = """
+    SELECT job_id, content_hash FROM jobs
+    WHERE job_id IN (SELECT value FROM json_each(?))
+"""
+
+DEFAULT_BATCH_SIZE = 500
+CHUNK_SIZE = 256
+QUEUE_DEPTH = 4
+POLL_INTERVAL = 1.0
+JOB_FILE_EXTENSIONS = (".json",) + NDJSON_EXTENSIONS
+
+
+class JobWriter:
+    """Accumulate ``JobRow`` tuples and write them in batched transactions.
+
+    Jobs whose ``content_hash`` matches the stored one are left untouched;
+    written jobs also refresh their search index attributes.
+    Changed jobs are snapshotted into ``job_versions`` before being
+    overwritten, taking the next number from ``jobs.current_version``. A job
+    ID repeated within a batch forces a flush first so that every
+    occurrence is compared against what the previous one stored. Snapshots
+    follow the version storage mode configured when the writer is created.
+    Written jobs are recorded in ``audit`` (an ``AuditLog``), if given, in
+    the same transaction.
+    """
+
+    def __init__(self, conn, batch_size=DEFAULT_BATCH_SIZE, audit=None):
+        self.conn = conn
+        self.audit = audit
+        self.batch_size = max(1, batch_size)
+        self.processed = 0
+        self.new = 0
+        self.changed = 0
+        self.unchanged = 0
+        self.batches = 0
+        self.storage = storage_settings(conn)
+        self._batch = []
+        self._job_ids = set()
+
+    def add(self, row):
+        """Queue a row, flushing when the batch is full."""
+        if row.job_id in self._job_ids:
+            self.flush()
+        self._batch.append(row)
+        self._job_ids.add(row.job_id)
+        if len(self._batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write the pending batch in one transaction."""
+        if not self._batch:
+            return
+        with perf.phase("write"):
+            cursor = self.conn.cursor()
+            cursor.execute(EXISTING_HASHES_SQL, (json.dumps(list(self._job_ids)),))
+            existing = dict(cursor.fetchall())
+            changed = [
+                row
+                for row in self._batch
+                if row.job_id in existing and existing[row.job_id] != row.content_hash
+            ]
+            upserts = changed + [
+                row for row in self._batch if row.job_id not in existing
+            ]
+
+            if upserts:
+                if self.storage[0] == "delta":
+                    snapshot_jobs(
+                        self.conn, [row.job_id for row in changed], *self.storage
+                    )
+                else:
+                    cursor.executemany(SNAPSHOT_SQL, [(row.job_id,) for row in changed])
+                cursor.executemany(
+                    UPSERT_SQL, [row[: len(JOB_COLUMNS)] for row in upserts]
+                )
+                write_attributes(
+                    cursor, [(row.job_id, row.attributes) for row in upserts]
+                )
+                if self.audit:
+                    for row in upserts:
+                        self.audit.record(
+                            row.job_id, existing.get(row.job_id), row.content_hash
+                        )
+                    self.audit.flush()
+                self.conn.commit()
+                self.batches += 1
+
+            self.processed += len(self._batch)
+            self.changed += len(changed)
+            self.new += len(upserts) - len(changed)
+            self.unchanged += len(self._batch) - len(upserts)
+            self._batch = []
+            self._job_ids = set()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.conn.rollback()
+        return False
+
+
+def expand_paths(paths):
+    """Expand files, directories and glob patterns into a sorted file list.
+
+    Directories are searched recursively for ``.json``, ``.ndjson`` and
+    ``.jsonl`` files. Raises ``FileNotFoundError`` for a path that matches
+    nothing.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            matches = [
+                match
+                for match in glob.glob(os.path.join(path, "**", "*"), recursive=True)
+                if os.path.isfile(match)
+                and os.path.splitext(match)[1].lower() in JOB_FILE_EXTENSIONS
+            ]
+        elif os.path.isfile(path):
+            matches = [path]
+        else:
+            matches = [match for match in glob.glob(path) if os.path.isfile(match)]
+            if not matches:
+                raise FileNotFoundError(path)
+        files.extend(sorted(matches))
+    return list(dict.fromkeys(files))
+
+
+def iter_file_events(path, chunk_size=CHUNK_SIZE, validate=True):
+    """Parse one file, yielding ``(kind, ...)`` events.
+
+    Events are ``("rows", path, [JobRow, ...])``, ``("warning", path, msg)``,
+    ``("skipped", path, msg)``, ``("invalid", path, InvalidJob)`` and
+    ``("error", path, msg)``. With ``validate`` documents failing
+    ``validate_job`` are reported as invalid instead of being loaded.
+
+    Rows are held back until the whole file has parsed, so a truncated or
+    malformed file yields its ``error`` event and no rows at all.
+    """
+    chunks = []
+    rows = []
+    warnings = []
+    try:
+        for document in iter_jobs(path):
+            if validate and (errors := validate_job(document)):
+                yield (
+                    "invalid",
+                    path,
+                    InvalidJob(path, document_job_id(document), errors),
+                )
+                continue
+            try:
+                rows.append(normalize_job(document, warn=warnings.append))
+            except KeyError as e:
+                yield ("skipped", path, f"Missing key {str(e)} in job data")
+            except TypeError:
+                yield ("skipped", path, "Job entry is not a JSON object")
+            for message in warnings:
+                yield ("warning", path, message)
+            warnings.clear()
+            if len(rows) >= chunk_size:
+                chunks.append(rows)
+                rows = []
+    except ijson.JSONError as e:
+        yield ("error", path, f"Failed to parse JSON ({e})")
+        return
+    except OSError as e:
+        yield ("error", path, str(e))
+        return
+    if rows:
+        chunks.append(rows)
+    for rows in chunks:
+        yield ("rows", path, rows)
+
+
+_worker_queue = None
+_worker_chunk_size = CHUNK_SIZE
+_worker_validate = True
+
+
+def _init_worker(queue, chunk_size, validate):
+    global _worker_queue, _worker_chunk_size, _worker_validate  # pylint: disable=global-statement
+    _worker_queue = queue
+    _worker_chunk_size = chunk_size
+    _worker_validate = validate
+
+
+def _parse_worker(path):
+    try:
+        for event in iter_file_events(path, _worker_chunk_size, _worker_validate):
+            _worker_queue.put(event)
+    finally:
+        _worker_queue.put(("done", path, None))
+
+
+def _child_pids():
+    return {process.pid for process in multiprocessing.active_children()}
+
+
+def _check_workers(result, worker_pids):
+    """Raise if the pool failed or one of its workers died mid-file."""
+    if result.ready():
+        result.get()
+        raise RuntimeError("Parser pool finished without reporting every file")
+    if not worker_pids <= _child_pids():
+        raise RuntimeError("A parser worker exited unexpectedly")
+
+
+def iter_load_events(paths, workers=1, chunk_size=CHUNK_SIZE, validate=True):
+    """Yield parse events for every file in ``paths``.
+
+    With more than one worker and file, files are parsed by a process pool
+    and events arrive in completion order through a queue bounded to
+    ``workers * QUEUE_DEPTH`` chunks, which keeps memory flat when the
+    writer is slower than the parsers. While the queue is idle the pool is
+    checked every ``POLL_INTERVAL`` seconds, and ``RuntimeError`` is raised
+    if a worker died mid-file instead of waiting for it forever.
+    """
+    workers = min(workers, len(paths))
+    if workers <= 1:
+        for path in paths:
+            yield from iter_file_events(path, chunk_size, validate)
+        return
+
+    ctx = multiprocessing.get_context()
+    queue = ctx.Queue(maxsize=workers * QUEUE_DEPTH)
+    children = _child_pids()
+    with ctx.Pool(
+        workers, initializer=_init_worker, initargs=(queue, chunk_size, validate)
+    ) as pool:
+        worker_pids = _child_pids() - children
+        result = pool.map_async(_parse_worker, paths, chunksize=1)
+        pending = len(paths)
+        while pending:
+            try:
+                event = queue.get(timeout=POLL_INTERVAL)
+            except queue_module.Empty:
+                _check_workers(result, worker_pids)
+                continue
+            if event[0] == "done":
+                pending -= 1
+                continue
+            yield event
+        result.get()
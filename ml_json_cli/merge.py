@@ -0,0 +1,456 @@
+"""Set-based resolution of job histories for ``mlcli merge``.
+
+Every version of the jobs being merged is staged once in the temporary
+table ``merge_versions``. Each field is then resolved for all jobs at once,
+using its own strategy:
+
+``latest`` / ``earliest``
+    The value stored by the newest / oldest version.
+``most_common``
+    The value stored by the most versions; ties go to the value stored
+    most recently. A missing field (``NULL``) counts as a value.
+
+A strategy picks, per job, the version to copy a field from. ``latest`` and
+``earliest`` pick the same version for every field, so all fields using
+them are copied in one pass; ``most_common`` ranks the distinct values of
+each field with a window function in a pass of its own. Fields are
+resolved independently, so the merged definition may combine values from
+different versions.
+
+Full-storage rows are staged with one ``INSERT ... SELECT``; only versions
+kept in delta storage are decoded in Python.
+
+``three_way_merge`` instead merges incoming job documents, such as an
+updated Elastic module, into the current definitions: see
+``diffing.merge_three_way``. Each merged document is kept in
+``upstream_jobs`` as the ancestor of the job's next upstream merge.
+"""
+
+import json
+from collections import namedtuple
+
+from ml_json_cli.diffing import merge_three_way
+from ml_json_cli.json_parser import Job, normalize_job, row_content_hash
+from ml_json_cli.loader import JobWriter
+from ml_json_cli.search_index import reindex_jobs
+from ml_json_cli.versions import (
+    JOB_FIELDS,
+    snapshot_jobs,
+    storage_settings,
+    version_fields,
+)
+
+STRATEGIES = ("latest", "earliest", "most_common")
+
+STAGE_CHUNK_SIZE = 1000
+
+# Stored version used as the common ancestor of a three-way merge when a
+# job has no merged upstream definition yet.
+BASES = ("earliest", "latest")
+THREE_WAY_CHUNK_SIZE = 500
+
+# Jobs that still exist and have more than one stored version.
+MERGE_JOBS_SQL = """
+    SELECT job_id FROM job_versions
+    WHERE job_id IN (SELECT job_id FROM jobs)
+    GROUP BY job_id HAVING COUNT(*) > 1
+"""
+
+# The ``(job_id, version)`` each strategy copies a field from. Queries
+# without a ``{field}`` placeholder pick the same version for every field.
+PICK_SQL = {
+    "latest": """
+        SELECT job_id, MAX(version) AS version FROM merge_versions GROUP BY job_id
+    """,
+    "earliest": """
+        SELECT job_id, MIN(version) AS version FROM merge_versions GROUP BY job_id
+    """,
+    "most_common": """
+        SELECT job_id, version FROM (
+            SELECT job_id, MAX(version) AS version,
+                   ROW_NUMBER() OVER (
+                       PARTITION BY job_id ORDER BY COUNT(*) DESC, MAX(version) DESC
+                   ) AS rank
+            FROM merge_versions GROUP BY job_id, {field}
+        ) WHERE rank = 1
+    """,
+}
+
+MergeChange = namedtuple("MergeChange", ["job_id", "fields"])
+ThreeWayResult = namedtuple(
+    "ThreeWayResult", ["processed", "new", "changed", "unchanged", "conflicts"]
+)
+
+
+def _create_temp_tables(conn):
+    columns = ", ".join(f"{field} TEXT" for field in JOB_FIELDS)
+    _drop_temp_tables(conn)
+    conn.execute(
+        f"""
+        CREATE TEMP TABLE merge_versions (
+            job_id TEXT NOT NULL,
+            version INTEGER NOT NULL,
+            content_hash TEXT,
+            {columns},
+            PRIMARY KEY (job_id, version)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TEMP TABLE merge_resolved (
+            job_id TEXT PRIMARY KEY,
+            {columns},
+            content_hash TEXT,
+            changed INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+
+
+def _drop_temp_tables(conn):
+    conn.execute("DROP TABLE IF EXISTS temp.merge_versions")
+    conn.execute("DROP TABLE IF EXISTS temp.merge_resolved")
+
+
+def stage_versions(conn):
+    """Copy every version of the jobs to merge into ``merge_versions``."""
+    fields = ", ".join(JOB_FIELDS)
+    conn.execute(
+        f"""
+        INSERT INTO merge_versions (job_id, version, content_hash, {fields})
+        SELECT job_id, version, content_hash, {fields} FROM job_versions
+        WHERE encoding IS NULL AND job_id IN ({MERGE_JOBS_SQL})
+        """
+    )
+    cursor = conn.execute(
+        f"""
+        SELECT job_id, version, content_hash, encoding, payload, {fields}
+        FROM job_versions
+        WHERE encoding IS NOT NULL AND job_id IN ({MERGE_JOBS_SQL})
+        """
+    )
+    insert = f"""
+        INSERT INTO merge_versions (job_id, version, content_hash, {fields})
+        VALUES (?, ?, ?, {", ".join("?" for _ in JOB_FIELDS)})
+    """
+    while rows := cursor.fetchmany(STAGE_CHUNK_SIZE):
+        staged = []
+        for row in rows:
+            decoded = version_fields(conn, row["job_id"], row)
+            staged.append(
+                (row["job_id"], row["version"], row["content_hash"])
+                + tuple(decoded[field] for field in JOB_FIELDS)
+            )
+        conn.executemany(insert, staged)
+
+
+def resolution_passes(strategies):
+    """Group fields into ``(pick_sql, fields)`` passes over ``merge_versions``."""
+    passes = []
+    for strategy in STRATEGIES:
+        fields = [field for field in JOB_FIELDS if strategies[field] == strategy]
+        if "{field}" not in PICK_SQL[strategy]:
+            passes.append((PICK_SQL[strategy], fields))
+            continue
+        for field in fields:
+            passes.append((PICK_SQL[strategy].format(field=field), [field]))
+    return [(sql, fields) for sql, fields in passes if fields]
+
+
+def resolve_fields(conn, strategies):
+    """Fill ``merge_resolved`` with one merged row per staged job.
+
+    ``strategies`` maps every field in ``JOB_FIELDS`` to a strategy. Merged
+    rows identical to a stored version take that version's content hash.
+    """
+    conn.execute(
+        "INSERT INTO merge_resolved (job_id) SELECT DISTINCT job_id FROM merge_versions"
+    )
+    for sql, fields in resolution_passes(strategies):
+        conn.execute(
+            f"""
+            UPDATE merge_resolved SET
+                {", ".join(f"{field} = v.{field}" for field in fields)}
+            FROM ({sql}) AS picked
+            JOIN merge_versions v
+                ON v.job_id = picked.job_id AND v.version = picked.version
+            WHERE merge_resolved.job_id = picked.job_id
+            """
+        )
+    same = " AND ".join(f"v.{field} IS merge_resolved.{field}" for field in JOB_FIELDS)
+    conn.execute(
+        f"""
+        UPDATE merge_resolved SET content_hash = v.content_hash
+        FROM merge_versions v
+        WHERE v.job_id = merge_resolved.job_id AND {same}
+        """
+    )
+
+
+def changed_jobs(conn):
+    """Flag merged rows that differ from ``jobs``; return their ``MergeChange``."""
+    differs = " OR ".join(
+        f"j.{field} IS NOT merge_resolved.{field}" for field in JOB_FIELDS
+    )
+    conn.execute(
+        f"""
+        UPDATE merge_resolved SET changed = 1
+        FROM jobs j
+        WHERE j.job_id = merge_resolved.job_id AND ({differs})
+        """
+    )
+    flags = ", ".join(
+        f"r.{field} IS NOT j.{field} AS {field}_changed" for field in JOB_FIELDS
+    )
+    rows = conn.execute(
+        f"""
+        SELECT r.job_id, {flags}
+        FROM merge_resolved r JOIN jobs j USING (job_id)
+        WHERE r.changed
+        ORDER BY r.job_id
+        """
+    ).fetchall()
+    return [
+        MergeChange(
+            row["job_id"],
+            [field for field in JOB_FIELDS if row[f"{field}_changed"]],
+        )
+        for row in rows
+    ]
+
+
+def apply_merge(conn, job_ids, audit=None):
+    """Write the changed merged rows over their current ``jobs`` rows.
+
+    Current definitions are snapshotted into ``job_versions`` first, as a
+    load would, so ``undo`` can revert a merge. Changes are recorded in
+    ``audit``, if given.
+    """
+    rows = conn.execute(
+        f"""
+        SELECT job_id, {", ".join(JOB_FIELDS)} FROM merge_resolved
+        WHERE changed AND content_hash IS NULL
+        """
+    ).fetchall()
+    conn.executemany(
+        "UPDATE merge_resolved SET content_hash = ? WHERE job_id = ?",
+        [(row_content_hash(row), row["job_id"]) for row in rows],
+    )
+
+    if audit:
+        for row in conn.execute(
+            """
+            SELECT r.job_id, j.content_hash AS old_hash, r.content_hash AS new_hash
+            FROM merge_resolved r JOIN jobs j USING (job_id)
+            WHERE r.changed
+            """
+        ):
+            audit.record(row["job_id"], row["old_hash"], row["new_hash"])
+
+    mode, interval = storage_settings(conn)
+    if mode == "delta":
+        snapshot_jobs(conn, job_ids, mode, interval)
+    else:
+        conn.execute(
+            f"""
+            INSERT INTO job_versions (job_id, version, content_hash, timestamp,
+                                      {", ".join(JOB_FIELDS)})
+            SELECT job_id, current_version + 1, content_hash, last_updated,
+                   {", ".join(JOB_FIELDS)}
+            FROM jobs
+            WHERE job_id IN (SELECT job_id FROM merge_resolved WHERE changed)
+            """
+        )
+    conn.execute(
+        f"""
+        UPDATE jobs SET
+            {", ".join(f"{field} = r.{field}" for field in JOB_FIELDS)},
+            content_hash = r.content_hash,
+            last_updated = CURRENT_TIMESTAMP,
+            current_version = jobs.current_version + 1
+        FROM merge_resolved r
+        WHERE jobs.job_id = r.job_id AND r.changed
+        """
+    )
+    reindex_jobs(conn.cursor(), job_ids)
+    if audit:
+        audit.finish()
+
+
+def merge_jobs(conn, strategies, dry_run=False, audit=None):
+    """Merge the history of every job with more than one stored version.
+
+    Returns ``(merged, changes)``: the number of jobs considered and a
+    ``MergeChange`` per job whose definition changes. Everything runs in a
+    single transaction, which is rolled back when ``dry_run`` is set. A
+    merge that changes jobs is recorded in ``audit``, if given.
+    """
+    conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _create_temp_tables(conn)
+        stage_versions(conn)
+        resolve_fields(conn, strategies)
+        merged = conn.execute("SELECT COUNT(*) FROM merge_resolved").fetchone()[0]
+        changes = changed_jobs(conn)
+        if changes and not dry_run:
+            apply_merge(conn, [change.job_id for change in changes], audit)
+    except Exception:
+        conn.rollback()
+        raise
+    if dry_run:
+        conn.rollback()
+    else:
+        conn.commit()
+    _drop_temp_tables(conn)
+    return merged, changes
+
+
+def _current_rows(conn, job_ids):
+    rows = conn.execute(
+        f"""
+        SELECT job_id, {", ".join(JOB_FIELDS)} FROM jobs
+        WHERE job_id IN (SELECT value FROM json_each(?))
+        """,
+        (json.dumps(job_ids),),
+    )
+    return {row["job_id"]: row for row in rows}
+
+
+def _base_rows(conn, job_ids, base):
+    aggregate = "MIN" if base == "earliest" else "MAX"
+    rows = conn.execute(
+        f"""
+        SELECT v.job_id, v.version, v.encoding, v.payload,
+               {", ".join(f"v.{field}" for field in JOB_FIELDS)}
+        FROM job_versions v JOIN (
+            SELECT job_id, {aggregate}(version) AS version FROM job_versions
+            WHERE job_id IN (SELECT value FROM json_each(?))
+            GROUP BY job_id
+        ) USING (job_id, version)
+        """,
+        (json.dumps(job_ids),),
+    ).fetchall()
+    return {row["job_id"]: version_fields(conn, row["job_id"], row) for row in rows}
+
+
+UPSTREAM_SQL = f"""
+    INSERT INTO upstream_jobs (job_id, {", ".join(JOB_FIELDS)}, content_hash)
+    VALUES (?, {", ".join("?" for _ in JOB_FIELDS)}, ?)
+    ON CONFLICT(job_id) DO UPDATE SET
+        {", ".join(f"{field} = excluded.{field}" for field in JOB_FIELDS)},
+        content_hash = excluded.content_hash,
+        merged_at = CURRENT_TIMESTAMP
+"""
+
+
+def _upstream_rows(conn, job_ids):
+    rows = conn.execute(
+        f"""
+        SELECT job_id, {", ".join(JOB_FIELDS)} FROM upstream_jobs
+        WHERE job_id IN (SELECT value FROM json_each(?))
+        """,
+        (json.dumps(job_ids),),
+    )
+    return {row["job_id"]: row for row in rows}
+
+
+def _ancestor_rows(conn, job_ids, base):
+    """Return the common ancestor of each job that has one.
+
+    That is the last upstream definition merged into the job, or else its
+    ``base`` stored version.
+    """
+    ancestors = _upstream_rows(conn, job_ids)
+    missing = [job_id for job_id in job_ids if job_id not in ancestors]
+    if missing:
+        ancestors.update(_base_rows(conn, missing, base))
+    return ancestors
+
+
+def _document(job_id, job):
+    """Rebuild the export document of a decoded (and merged) job."""
+    fields = {
+        "job_id": job_id,
+        "description": job.get("description") or "",
+        "groups": job.get("groups") or [],
+    }
+    for field in ("analysis_config", "analysis_limits", "custom_settings"):
+        fields[field] = job.get(field) or {}
+    return {"job": fields, "datafeed": job.get("datafeed_config") or {}}
+
+
+def _merge_chunk(conn, rows, base, prefer, writer, result):
+    job_ids = [row.job_id for row in rows]
+    current = _current_rows(conn, job_ids)
+    bases = _ancestor_rows(conn, job_ids, base)
+    if writer:
+        conn.executemany(
+            UPSTREAM_SQL,
+            [
+                (row.job_id, *(getattr(row, field) for field in JOB_FIELDS))
+                + (row.content_hash,)
+                for row in rows
+            ],
+        )
+    for row in rows:
+        if row.job_id not in current:
+            result["new"] += 1
+            if writer:
+                writer.add(row)
+            continue
+        ours = Job.from_row(current[row.job_id])
+        # A job without stored versions or upstream merges has not been
+        # changed since it was loaded, so its current definition is the
+        # common ancestor.
+        ancestor = Job.from_row(bases.get(row.job_id, current[row.job_id]), row.job_id)
+        theirs = Job.from_row(row._asdict())
+        merged, conflicts = merge_three_way(ancestor, ours, theirs, prefer)
+        result["conflicts"].extend(
+            dict(conflict, job_id=row.job_id) for conflict in conflicts
+        )
+        merged_row = normalize_job(_document(row.job_id, merged))
+        if merged_row.content_hash == row_content_hash(current[row.job_id]):
+            result["unchanged"] += 1
+            continue
+        result["changed"] += 1
+        if writer:
+            writer.add(merged_row)
+
+
+def three_way_merge(
+    conn, documents, base="earliest", prefer="ours", dry_run=False, audit=None
+):
+    """Merge incoming job ``documents`` into the current ``jobs`` rows.
+
+    For each document, ``theirs`` is the incoming job, ``ours`` the current
+    definition and the common ancestor the upstream definition merged last
+    time, or the job's ``earliest`` or ``latest`` stored version if it has
+    never been merged. Every incoming document is kept in ``upstream_jobs``
+    for the next merge. Jobs are processed in chunks, each looked up with one
+    query for current rows and one for ancestors, and written through
+    ``JobWriter`` so changed jobs are snapshotted as on load. Unknown jobs
+    are added as they are. Returns a ``ThreeWayResult`` whose
+    ``conflicts`` carry the ``job_id`` they belong to; nothing is written
+    when ``dry_run`` is set. Written jobs are recorded in ``audit``, if
+    given; the caller finishes it.
+
+    Raises ``KeyError`` for a document without ``job.job_id``.
+    """
+    result = {"new": 0, "changed": 0, "unchanged": 0, "conflicts": []}
+    processed = 0
+    writer = None if dry_run else JobWriter(conn, audit=audit)
+    chunk = []
+    for document in documents:
+        chunk.append(normalize_job(document))
+        processed += 1
+        if len(chunk) >= THREE_WAY_CHUNK_SIZE:
+            _merge_chunk(conn, chunk, base, prefer, writer, result)
+            chunk = []
+    if chunk:
+        _merge_chunk(conn, chunk, base, prefer, writer, result)
+    if writer:
+        writer.flush()
+        conn.commit()
+    return ThreeWayResult(processed=processed, **result)
@@ -0,0 +1,294 @@
+"""Lightweight runtime measurements used by commands and benchmarks.
+
+Besides peak memory this holds the profiler behind the global ``--profile``,
+``--trace-sql``, ``--profile-format`` and ``--profile-out`` options. Commands
+mark their phases with ``phase``; outside a profiled run it returns a no-op
+context manager, so the markers cost next to nothing.
+"""
+
+import contextlib
+import json
+import re
+import sys
+import time
+
+import click
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+
+def peak_rss_bytes():
+    """Return the peak resident set size of this process, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def format_bytes(size):
+    """Format a byte count for display (e.g. ``12.3 MiB``)."""
+    if size is None:
+        return "n/a"
+    if size < 1024:
+        return f"{size} B"
+    for unit in ("KiB", "MiB", "GiB"):
+        size /= 1024
+        if size < 1024 or unit == "GiB":
+            break
+    return f"{size:.1f} {unit}"
+
+
+# A traced statement is sampled every PROGRESS_OPCODES virtual machine steps
+# and timed until its last sample, so reading its rows counts but the Python
+# work between fetches does not. Statements too short to be sampled are timed
+# until the next statement starts or a phase begins or ends.
+PROGRESS_OPCODES = 1000
+TOP_STATEMENTS = 10
+# Statements are grouped by their first characters; expanded parameters can
+# be whole job documents, which are not worth scanning.
+NORMALIZED_PREFIX = 500
+
+_NUMBERS = re.compile(r"(?<![\w.])\d+(?:\.\d+)?")
+_NORMALIZED_CACHE_SIZE = 10_000
+
+_normalized = {}
+_profiler = None
+
+
+def normalize_sql(sql):
+    """Replace literals with ``?`` and collapse whitespace.
+
+    Trace callbacks receive statements with their parameters expanded, so
+    this groups the executions of one statement together.
+    """
+    # Dropping the contents of string literals first makes most executions
+    # of a statement identical, so the regex runs once per statement shape.
+    shape = "'".join(sql[:NORMALIZED_PREFIX].replace("''", "").split("'")[::2])
+    if shape not in _normalized:
+        if len(_normalized) >= _NORMALIZED_CACHE_SIZE:
+            _normalized.clear()
+        _normalized[shape] = " ".join(
+            _NUMBERS.sub("?", shape.replace("'", "?")).split()
+        )
+    return _normalized[shape]
+
+
+class Profiler:
+    """Per-phase timers and SQL statistics for one CLI invocation.
+
+    ``phase`` times a named section; nested phases are subtracted from their
+    parent so each phase reports its own time. With ``trace_sql`` every
+    connection opened through ``ml_json_cli.db`` is traced: statements are
+    counted and timed as described at ``PROGRESS_OPCODES``.
+    """
+
+    def __init__(self, command=None):
+        self.command = command
+        self.trace_sql = False
+        self.output_format = "text"
+        self.stats_path = None
+        self.started = time.perf_counter()
+        self.phases = {}
+        self.statements = {}
+        self.connections = []
+        self._stack = []
+        self._statement = None
+        self._cprofile = None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        self._end_statement()
+        entry = [time.perf_counter(), 0.0]
+        self._stack.append(entry)
+        try:
+            yield
+        finally:
+            self._end_statement()
+            self._stack.pop()
+            elapsed = time.perf_counter() - entry[0]
+            calls, seconds = self.phases.get(name, (0, 0.0))
+            self.phases[name] = (calls + 1, seconds + elapsed - entry[1])
+            if self._stack:
+                self._stack[-1][1] += elapsed
+
+    def attach(self, conn):
+        conn.set_trace_callback(self._trace)
+        conn.set_progress_handler(self._progress, PROGRESS_OPCODES)
+        self.connections.append(conn)
+
+    def _trace(self, sql):
+        self._end_statement()
+        self._statement = [normalize_sql(sql), time.perf_counter(), None]
+
+    def _progress(self):
+        if self._statement is not None:
+            self._statement[2] = time.perf_counter()
+        return 0
+
+    def _end_statement(self):
+        if self._statement is not None:
+            sql, started, last_step = self._statement
+            ended = last_step if last_step is not None else time.perf_counter()
+            count, seconds = self.statements.get(sql, (0, 0.0))
+            self.statements[sql] = (count + 1, seconds + ended - started)
+            self._statement = None
+
+    def start_cprofile(self, path):
+        import cProfile
+
+        self.stats_path = path
+        self._cprofile = cProfile.Profile()
+        self._cprofile.enable()
+
+    def stop(self):
+        """Stop timing, detach from connections and dump cProfile stats."""
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.stats_path)
+        self._end_statement()
+        for conn in self.connections:
+            try:
+                conn.set_trace_callback(None)
+                conn.set_progress_handler(None, 0)
+            except Exception:  # closed connections reject both calls
+                pass
+        self.total = time.perf_counter() - self.started
+
+    def summary(self):
+        """Return the measurements as a JSON-serializable dict."""
+        phases = sorted(self.phases.items(), key=lambda item: -item[1][1])
+        statements = sorted(self.statements.items(), key=lambda item: -item[1][1])
+        summary = {
+            "command": self.command,
+            "total_seconds": round(self.total, 6),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "phases": [
+                {"name": name, "calls": calls, "seconds": round(seconds, 6)}
+                for name, (calls, seconds) in phases
+            ],
+            "other_seconds": round(
+                self.total - sum(seconds for _, seconds in self.phases.values()), 6
+            ),
+        }
+        if self.trace_sql:
+            summary["sql"] = {
+                "statements": sum(count for count, _ in self.statements.values()),
+                "distinct": len(statements),
+                "seconds": round(
+                    sum(seconds for _, seconds in self.statements.values()), 6
+                ),
+                "top": [
+                    {"sql": sql, "count": count, "seconds": round(seconds, 6)}
+                    for sql, (count, seconds) in statements[:TOP_STATEMENTS]
+                ],
+            }
+        if self.stats_path:
+            summary["cprofile"] = self.stats_path
+        return summary
+
+    def report(self):
+        """Format ``summary`` as a compact text breakdown."""
+        summary = self.summary()
+        total = summary["total_seconds"] or 1e-9
+        lines = [
+            f"Profile of {summary['command'] or 'mlcli'}: "
+            f"{summary['total_seconds']:.3f}s total, "
+            f"peak RSS {format_bytes(summary['peak_rss_bytes'])}"
+        ]
+        rows = [(p["name"], p["calls"], p["seconds"]) for p in summary["phases"]]
+        rows.append(("other", "", summary["other_seconds"]))
+        for name, calls, seconds in rows:
+            lines.append(
+                f"  {name:<12} {calls:>6} {seconds:>9.3f}s {seconds / total:>6.1%}"
+            )
+        if "sql" in summary:
+            sql = summary["sql"]
+            lines.append(
+                f"SQL: {sql['statements']} statement(s), {sql['distinct']} distinct, "
+                f"{sql['seconds']:.3f}s"
+            )
+            for statement in sql["top"]:
+                text = statement["sql"]
+                if len(text) > 80:
+                    text = text[:77] + "..."
+                lines.append(
+                    f"  {statement['count']:>6} {statement['seconds']:>9.3f}s  {text}"
+                )
+        if self.stats_path:
+            lines.append(f"cProfile stats written to {self.stats_path}")
+        return "\n".join(lines)
+
+
+def profiler():
+    """Return the active ``Profiler``, or ``None`` when not profiling."""
+    return _profiler
+
+
+def phase(name):
+    """Time a section of a command as phase ``name`` while profiling."""
+    return _profiler.phase(name) if _profiler else contextlib.nullcontext()
+
+
+def timed(name, iterable):
+    """Yield from ``iterable``, timing the work of producing each item as ``name``."""
+    iterator = iter(iterable)
+    while True:
+        with phase(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def trace_connection(conn):
+    """Trace ``conn``'s statements if the active profile traces SQL."""
+    if _profiler is not None and _profiler.trace_sql:
+        _profiler.attach(conn)
+
+
+def _start(ctx):
+    global _profiler
+    if "profiler" not in ctx.meta:
+        previous = _profiler
+        _profiler = ctx.meta["profiler"] = Profiler()
+
+        def finish():
+            global _profiler
+            _profiler.command = ctx.invoked_subcommand
+            _profiler.stop()
+            if _profiler.output_format == "json":
+                text = json.dumps(_profiler.summary())
+            else:
+                text = _profiler.report()
+            _profiler = previous
+            click.echo(text, err=True)
+
+        ctx.call_on_close(finish)
+    return ctx.meta["profiler"]
+
+
+def profile_option(ctx, param, value):
+    """Callback of the global profiling options.
+
+    It runs while the arguments are parsed, so the import of the invoked
+    command is measured too. The report is written to stderr when the
+    command's context closes, even if the command failed.
+    """
+    if not value or ctx.resilient_parsing:
+        return value
+    profile = _start(ctx)
+    if param.name == "trace_sql":
+        profile.trace_sql = True
+        db = sys.modules.get("ml_json_cli.db")
+        if db is not None and db.shared_connection is not None:
+            profile.attach(db.shared_connection)
+    elif param.name == "profile_format":
+        profile.output_format = value
+    elif param.name == "profile_out":
+        profile.start_cprofile(value)
+    return value
@@ -0,0 +1,198 @@
+"""Searchable attributes materialized from job JSON into indexed side tables.
+
+``job_attributes`` holds one row of display/filter columns per job, while
+``job_detectors``, ``job_influencers`` and ``job_groups`` hold the
+multi-valued attributes and ``jobs_fts`` the full-text index of job and
+detector descriptions, keyed by ``job_attributes.id``. ``job_id_trigrams``
+shortlists candidates for fuzzy job ID search.
+
+Whatever writes ``jobs`` must keep these tables in sync, either with the
+``JobAttributes`` carried on a ``JobRow`` or by calling ``reindex_jobs``
+after changing stored rows.
+"""
+
+import json
+
+from ml_json_cli.json_parser import Job
+
+JOB_IDS_SQL = "SELECT value FROM json_each(?)"
+
+FUZZY_THRESHOLD = 80
+FUZZY_SHORTLIST = 2000
+
+
+def trigrams(text):
+    """Return the set of lower-cased character trigrams in ``text``."""
+    text = text.lower()
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def write_attributes(cursor, items):
+    """Replace the indexed attributes of jobs.
+
+    ``items`` is a list of ``(job_id, JobAttributes)`` pairs; a ``None``
+    attributes value removes the job from the index.
+    """
+    if not items:
+        return
+    job_ids = json.dumps([job_id for job_id, _ in items])
+    cursor.execute(
+        f"""
+        DELETE FROM jobs_fts WHERE rowid IN (
+            SELECT id FROM job_attributes WHERE job_id IN ({JOB_IDS_SQL})
+        )
+        """,
+        (job_ids,),
+    )
+    for table in ("job_detectors", "job_influencers", "job_groups", "job_id_trigrams"):
+        cursor.execute(
+            f"DELETE FROM {table} WHERE job_id IN ({JOB_IDS_SQL})", (job_ids,)
+        )
+
+    removed = [(job_id,) for job_id, attributes in items if attributes is None]
+    items = [(job_id, attributes) for job_id, attributes in items if attributes]
+    cursor.executemany("DELETE FROM job_attributes WHERE job_id = ?", removed)
+    cursor.executemany(
+        """
+        INSERT INTO job_attributes (job_id, bucket_span, model_memory_limit, created_by,
+                                    detector_function, influencers)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(job_id) DO UPDATE SET
+            bucket_span = excluded.bucket_span,
+            model_memory_limit = excluded.model_memory_limit,
+            created_by = excluded.created_by,
+            detector_function = excluded.detector_function,
+            influencers = excluded.influencers
+        """,
+        [
+            (
+                job_id,
+                attributes.bucket_span,
+                attributes.model_memory_limit,
+                attributes.created_by,
+                attributes.detectors[0][1] if attributes.detectors else None,
+                ", ".join(attributes.influencers),
+            )
+            for job_id, attributes in items
+        ],
+    )
+    cursor.executemany(
+        "INSERT OR IGNORE INTO job_detectors (job_id, detector_index, function)"
+        " VALUES (?, ?, ?)",
+        [
+            (job_id, index, function)
+            for job_id, attributes in items
+            for index, function in attributes.detectors
+        ],
+    )
+    cursor.executemany(
+        "INSERT OR IGNORE INTO job_influencers (job_id, influencer) VALUES (?, ?)",
+        [
+            (job_id, influencer)
+            for job_id, attributes in items
+            for influencer in attributes.influencers
+        ],
+    )
+    cursor.executemany(
+        "INSERT OR IGNORE INTO job_groups (job_id, group_name) VALUES (?, ?)",
+        [
+            (job_id, group)
+            for job_id, attributes in items
+            for group in attributes.groups
+        ],
+    )
+    cursor.executemany(
+        "INSERT INTO job_id_trigrams (gram, job_id) VALUES (?, ?)",
+        [(gram, job_id) for job_id, _ in items for gram in trigrams(job_id)],
+    )
+    cursor.execute(
+        f"SELECT job_id, id FROM job_attributes WHERE job_id IN ({JOB_IDS_SQL})",
+        (job_ids,),
+    )
+    doc_ids = dict(cursor.fetchall())
+    cursor.executemany(
+        "INSERT INTO jobs_fts (rowid, description, detector_description)"
+        " VALUES (?, ?, ?)",
+        [
+            (
+                doc_ids[job_id],
+                attributes.description,
+                "\n".join(attributes.detector_descriptions),
+            )
+            for job_id, attributes in items
+        ],
+    )
+
+
+def fuzzy_matches(cursor, query, shortlist=FUZZY_SHORTLIST):
+    """Return ``(job_id, score)`` pairs for job IDs resembling ``query``.
+
+    Job IDs sharing the most trigrams with the query are shortlisted through
+    ``job_id_trigrams``; only those are scored with ``partial_ratio``.
+    Results scoring at least ``FUZZY_THRESHOLD`` are returned best first.
+    """
+    try:
+        from rapidfuzz import fuzz
+    except ImportError:  # pragma: no cover - fall back to the slower scorer
+        from fuzzywuzzy import fuzz
+
+    query = query.lower()
+    grams = trigrams(query)
+    if grams:
+        cursor.execute(
+            f"""
+            SELECT job_id FROM job_id_trigrams WHERE gram IN ({JOB_IDS_SQL})
+            GROUP BY job_id ORDER BY COUNT(*) DESC, job_id LIMIT ?
+            """,
+            (json.dumps(sorted(grams)), shortlist),
+        )
+    else:
+        cursor.execute(
+            "SELECT job_id FROM jobs WHERE INSTR(LOWER(job_id), ?) > 0 LIMIT ?",
+            (query, shortlist),
+        )
+    scored = [
+        (job_id, fuzz.partial_ratio(query, job_id.lower()))
+        for (job_id,) in cursor.fetchall()
+    ]
+    return sorted(
+        ((job_id, score) for job_id, score in scored if score >= FUZZY_THRESHOLD),
+        key=lambda match: (-match[1], match[0]),
+    )
+
+
+def attributes_from_row(row):
+    """Extract ``JobAttributes`` from a stored ``jobs`` row."""
+    return Job.from_row(row).attributes()
+
+
+def reindex_jobs(cursor, job_ids):
+    """Re-extract attributes for ``job_ids`` from their current ``jobs`` rows."""
+    job_ids = list(job_ids)
+    cursor.execute(
+        f"""
+        SELECT job_id, description, groups, analysis_config, analysis_limits,
+               datafeed_config, custom_settings
+        FROM jobs WHERE job_id IN ({JOB_IDS_SQL})
+        """,
+        (json.dumps(job_ids),),
+    )
+    found = {row["job_id"]: attributes_from_row(row) for row in cursor.fetchall()}
+    write_attributes(cursor, [(job_id, found.get(job_id)) for job_id in job_ids])
+
+
+def reindex_all(cursor, chunk_size=1000):
+    """Rebuild the attribute index for every job."""
+    last_job_id = ""
+    while rows := cursor.execute(
+        """
+        SELECT job_id, description, groups, analysis_config, analysis_limits,
+               datafeed_config, custom_settings
+        FROM jobs WHERE job_id > ? ORDER BY job_id LIMIT ?
+        """,
+        (last_job_id, chunk_size),
+    ).fetchall():
+        write_attributes(
+            cursor, [(row["job_id"], attributes_from_row(row)) for row in rows]
+        )
+        last_job_id = rows[-1]["job_id"]
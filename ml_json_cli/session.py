@@ -0,0 +1,102 @@
+"""Warm state shared by the commands of one ``mlcli shell`` run.
+
+A ``Session`` keeps a single connection open for the whole shell, with a
+larger prepared statement cache, an LRU cache of decoded job versions and
+per-command timings reported by the ``.stats`` meta-command. While a session
+is active ``get_db_connection`` hands out its connection.
+"""
+
+import sqlite3
+import time
+from collections import OrderedDict
+
+from ml_json_cli import db
+
+STATEMENT_CACHE_SIZE = 512
+JOB_CACHE_SIZE = 256
+
+_active = None
+
+
+class SessionConnection(sqlite3.Connection):
+    """Connection whose ``close`` is a no-op so commands can share it."""
+
+    def close(self):
+        pass
+
+    def release(self):
+        """Really close the connection."""
+        super().close()
+
+
+def current_session():
+    """Return the active ``Session``, or ``None`` outside the shell."""
+    return _active
+
+
+class Session:
+    """Shared connection, job cache and command timings for the shell."""
+
+    def __init__(self, job_cache_size=JOB_CACHE_SIZE):
+        self.conn = None
+        self.job_cache_size = job_cache_size
+        self.hits = 0
+        self.misses = 0
+        self.timings = {}
+        self._jobs = OrderedDict()
+
+    def __enter__(self):
+        global _active
+        self.conn = db.open_connection(
+            factory=SessionConnection, cached_statements=STATEMENT_CACHE_SIZE
+        )
+        db.shared_connection = self.conn
+        _active = self
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        global _active
+        db.shared_connection = None
+        _active = None
+        self.conn.release()
+        self.conn = None
+
+    def cached_job(self, key, load):
+        """Return the cached value for ``key``, calling ``load`` on a miss."""
+        if key in self._jobs:
+            self.hits += 1
+            self._jobs.move_to_end(key)
+            return self._jobs[key]
+        self.misses += 1
+        value = self._jobs[key] = load()
+        if len(self._jobs) > self.job_cache_size:
+            self._jobs.popitem(last=False)
+        return value
+
+    def run(self, name, func):
+        """Run ``func`` as the shell command ``name`` and record its duration.
+
+        A transaction left open by a failed command is rolled back so that it
+        does not hold the write lock until the shell exits.
+        """
+        started = time.perf_counter()
+        try:
+            return func()
+        finally:
+            if self.conn.in_transaction:
+                self.conn.rollback()
+            elapsed = time.perf_counter() - started
+            runs, total, _ = self.timings.get(name, (0, 0.0, 0.0))
+            self.timings[name] = (runs + 1, total + elapsed, elapsed)
+
+    def stats(self):
+        """Return cache counters and ``(command, runs, total, last)`` timings."""
+        return {
+            "job_cache_hits": self.hits,
+            "job_cache_misses": self.misses,
+            "job_cache_size": len(self._jobs),
+            "commands": [
+                (name, runs, total, last)
+                for name, (runs, total, last) in sorted(self.timings.items())
+            ],
+        }
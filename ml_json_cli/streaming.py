@@ -0,0 +1,150 @@
+"""Incremental record writers for command output.
+
+Writers take one record (a dict) at a time so that commands can stream rows
+straight from a cursor; nothing is buffered beyond the current record.
+``open_output`` opens a file or stdout, optionally gzip or zstd compressed,
+and ``write_rows`` streams cursor rows to stdout for the ``--output`` option
+of read commands.
+"""
+
+import contextlib
+import csv
+import gzip
+import io
+import json
+import sys
+
+import click
+
+COMPRESSIONS = ("gzip", "zstd")
+COMPRESSION_SUFFIXES = {".gz": "gzip", ".zst": "zstd"}
+
+
+def infer_compression(path):
+    """Return the compression implied by the suffix of ``path``, if any."""
+    for suffix, compression in COMPRESSION_SUFFIXES.items():
+        if path and path.endswith(suffix):
+            return compression
+    return None
+
+
+@contextlib.contextmanager
+def open_output(path, compression=None):
+    """Open ``path`` (``-`` for stdout) for writing text, compressed or not.
+
+    Raises ``click.ClickException`` when zstd is requested but the optional
+    ``zstandard`` package is not installed.
+    """
+    if path == "-" and not compression:
+        yield sys.stdout
+        return
+
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise click.ClickException(
+                "zstd compression requires the 'zstandard' package "
+                "(pip install ml-json-cli[zstd])."
+            ) from e
+
+    with contextlib.ExitStack() as stack:
+        if path == "-":
+            raw = sys.stdout.buffer
+        else:
+            raw = stack.enter_context(open(path, "wb"))
+        if compression == "gzip":
+            raw = stack.enter_context(gzip.GzipFile(fileobj=raw, mode="wb"))
+        elif compression == "zstd":
+            raw = stack.enter_context(
+                zstandard.ZstdCompressor().stream_writer(raw, closefd=False)
+            )
+        text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        try:
+            yield text
+        finally:
+            text.flush()
+            text.detach()
+
+
+class JsonArrayWriter:
+    """Write records as the elements of a single JSON array."""
+
+    def __init__(self, f, fields):
+        self.f = f
+        self.count = 0
+        f.write("[")
+
+    def write(self, record):
+        self.f.write(",\n" if self.count else "\n")
+        self.f.write(json.dumps(record, ensure_ascii=False))
+        self.count += 1
+
+    def close(self):
+        self.f.write("\n]\n" if self.count else "]\n")
+
+
+class NdjsonWriter:
+    """Write one JSON record per line."""
+
+    def __init__(self, f, fields):
+        self.f = f
+        self.count = 0
+
+    def write(self, record):
+        self.f.write(json.dumps(record, ensure_ascii=False))
+        self.f.write("\n")
+        self.count += 1
+
+    def close(self):
+        pass
+
+
+class CsvWriter:
+    """Write records as CSV rows under a header of ``fields``."""
+
+    delimiter = ","
+
+    def __init__(self, f, fields):
+        self.writer = csv.DictWriter(
+            f, fieldnames=fields, delimiter=self.delimiter, extrasaction="ignore"
+        )
+        self.writer.writeheader()
+        self.count = 0
+
+    def write(self, record):
+        self.writer.writerow(record)
+        self.count += 1
+
+    def close(self):
+        pass
+
+
+class TsvWriter(CsvWriter):
+    """Write records as tab-separated rows under a header of ``fields``."""
+
+    delimiter = "\t"
+
+
+WRITERS = {
+    "json": JsonArrayWriter,
+    "ndjson": NdjsonWriter,
+    "csv": CsvWriter,
+    "tsv": TsvWriter,
+}
+
+# Formats that read commands can stream to stdout instead of a table.
+OUTPUT_FORMATS = ("json", "ndjson", "tsv")
+
+
+def write_rows(rows, fields, format):
+    """Stream ``rows``, sequences of values in ``fields`` order, to stdout.
+
+    Returns the number of rows written.
+    """
+    with open_output("-") as f:
+        writer = WRITERS[format](f, fields)
+        for row in rows:
+            writer.write(dict(zip(fields, row)))
+        writer.close()
+    return writer.count
@@ -0,0 +1,307 @@
+"""Validation of Elastic ML job documents.
+
+``validate_job`` checks a ``{"job": ..., "datafeed": ...}`` document against
+``JOB_SCHEMA``, compiled once per process with ``fastjsonschema``, and then
+applies semantic checks the schema cannot express: durations and memory
+limits must parse with the units ``search`` and ``stats`` understand, and
+detectors must be consistent with their function. It returns every problem
+found as a message prefixed with its path, so a whole batch can be checked
+and reported per job.
+
+``validate_files`` and ``validate_stored`` run the checks over export files
+or the current jobs in the database on a process pool.
+"""
+
+import json
+import multiprocessing
+from collections import namedtuple
+
+import fastjsonschema
+import ijson
+
+from ml_json_cli.json_parser import (
+    JOB_FIELDS,
+    Job,
+    iter_jobs,
+    parse_duration,
+    parse_memory,
+)
+
+# Detector functions of Elastic ML anomaly detection jobs.
+COUNT_FUNCTIONS = (
+    "count",
+    "high_count",
+    "low_count",
+    "non_zero_count",
+    "high_non_zero_count",
+    "low_non_zero_count",
+    "time_of_day",
+    "time_of_week",
+)
+RARE_FUNCTIONS = ("rare", "freq_rare")
+FIELD_FUNCTIONS = (
+    "distinct_count",
+    "high_distinct_count",
+    "low_distinct_count",
+    "info_content",
+    "high_info_content",
+    "low_info_content",
+    "metric",
+    "mean",
+    "high_mean",
+    "low_mean",
+    "median",
+    "high_median",
+    "low_median",
+    "min",
+    "max",
+    "sum",
+    "high_sum",
+    "low_sum",
+    "non_null_sum",
+    "high_non_null_sum",
+    "low_non_null_sum",
+    "varp",
+    "high_varp",
+    "low_varp",
+    "lat_long",
+)
+
+# Short names Elasticsearch accepts for detector functions.
+FUNCTION_ALIASES = {
+    "nzc": "non_zero_count",
+    "high_nzc": "high_non_zero_count",
+    "low_nzc": "low_non_zero_count",
+    "dc": "distinct_count",
+    "high_dc": "high_distinct_count",
+    "low_dc": "low_distinct_count",
+    "avg": "mean",
+    "high_avg": "high_mean",
+    "low_avg": "low_mean",
+}
+
+ID_PATTERN = "^[a-z0-9](?:[a-z0-9_\\-.]*[a-z0-9])?$"
+STRINGS = {"type": "array", "items": {"type": "string"}}
+
+JOB_SCHEMA = {
+    "type": "object",
+    "required": ["job"],
+    "properties": {
+        "job": {
+            "type": "object",
+            "required": ["job_id", "analysis_config"],
+            "properties": {
+                "job_id": {"type": "string", "pattern": ID_PATTERN, "maxLength": 64},
+                "description": {"type": "string"},
+                "groups": {
+                    "type": "array",
+                    "items": {"type": "string", "pattern": ID_PATTERN},
+                },
+                "analysis_config": {
+                    "type": "object",
+                    "required": ["bucket_span", "detectors"],
+                    "properties": {
+                        "bucket_span": {"type": "string"},
+                        "detectors": {
+                            "type": "array",
+                            "minItems": 1,
+                            "items": {
+                                "type": "object",
+                                "required": ["function"],
+                                "properties": {
+                                    "function": {
+                                        "enum": list(
+                                            COUNT_FUNCTIONS
+                                            + RARE_FUNCTIONS
+                                            + FIELD_FUNCTIONS
+                                            + tuple(FUNCTION_ALIASES)
+                                        )
+                                    },
+                                    "field_name": {"type": "string"},
+                                    "by_field_name": {"type": "string"},
+                                    "over_field_name": {"type": "string"},
+                                    "partition_field_name": {"type": "string"},
+                                    "detector_description": {"type": "string"},
+                                    "detector_index": {
+                                        "type": "integer",
+                                        "minimum": 0,
+                                    },
+                                },
+                            },
+                        },
+                        "influencers": STRINGS,
+                        "model_prune_window": {"type": "string"},
+                    },
+                },
+                "analysis_limits": {
+                    "type": "object",
+                    "properties": {
+                        "model_memory_limit": {"type": ["string", "integer"]},
+                        "categorization_examples_limit": {
+                            "type": "integer",
+                            "minimum": 0,
+                        },
+                    },
+                },
+                "custom_settings": {"type": "object"},
+                "model_snapshot_retention_days": {"type": "integer", "minimum": 0},
+            },
+        },
+        "datafeed": {
+            "type": "object",
+            "properties": {
+                "datafeed_id": {"type": "string"},
+                "job_id": {"type": "string"},
+                "indices": {**STRINGS, "minItems": 1},
+                "query": {"type": "object"},
+                "frequency": {"type": "string"},
+                "query_delay": {"type": "string"},
+                "scroll_size": {"type": "integer", "minimum": 1},
+            },
+        },
+    },
+}
+
+VALIDATE_CHUNK_SIZE = 500
+
+# ``job_id`` is None when a document has none; ``source`` is a file path or
+# "database".
+InvalidJob = namedtuple("InvalidJob", ["source", "job_id", "errors"])
+
+_schema = None
+
+
+def compiled_schema():
+    """Return ``JOB_SCHEMA`` compiled to a validation function (once per process)."""
+    global _schema  # pylint: disable=global-statement
+    if _schema is None:
+        _schema = fastjsonschema.compile(JOB_SCHEMA)
+    return _schema
+
+
+def _check_durations(config, limits, errors):
+    bucket_span = parse_duration(config["bucket_span"])
+    if not bucket_span or bucket_span < 1 or bucket_span != int(bucket_span):
+        errors.append(
+            f"job.analysis_config.bucket_span: {config['bucket_span']!r} is not "
+            "a whole number of seconds, e.g. '15m'"
+        )
+    window = config.get("model_prune_window")
+    if window is not None and not parse_duration(window):
+        errors.append(
+            f"job.analysis_config.model_prune_window: {window!r} is not a duration"
+        )
+    memory = limits.get("model_memory_limit")
+    if memory is not None and not parse_memory(memory):
+        errors.append(
+            f"job.analysis_limits.model_memory_limit: {memory!r} is not a "
+            "memory size, e.g. '64mb'"
+        )
+
+
+def _check_detectors(detectors, errors):
+    indexes = set()
+    for position, detector in enumerate(detectors):
+        path = f"job.analysis_config.detectors[{position}]"
+        function = FUNCTION_ALIASES.get(detector.function, detector.function)
+        if function in FIELD_FUNCTIONS and not detector.field_name:
+            errors.append(f"{path}: function {detector.function!r} requires field_name")
+        elif function in COUNT_FUNCTIONS and detector.field_name:
+            errors.append(
+                f"{path}: function {detector.function!r} does not take field_name"
+            )
+        elif function == "freq_rare" and not detector.over_field_name:
+            errors.append(f"{path}: function 'freq_rare' requires over_field_name")
+        if detector.index is None:
+            continue
+        if detector.index in indexes:
+            errors.append(f"{path}: duplicate detector_index {detector.index}")
+        indexes.add(detector.index)
+
+
+def validate_job(document):
+    """Return the problems of one job document as ``"path: message"`` strings.
+
+    An empty list means the document is valid. Semantic checks only run once
+    the document matches the schema.
+    """
+    try:
+        compiled_schema()(document)
+    except fastjsonschema.JsonSchemaValueException as e:
+        return [e.message.replace("data.", "", 1).replace("data ", "document ", 1)]
+
+    job = Job.from_document(document)
+    errors = []
+    _check_durations(job.analysis_config, job.analysis_limits, errors)
+    _check_detectors(job.detectors, errors)
+    datafeed_job = job.datafeed.job_id
+    if datafeed_job is not None and datafeed_job != job.job_id:
+        errors.append(
+            f"datafeed.job_id: {datafeed_job!r} does not match job_id "
+            f"{job.job_id!r}"
+        )
+    return errors
+
+
+def document_job_id(document):
+    """Return the job ID of a document, or None when it has none."""
+    try:
+        job_id = document["job"]["job_id"]
+    except (KeyError, TypeError):
+        return None
+    return job_id if isinstance(job_id, str) else None
+
+
+def _validate_file(path):
+    """Validate every document of ``path``; returns ``(path, checked, invalid, error)``."""
+    checked, invalid = 0, []
+    try:
+        for document in iter_jobs(path):
+            checked += 1
+            if errors := validate_job(document):
+                invalid.append(InvalidJob(path, document_job_id(document), errors))
+    except (ijson.JSONError, OSError) as e:
+        return path, checked, invalid, str(e)
+    return path, checked, invalid, None
+
+
+def _validate_rows(rows):
+    invalid = []
+    for row in rows:
+        if errors := validate_job(Job.from_row(row).document()):
+            invalid.append(InvalidJob("database", row["job_id"], errors))
+    return None, len(rows), invalid, None
+
+
+def _run(func, tasks, workers):
+    if workers <= 1:
+        yield from map(func, tasks)
+        return
+    with multiprocessing.get_context().Pool(workers) as pool:
+        yield from pool.imap_unordered(func, tasks)
+
+
+def validate_files(paths, workers=1):
+    """Validate export files, yielding ``(path, checked, invalid, error)`` per file.
+
+    ``invalid`` lists an ``InvalidJob`` per failing document and ``error``
+    describes a file that could not be read or parsed (after ``checked``
+    documents). Files are validated in parallel when ``workers`` > 1.
+    """
+    yield from _run(_validate_file, paths, min(workers, len(paths)))
+
+
+def _stored_chunks(conn):
+    columns = ", ".join(("job_id",) + JOB_FIELDS)
+    cursor = conn.execute(f"SELECT {columns} FROM jobs ORDER BY job_id")
+    while rows := cursor.fetchmany(VALIDATE_CHUNK_SIZE):
+        yield [dict(row) for row in rows]
+
+
+def validate_stored(conn, workers=1):
+    """Validate the current jobs in the database, like ``validate_files``.
+
+    Rows are read in chunks of ``VALIDATE_CHUNK_SIZE`` and each chunk is
+    checked by a worker; results carry ``None`` as their path.
+    """
+    yield from _run(_validate_rows, _stored_chunks(conn), workers)
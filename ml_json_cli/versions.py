@@ -0,0 +1,211 @@
+"""Reading and writing stored job versions.
+
+``job_versions`` rows are kept in one of two storage modes, chosen with
+``mlcli storage`` and recorded in ``settings``:
+
+``full``
+    Every field is stored as plain text in its own column (``encoding`` is
+    ``NULL``). This is the default and what older databases contain.
+``delta``
+    Every ``snapshot_interval`` versions a job gets a ``snapshot`` row whose
+    ``payload`` is the zlib-compressed JSON of all fields. The versions in
+    between are ``delta`` rows holding only the fields that differ from
+    that snapshot, so any version is rebuilt from at most two rows.
+
+``read_version`` rebuilds a version whatever its encoding; nothing outside
+this module should read the field columns of ``job_versions`` directly.
+"""
+
+import json
+import zlib
+
+from ml_json_cli.db import get_setting
+from ml_json_cli.json_parser import JOB_FIELDS, Job
+from ml_json_cli.session import current_session
+
+STORAGE_MODES = ("full", "delta")
+DEFAULT_SNAPSHOT_INTERVAL = 10
+
+VERSION_SQL = f"""
+    SELECT version, encoding, payload, {", ".join(JOB_FIELDS)}
+    FROM job_versions WHERE job_id = ? AND version = ?
+"""
+
+# The snapshot a delta row was written against: the closest older row that
+# is not itself a delta. Only the latest version is ever deleted, so it is
+# never removed from under a delta.
+BASE_SQL = f"""
+    SELECT version, encoding, payload, {", ".join(JOB_FIELDS)}
+    FROM job_versions
+    WHERE job_id = ? AND version < ? AND encoding IS NOT 'delta'
+    ORDER BY version DESC LIMIT 1
+"""
+
+# Every job as it was at ``:as_of``: its current row if that was written by
+# then, otherwise its newest version written by then, found per job through
+# ``idx_job_versions_job_timestamp`` (CROSS JOIN keeps ``jobs`` as the outer
+# loop, so versions are never scanned). Jobs created later are left out. The
+# current row is reported as the version it will be snapshotted as, and
+# ``{where}`` may add conditions on ``j``.
+AS_OF_SQL = f"""
+    SELECT j.job_id, j.current_version + 1 AS version, j.last_updated AS timestamp,
+           j.content_hash, NULL AS encoding, NULL AS payload, 1 AS is_current,
+           {", ".join(f"j.{field}" for field in JOB_FIELDS)}
+    FROM jobs j WHERE j.last_updated <= :as_of {{where}}
+    UNION ALL
+    SELECT v.job_id, v.version, v.timestamp, v.content_hash, v.encoding, v.payload,
+           0 AS is_current, {", ".join(f"v.{field}" for field in JOB_FIELDS)}
+    FROM jobs j CROSS JOIN job_versions v
+    WHERE j.last_updated > :as_of {{where}}
+      AND v.job_id = j.job_id AND v.version = (
+          SELECT version FROM job_versions
+          WHERE job_id = j.job_id AND timestamp <= :as_of
+          ORDER BY timestamp DESC, version DESC LIMIT 1
+      )
+    ORDER BY job_id
+"""
+
+INSERT_VERSION_SQL = f"""
+    INSERT INTO job_versions (job_id, version, content_hash, timestamp, encoding,
+                              payload, {", ".join(JOB_FIELDS)})
+    VALUES (?, ?, ?, ?, ?, ?, {", ".join("?" for _ in JOB_FIELDS)})
+"""
+
+
+def storage_settings(conn):
+    """Return the ``(mode, snapshot_interval)`` used for new versions."""
+    mode = get_setting(conn, "version_storage", "full")
+    interval = int(get_setting(conn, "snapshot_interval", DEFAULT_SNAPSHOT_INTERVAL))
+    return mode, interval
+
+
+def _pack(fields):
+    return zlib.compress(
+        json.dumps(fields, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    )
+
+
+def _unpack(payload):
+    return json.loads(zlib.decompress(payload))
+
+
+def _row_fields(row):
+    if row["encoding"] == "snapshot":
+        return _unpack(row["payload"])
+    return {field: row[field] for field in JOB_FIELDS}
+
+
+def version_fields(conn, job_id, row):
+    """Return the raw fields of the ``job_versions`` row ``row``."""
+    if row["encoding"] != "delta":
+        return _row_fields(row)
+    base = conn.execute(BASE_SQL, (job_id, row["version"])).fetchone()
+    fields = _row_fields(base)
+    fields.update(_unpack(row["payload"]))
+    return fields
+
+
+def read_version(conn, job_id, version):
+    """Return the raw (JSON text) fields of a stored version, or ``None``."""
+    row = conn.execute(VERSION_SQL, (job_id, version)).fetchone()
+    return version_fields(conn, job_id, row) if row else None
+
+
+def encode_version(conn, job_id, version, fields, mode, interval):
+    """Return ``(encoding, payload, *field columns)`` for storing ``fields``.
+
+    ``fields`` maps ``JOB_FIELDS`` to their stored text. In ``delta`` mode a
+    snapshot is written when the job has none within ``interval`` versions.
+    """
+    if mode != "delta":
+        return (None, None) + tuple(fields[field] for field in JOB_FIELDS)
+    empty = (None,) * len(JOB_FIELDS)
+    base = conn.execute(BASE_SQL, (job_id, version)).fetchone()
+    if base is None or version - base["version"] >= interval:
+        return ("snapshot", _pack(fields)) + empty
+    base_fields = _row_fields(base)
+    delta = {
+        field: value for field, value in fields.items() if base_fields[field] != value
+    }
+    return ("delta", _pack(delta)) + empty
+
+
+def snapshot_jobs(conn, job_ids, mode, interval):
+    """Copy the current ``jobs`` rows of ``job_ids`` into ``job_versions``.
+
+    The delta-mode counterpart of ``loader.SNAPSHOT_SQL``: each row becomes
+    version ``current_version + 1``, encoded with ``encode_version``.
+    """
+    rows = []
+    for job_id in job_ids:
+        job = conn.execute(
+            f"""
+            SELECT current_version, content_hash, last_updated, {", ".join(JOB_FIELDS)}
+            FROM jobs WHERE job_id = ?
+            """,
+            (job_id,),
+        ).fetchone()
+        if job is None:
+            continue
+        version = job["current_version"] + 1
+        fields = {field: job[field] for field in JOB_FIELDS}
+        rows.append(
+            (job_id, version, job["content_hash"], job["last_updated"])
+            + encode_version(conn, job_id, version, fields, mode, interval)
+        )
+    conn.executemany(INSERT_VERSION_SQL, rows)
+
+
+def rewrite_versions(conn, job_id, mode, interval):
+    """Re-encode every stored version of ``job_id``; the caller commits."""
+    rows = conn.execute(
+        f"""
+        SELECT version, encoding, payload, {", ".join(JOB_FIELDS)}
+        FROM job_versions WHERE job_id = ? ORDER BY version
+        """,
+        (job_id,),
+    ).fetchall()
+    history = [(row["version"], version_fields(conn, job_id, row)) for row in rows]
+    # Versions are re-encoded oldest first, so BASE_SQL only ever sees rows
+    # that have already been rewritten.
+    for version, fields in history:
+        encoded = encode_version(conn, job_id, version, fields, mode, interval)
+        conn.execute(
+            f"""
+            UPDATE job_versions SET encoding = ?, payload = ?,
+                   {", ".join(f"{field} = ?" for field in JOB_FIELDS)}
+            WHERE job_id = ? AND version = ?
+            """,
+            encoded + (job_id, version),
+        )
+
+
+def fetch_job(conn, job_id, version=None):
+    """Return a job version as a ``json_parser.Job``, or ``None`` if missing.
+
+    ``version=None`` reads the current row in ``jobs``. Inside a shell
+    session the result is cached by job ID, version and content hash and
+    shared between callers, so it must not be modified.
+    """
+    if version is None:
+        where, params = "FROM jobs WHERE job_id = ?", (job_id,)
+    else:
+        where, params = "FROM job_versions WHERE job_id = ? AND version = ?", (
+            job_id,
+            version,
+        )
+
+    def load():
+        if version is not None:
+            fields = read_version(conn, job_id, version)
+            return Job.from_row(fields, job_id) if fields else None
+        row = conn.execute(f"SELECT {', '.join(JOB_FIELDS)} {where}", params).fetchone()
+        return Job.from_row(row, job_id) if row else None
+
+    session = current_session()
+    if session is None:
+        return load()
+    row = conn.execute(f"SELECT content_hash {where}", params).fetchone()
+    if row is None:
+        return None
+    return session.cached_job((job_id, version, row[0]), load)
@@ -7,10 +7,16 @@ setup(
     install_requires=[
         "click",
         "rich",
-        "deepdiff",
         "ijson",
         "colorama",
+        "rapidfuzz",
+        "numpy",
+        "fastjsonschema",
     ],
+    extras_require={
+        "zstd": ["zstandard"],
+        "parquet": ["pyarrow"],
+    },
     entry_points={
         "console_scripts": [
             "mlcli = ml_json_cli.cli:cli",
@@ -1,5 +1,28 @@
 import sys
 import os
 
+import pytest
+
 # Add the project root directory to PYTHONPATH
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ml_json_cli import db  # noqa: E402
+
+
+def analysis_config(bucket_span="15m"):
+    """Return the smallest ``analysis_config`` that passes validation."""
+    return {"bucket_span": bucket_span, "detectors": [{"function": "count"}]}
+
+
+def valid_job(job_id, bucket_span="15m", **fields):
+    """Return the ``job`` of a minimal definition that passes validation."""
+    return {"job_id": job_id, "analysis_config": analysis_config(bucket_span), **fields}
+
+
+@pytest.fixture(autouse=True)
+def temp_db(tmp_path, monkeypatch):
+    """Point every test at a fresh database file."""
+    path = str(tmp_path / "ml_jobs.db")
+    monkeypatch.setattr(db, "DB_FILE", path)
+    db.init_db()
+    return path
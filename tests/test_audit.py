@@ -0,0 +1,84 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+from rich.console import Console
+from ml_json_cli.commands import audit as audit_module
+from ml_json_cli.commands.audit import audit
+from ml_json_cli.commands.load import load
+from ml_json_cli.commands.merge import merge
+from ml_json_cli.commands.undo import undo
+from ml_json_cli.db import get_db_connection
+from conftest import valid_job
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    monkeypatch.setattr(audit_module, "console", Console(width=250))
+    return CliRunner()
+
+
+def load_spans(runner, tmp_path, spans, job_ids=("a", "b")):
+    path = tmp_path / "jobs.json"
+    for span in spans:
+        path.write_text(
+            json.dumps([{"job": valid_job(job_id, span)} for job_id in job_ids]),
+            encoding="utf-8",
+        )
+        runner.invoke(load, [str(path), "--batch-size", "1", "--workers", "1"])
+
+
+def entries():
+    conn = get_db_connection()
+    rows = conn.execute(
+        """
+        SELECT a.command, a.job_count, j.job_id, j.old_hash, j.new_hash
+        FROM audit_log a LEFT JOIN audit_log_jobs j ON j.audit_id = a.id
+        ORDER BY a.id, j.job_id
+        """
+    ).fetchall()
+    conn.close()
+    return [tuple(row) for row in rows]
+
+
+def test_load_and_undo_are_audited(runner, tmp_path):
+    load_spans(runner, tmp_path, ["15m", "30m"])
+    load_spans(runner, tmp_path, ["30m"])
+    runner.invoke(undo, ["a"])
+
+    rows = entries()
+
+    assert [row[:3] for row in rows] == [
+        ("load", 2, "a"),
+        ("load", 2, "b"),
+        ("load", 2, "a"),
+        ("load", 2, "b"),
+        ("undo", 1, "a"),
+    ]
+    assert rows[0][3] is None
+    assert rows[2][3] == rows[0][4]
+    assert rows[4][3:] == (rows[2][4], rows[0][4])
+
+
+def test_merge_is_audited_unless_dry_run(runner, tmp_path):
+    load_spans(runner, tmp_path, ["15m", "30m", "1h"], job_ids=("a",))
+    runner.invoke(merge, ["--strategy", "earliest", "--dry-run"])
+    runner.invoke(merge, ["--strategy", "earliest"])
+
+    assert [row[:3] for row in entries()][-1] == ("merge", 1, "a")
+    assert [row[0] for row in entries()].count("merge") == 1
+
+
+def test_audit_command_filters(runner, tmp_path):
+    load_spans(runner, tmp_path, ["15m", "30m"])
+    runner.invoke(undo, ["a"])
+
+    by_job = runner.invoke(audit, ["--job-id", "b"])
+    by_command = runner.invoke(audit, ["--command", "undo"])
+    future = runner.invoke(audit, ["--since", "2999-01-01"])
+
+    assert by_job.output.count("│ load") == 2
+    assert "undo" not in by_job.output
+    assert by_command.output.count("│ undo") == 1
+    assert "load" not in by_command.output
+    assert "No audit entries found." in future.output
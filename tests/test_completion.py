@@ -0,0 +1,83 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+from ml_json_cli.cli import cli
+from ml_json_cli.commands.load import load
+from ml_json_cli.completion import CompletionCache, complete
+from ml_json_cli.db import get_db_connection
+
+
+def load_jobs(tmp_path, *job_ids, description="Job"):
+    path = tmp_path / "jobs.json"
+    analysis_config = {"bucket_span": "15m", "detectors": [{"function": "count"}]}
+    jobs = [
+        {
+            "job": {
+                "job_id": job_id,
+                "description": description,
+                "analysis_config": analysis_config,
+            }
+        }
+        for job_id in job_ids
+    ]
+    path.write_text(json.dumps(jobs), encoding="utf-8")
+    CliRunner().invoke(load, [str(path)])
+
+
+@pytest.fixture
+def cache():
+    cache = CompletionCache()
+    yield cache
+    cache.close()
+
+
+def test_job_ids_by_prefix(tmp_path, cache):
+    load_jobs(tmp_path, "win_rare", "win_users", "linux_dns")
+
+    assert cache.job_ids("win_") == ["win_rare", "win_users"]
+    assert cache.job_ids("x") == []
+    assert complete(cli, cache, "undo ", "lin") == ["linux_dns"]
+
+
+def test_cache_reloads_after_another_connection_commits(tmp_path, cache):
+    load_jobs(tmp_path, "win_rare")
+    assert cache.job_ids() == ["win_rare"]
+
+    load_jobs(tmp_path, "win_users")
+
+    assert cache.job_ids() == ["win_rare", "win_users"]
+
+
+def test_cache_skips_queries_while_unchanged(tmp_path, mocker):
+    load_jobs(tmp_path, "win_rare")
+    conn = get_db_connection()
+    cache = CompletionCache(connect=lambda: conn)
+    cache.job_ids()
+    trace = mocker.Mock()
+    conn.set_trace_callback(trace)
+
+    cache.job_ids("win")
+
+    assert [call.args[0] for call in trace.call_args_list] == ["PRAGMA data_version"]
+    cache.close()
+
+
+def test_command_and_option_names(cache):
+    assert complete(cli, cache, "", "hi") == ["history"]
+    assert "exit" in complete(cli, cache, "", "")
+    assert complete(cli, cache, "search ", "--fu") == ["--fuzzy"]
+
+
+def test_versions_follow_job_id(tmp_path, cache):
+    load_jobs(tmp_path, "win_rare", description="first")
+    load_jobs(tmp_path, "win_rare", description="second")
+    load_jobs(tmp_path, "win_rare", description="third")
+
+    line = "compare --job-id win_rare --version1 "
+    assert complete(cli, cache, line, "") == ["1", "2"]
+    assert complete(cli, cache, "compare --job-id ", "win") == ["win_rare"]
+
+
+def test_choice_values(cache):
+    assert complete(cli, cache, "merge --strategy ", "l") == ["latest"]
@@ -0,0 +1,96 @@
+import sqlite3
+
+from ml_json_cli import db
+
+
+def create_legacy_schema(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE jobs (
+            job_id TEXT PRIMARY KEY, description TEXT, groups TEXT,
+            analysis_config TEXT, analysis_limits TEXT, datafeed_config TEXT,
+            custom_settings TEXT, last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TABLE job_versions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT, version INTEGER,
+            description TEXT, groups TEXT, analysis_config TEXT,
+            analysis_limits TEXT, datafeed_config TEXT, custom_settings TEXT,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE TRIGGER increment_version AFTER INSERT ON job_versions
+        FOR EACH ROW BEGIN SELECT 1; END;
+        INSERT INTO jobs (job_id) VALUES ('a'), ('b');
+        INSERT INTO job_versions (job_id, version) VALUES ('a', 2), ('a', 2), ('b', 4);
+        """
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_upgrade_legacy_database(tmp_path, monkeypatch):
+    path = str(tmp_path / "legacy.db")
+    create_legacy_schema(path)
+    monkeypatch.setattr(db, "DB_FILE", path)
+
+    db.init_db()
+
+    conn = db.get_db_connection()
+    triggers = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+    ).fetchall()
+    versions = conn.execute(
+        "SELECT job_id, version FROM job_versions ORDER BY job_id, version"
+    ).fetchall()
+    counters = dict(conn.execute("SELECT job_id, current_version FROM jobs"))
+    conn.close()
+
+    assert not triggers
+    assert [tuple(row) for row in versions] == [("a", 1), ("a", 2), ("b", 4)]
+    assert counters == {"a": 2, "b": 4}
+
+
+def test_new_database_is_fully_migrated():
+    conn = db.get_db_connection()
+    version = db.schema_version(conn)
+    conn.close()
+    assert version == len(db.MIGRATIONS)
+
+
+def test_migrate_applies_only_pending_steps(monkeypatch):
+    applied = []
+    monkeypatch.setattr(
+        db, "MIGRATIONS", db.MIGRATIONS + [lambda cursor: applied.append(True)]
+    )
+
+    conn = db.get_db_connection()
+    db.migrate(conn)
+    version = db.schema_version(conn)
+    conn.close()
+
+    assert applied == [True]
+    assert version == len(db.MIGRATIONS)
+
+
+def test_connection_profile():
+    conn = db.get_db_connection()
+    journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+    synchronous = conn.execute("PRAGMA synchronous").fetchone()[0]
+    busy_timeout = conn.execute("PRAGMA busy_timeout").fetchone()[0]
+    conn.close()
+    assert journal_mode == "wal"
+    assert synchronous == 1
+    assert busy_timeout == db.BUSY_TIMEOUT_MS
+
+
+def test_readers_are_not_blocked_by_writer():
+    writer = db.get_db_connection()
+    writer.execute("INSERT INTO jobs (job_id) VALUES ('a')")
+    reader = db.get_db_connection()
+
+    assert reader.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 0
+    writer.commit()
+    assert reader.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 1
+
+    reader.close()
+    writer.close()
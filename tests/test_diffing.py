@@ -0,0 +1,183 @@
+import copy
+import json
+
+from click.testing import CliRunner
+from ml_json_cli.commands.compare import compare
+from ml_json_cli.commands.load import load
+from ml_json_cli.diffing import diff_jobs, merge_three_way
+from conftest import valid_job
+
+
+def make_job():
+    return {
+        "description": "Rare processes",
+        "groups": "security, windows",
+        "analysis_config": {
+            "bucket_span": "15m",
+            "detectors": [
+                {"detector_index": 0, "function": "rare", "by_field_name": "process"},
+                {"detector_index": 1, "function": "count"},
+            ],
+            "influencers": ["host.name", "user.name"],
+        },
+        "analysis_limits": {"model_memory_limit": "32mb"},
+        "datafeed_config": {"indices": ["logs-*", "winlogbeat-*"]},
+        "custom_settings": {},
+    }
+
+
+def test_identical_jobs_have_no_changes():
+    assert diff_jobs(make_job(), make_job()) == []
+
+
+def test_reordered_sets_and_detectors_are_unchanged():
+    new = make_job()
+    new["groups"] = "windows, security"
+    new["analysis_config"]["influencers"].reverse()
+    new["analysis_config"]["detectors"].reverse()
+    new["datafeed_config"]["indices"].reverse()
+
+    assert diff_jobs(make_job(), new) == []
+
+
+def test_detectors_matched_by_index():
+    new = make_job()
+    detectors = new["analysis_config"]["detectors"]
+    detectors.reverse()
+    detectors[1]["function"] = "freq_rare"
+
+    assert diff_jobs(make_job(), new) == [
+        {
+            "op": "replace",
+            "path": "/analysis_config/detectors/0/function",
+            "old": "rare",
+            "value": "freq_rare",
+        }
+    ]
+
+
+def test_colliding_detector_indexes_are_matched_by_position():
+    def job(*functions):
+        detectors = [{"function": function} for function in functions]
+        detectors[0]["detector_index"] = 1
+        return {"analysis_config": {"detectors": detectors}}
+
+    base = job("count", "rare")
+    ours = job("high_count", "rare")
+    theirs = job("count", "freq_rare")
+
+    assert diff_jobs(base, ours) == [
+        {
+            "op": "replace",
+            "path": "/analysis_config/detectors/0/function",
+            "old": "count",
+            "value": "high_count",
+        }
+    ]
+    merged, conflicts = merge_three_way(base, ours, theirs)
+    assert conflicts == []
+    assert merged == job("high_count", "freq_rare")
+
+
+def test_set_members_and_fields_added_and_removed():
+    old = make_job()
+    new = copy.deepcopy(old)
+    new["groups"] = "security, linux"
+    new["analysis_config"]["influencers"].append("process.name")
+    del new["analysis_limits"]["model_memory_limit"]
+    new["custom_settings"]["created_by"] = "ml-module"
+
+    assert diff_jobs(old, new) == [
+        {"op": "remove", "path": "/groups/1", "old": "windows"},
+        {"op": "add", "path": "/groups/-", "value": "linux"},
+        {
+            "op": "add",
+            "path": "/analysis_config/influencers/-",
+            "value": "process.name",
+        },
+        {"op": "remove", "path": "/analysis_limits/model_memory_limit", "old": "32mb"},
+        {"op": "add", "path": "/custom_settings/created_by", "value": "ml-module"},
+    ]
+
+
+def test_ordered_lists_and_types_are_replaced():
+    old = make_job()
+    old["datafeed_config"]["query"] = {"terms": {"event.code": [1, 2]}}
+    new = copy.deepcopy(old)
+    new["datafeed_config"]["query"]["terms"]["event.code"] = [2, 1]
+    new["analysis_limits"]["model_memory_limit"] = 32
+
+    assert [(op["op"], op["path"]) for op in diff_jobs(old, new)] == [
+        ("replace", "/analysis_limits/model_memory_limit"),
+        ("replace", "/datafeed_config/query/terms/event.code"),
+    ]
+
+
+def test_compare_lists_patch_paths(tmp_path):
+    path = tmp_path / "job.json"
+    for bucket_span in ("15m", "1h"):
+        job = valid_job("win_rare", bucket_span)
+        path.write_text(json.dumps({"job": job}), encoding="utf-8")
+        CliRunner().invoke(load, [str(path)])
+
+    result = CliRunner().invoke(compare, ["--job-id", "win_rare", "--show-json"])
+
+    assert result.exit_code == 0
+    assert json.loads(result.output) == [
+        {
+            "op": "replace",
+            "path": "/analysis_config/bucket_span",
+            "old": "15m",
+            "value": "1h",
+        }
+    ]
+
+
+def test_three_way_merge_combines_both_sides():
+    base = make_job()
+    ours = make_job()
+    ours["analysis_limits"]["model_memory_limit"] = "64mb"
+    ours["analysis_config"]["influencers"].append("process.name")
+    theirs = make_job()
+    theirs["analysis_config"]["bucket_span"] = "30m"
+    theirs["analysis_config"]["influencers"].remove("user.name")
+    theirs["analysis_config"]["detectors"][1]["function"] = "high_count"
+    theirs["groups"] = "security, windows, endpoint"
+
+    merged, conflicts = merge_three_way(base, ours, theirs)
+
+    assert conflicts == []
+    assert merged["analysis_limits"]["model_memory_limit"] == "64mb"
+    assert merged["analysis_config"]["bucket_span"] == "30m"
+    assert merged["analysis_config"]["influencers"] == ["host.name", "process.name"]
+    assert merged["analysis_config"]["detectors"][1]["function"] == "high_count"
+    assert merged["groups"] == ["security", "windows", "endpoint"]
+
+
+def test_three_way_merge_reports_conflicts():
+    base = make_job()
+    ours = make_job()
+    ours["analysis_config"]["bucket_span"] = "1h"
+    theirs = make_job()
+    theirs["analysis_config"]["bucket_span"] = "30m"
+    del theirs["analysis_config"]["detectors"][0]["by_field_name"]
+    ours["analysis_config"]["detectors"][0]["by_field_name"] = "process.name"
+
+    merged, conflicts = merge_three_way(base, ours, theirs, prefer="theirs")
+
+    assert conflicts == [
+        {
+            "path": "/analysis_config/bucket_span",
+            "base": "15m",
+            "ours": "1h",
+            "theirs": "30m",
+        },
+        {
+            "path": "/analysis_config/detectors/0/by_field_name",
+            "base": "process",
+            "ours": "process.name",
+            "theirs": None,
+        },
+    ]
+    assert merged["analysis_config"]["bucket_span"] == "30m"
+    assert "by_field_name" not in merged["analysis_config"]["detectors"][0]
@@ -0,0 +1,108 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+from rich.console import Console
+from ml_json_cli.commands import drift as drift_module
+from ml_json_cli.commands.drift import drift, field_path
+from ml_json_cli.commands.load import load
+from ml_json_cli.db import get_db_connection
+from ml_json_cli.drift import iter_drift, iter_previous_pairs
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    monkeypatch.setattr(drift_module, "console", Console(width=200))
+    return CliRunner()
+
+
+def write_jobs(path, bucket_spans):
+    jobs = [
+        {
+            "job": {
+                "job_id": job_id,
+                "analysis_config": {
+                    "bucket_span": bucket_span,
+                    "detectors": [{"function": "count"}],
+                    "influencers": ["host.name", "user.name"],
+                },
+            }
+        }
+        for job_id, bucket_span in bucket_spans.items()
+    ]
+    path.write_text(json.dumps(jobs), encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def upgraded(runner, tmp_path):
+    before = write_jobs(
+        tmp_path / "before.json", {"win_rare": "15m", "win_count": "15m"}
+    )
+    runner.invoke(load, [before])
+    after = write_jobs(
+        tmp_path / "after.json",
+        {"win_rare": "1h", "win_count": "15m", "linux_dns": "15m"},
+    )
+    runner.invoke(load, [after])
+    return before
+
+
+def read_ndjson(path):
+    with open(path, encoding="utf-8") as f:
+        return {record["job_id"]: record for record in map(json.loads, f)}
+
+
+def test_drift_against_previous_versions(runner, upgraded, tmp_path):
+    output = tmp_path / "drift.ndjson"
+
+    result = runner.invoke(drift, ["--output", str(output), "--workers", "1"])
+
+    assert result.exit_code == 0
+    records = read_ndjson(output)
+    assert list(records) == ["win_rare"]
+    assert records["win_rare"]["changes"] == [
+        {
+            "op": "replace",
+            "path": "/analysis_config/bucket_span",
+            "old": "15m",
+            "value": "1h",
+        }
+    ]
+    assert "/analysis_config/bucket_span" in result.output
+    assert "Compared 3 job(s)" in result.output
+
+
+def test_drift_against_baseline(runner, upgraded, tmp_path):
+    baseline = write_jobs(
+        tmp_path / "baseline.json", {"win_rare": "1h", "win_old": "1h"}
+    )
+    output = tmp_path / "drift.ndjson"
+
+    result = runner.invoke(drift, ["--baseline", baseline, "--output", str(output)])
+
+    assert result.exit_code == 0
+    statuses = {job_id: r["status"] for job_id, r in read_ndjson(output).items()}
+    assert statuses == {"linux_dns": "new", "win_count": "new", "win_old": "missing"}
+
+
+def test_drift_pool_matches_inline(upgraded):
+    conn = get_db_connection()
+    inline = list(iter_drift(iter_previous_pairs(conn)))
+    pooled = list(iter_drift(iter_previous_pairs(conn), workers=2, chunk_size=1))
+    conn.close()
+
+    assert pooled == inline
+
+
+def test_drift_missing_baseline(runner, tmp_path):
+    result = runner.invoke(drift, ["--baseline", str(tmp_path / "nope.json")])
+
+    assert "No such file or directory" in result.output
+
+
+def test_field_path_folds_positions():
+    assert field_path("/analysis_config/detectors/3/function") == (
+        "/analysis_config/detectors/*/function"
+    )
+    assert field_path("/groups/-") == "/groups/*"
@@ -1,9 +1,15 @@
 import pytest
+import csv
+import gzip
 import json
 import os
 from click.testing import CliRunner
 from ml_json_cli.commands.export import export
+from ml_json_cli.commands.history import history
+from ml_json_cli.commands.load import load
+from ml_json_cli.commands.storage import storage
 from ml_json_cli.db import get_db_connection
+from conftest import analysis_config, valid_job
 
 
 @pytest.fixture
@@ -11,39 +17,31 @@ def runner():
     return CliRunner()
 
 
-@pytest.fixture
-def setup_test_data():
-    """Setup test database with sample job versions."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def load_versions(runner, tmp_path, job_id, spans):
+    path = tmp_path / f"{job_id}.json"
+    for span in spans:
+        job = valid_job(job_id, span, description="Test description")
+        path.write_text(json.dumps({"job": job}), encoding="utf-8")
+        runner.invoke(load, [str(path)])
 
-    cursor.execute("DELETE FROM jobs")
-    cursor.execute("DELETE FROM job_versions")
 
-    cursor.execute(
-        "INSERT INTO jobs (job_id, description) VALUES ('test_job', 'Test description')"
-    )
-    cursor.execute(
-        "INSERT INTO job_versions (job_id, version, data) VALUES ('test_job', 1, '{\"bucket_span\": \"15m\"}')"
-    )
-    cursor.execute(
-        "INSERT INTO job_versions (job_id, version, data) VALUES ('test_job', 2, '{\"bucket_span\": \"10m\"}')"
-    )
-
-    conn.commit()
-    conn.close()
+@pytest.fixture
+def setup_test_data(runner, tmp_path):
+    """Setup test database with sample job versions."""
+    load_versions(runner, tmp_path, "test_job", ["15m", "10m", "5m"])
+    load_versions(runner, tmp_path, "other_job", ["1h", "2h"])
 
 
-def test_export_json(runner, setup_test_data):
+def test_export_json(runner, setup_test_data, tmp_path):
     """Test exporting job history to JSON."""
-    output_file = "test_job.json"
+    output_file = str(tmp_path / "test_job.json")
 
     result = runner.invoke(
         export, ["--job-id", "test_job", "--format", "json", "--output", output_file]
     )
 
     assert result.exit_code == 0
-    assert "Exported job history to test_job.json" in result.output
+    assert "Exported job history to" in result.output
 
     with open(output_file, "r") as f:
         data = json.load(f)
@@ -51,25 +49,211 @@ def test_export_json(runner, setup_test_data):
     assert len(data) == 2
     assert data[0]["version"] == 1
     assert data[1]["version"] == 2
+    assert data[0]["analysis_config"] == analysis_config("15m")
 
-    os.remove(output_file)
 
-
-def test_export_csv(runner, setup_test_data):
+def test_export_csv(runner, setup_test_data, tmp_path):
     """Test exporting job history to CSV."""
-    output_file = "test_job.csv"
+    output_file = str(tmp_path / "test_job.csv")
 
     result = runner.invoke(
         export, ["--job-id", "test_job", "--format", "csv", "--output", output_file]
     )
 
     assert result.exit_code == 0
-    assert "Exported job history to test_job.csv" in result.output
+    assert "Exported job history to" in result.output
+
+    with open(output_file, "r", newline="") as f:
+        rows = list(csv.DictReader(f))
+
+    assert len(rows) == 2
+    assert rows[1]["version"] == "2"
+    assert json.loads(rows[1]["analysis_config"]) == analysis_config("10m")
+
+
+def test_export_all_ndjson_gzip_with_fields(runner, setup_test_data, tmp_path):
+    output_file = str(tmp_path / "jobs.ndjson.gz")
+
+    result = runner.invoke(
+        export,
+        [
+            "--all",
+            "--format",
+            "ndjson",
+            "--fields",
+            "job_id,version",
+            "--output",
+            output_file,
+        ],
+    )
+
+    assert result.exit_code == 0
+    with gzip.open(output_file, "rt", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert records == [
+        {"job_id": "other_job", "version": 1},
+        {"job_id": "test_job", "version": 1},
+        {"job_id": "test_job", "version": 2},
+    ]
+
+
+def test_export_current_to_stdout(runner, setup_test_data):
+    result = runner.invoke(
+        export,
+        [
+            "--all",
+            "--current",
+            "--format",
+            "ndjson",
+            "--fields",
+            "job_id,analysis_config",
+            "--output",
+            "-",
+        ],
+    )
+
+    assert result.exit_code == 0
+    records = [json.loads(line) for line in result.stdout.splitlines()]
+    assert records == [
+        valid_job("other_job", "2h"),
+        valid_job("test_job", "5m"),
+    ]
+
+
+def test_export_delta_storage(runner, tmp_path):
+    runner.invoke(storage, ["--mode", "delta", "--snapshot-interval", "2"])
+    load_versions(runner, tmp_path, "test_job", ["1m", "2m", "3m", "4m"])
+    output_file = str(tmp_path / "out.json")
+
+    runner.invoke(export, ["--job-id", "test_job", "--output", output_file])
+
+    with open(output_file) as f:
+        spans = [record["analysis_config"]["bucket_span"] for record in json.load(f)]
+    assert spans == ["1m", "2m", "3m"]
+
+
+def test_export_rejects_unknown_fields(runner, setup_test_data):
+    result = runner.invoke(export, ["--all", "--fields", "job_id,data"])
+
+    assert result.exit_code != 0
+    assert "unknown field(s) data" in result.output
+
+
+def test_export_missing_job(runner, tmp_path):
+    result = runner.invoke(export, ["--job-id", "nope"])
+
+    assert "No history found" in result.output
+    assert not os.path.exists("nope.json")
+
+
+@pytest.fixture
+def dated_history(runner, setup_test_data):
+    """Date test_job v1 15m, v2 10m, current 5m and other_job v1 1h, current 2h."""
+    conn = get_db_connection()
+    for job_id, version, timestamp in [
+        ("test_job", 1, "2026-01-01 00:00:00"),
+        ("test_job", 2, "2026-02-01 00:00:00"),
+        ("other_job", 1, "2026-02-15 00:00:00"),
+    ]:
+        conn.execute(
+            "UPDATE job_versions SET timestamp = ? WHERE job_id = ? AND version = ?",
+            (timestamp, job_id, version),
+        )
+    for job_id, timestamp in [
+        ("test_job", "2026-03-01 00:00:00"),
+        ("other_job", "2026-04-01 00:00:00"),
+    ]:
+        conn.execute(
+            "UPDATE jobs SET last_updated = ? WHERE job_id = ?", (timestamp, job_id)
+        )
+    conn.commit()
+    conn.close()
+
+
+@pytest.mark.parametrize(
+    "as_of, expected",
+    [
+        ("2026-01-15", {"test_job": (1, "15m")}),
+        ("2026-02-20", {"test_job": (2, "10m"), "other_job": (1, "1h")}),
+        ("2026-03-15T12:00:00", {"test_job": (3, "5m"), "other_job": (1, "1h")}),
+    ],
+)
+def test_export_as_of(runner, dated_history, tmp_path, as_of, expected):
+    output_file = str(tmp_path / "snapshot.ndjson")
+
+    result = runner.invoke(
+        export,
+        ["--all", "--as-of", as_of, "--format", "ndjson", "--output", output_file],
+    )
+
+    assert result.exit_code == 0
+    with open(output_file) as f:
+        records = [json.loads(line) for line in f]
+    assert {
+        record["job_id"]: (record["version"], record["analysis_config"]["bucket_span"])
+        for record in records
+    } == expected
+
+
+def test_export_as_of_reads_delta_versions(runner, tmp_path):
+    runner.invoke(storage, ["--mode", "delta"])
+    load_versions(runner, tmp_path, "test_job", ["15m", "10m", "5m"])
+    conn = get_db_connection()
+    conn.execute("UPDATE job_versions SET timestamp = '2026-01-0' || version")
+    conn.execute("UPDATE jobs SET last_updated = '2026-02-01'")
+    conn.commit()
+    conn.close()
+
+    output_file = str(tmp_path / "snapshot.ndjson")
+
+    runner.invoke(
+        export,
+        ["--job-id", "test_job", "--as-of", "2026-01-02"]
+        + ["--format", "ndjson", "--output", output_file],
+    )
+
+    with open(output_file) as f:
+        record = json.loads(f.readline())
+    assert (record["version"], record["analysis_config"]) == (
+        2,
+        analysis_config("10m"),
+    )
+
+
+def test_history_as_of(runner, dated_history):
+    result = runner.invoke(history, ["--as-of", "2026-03-15"])
+
+    assert result.output.splitlines() == [
+        "Jobs as of 2026-03-15 00:00:00:",
+        "other_job: version 1 - 2026-02-15 00:00:00",
+        "test_job: version 3 - 2026-03-01 00:00:00 (current)",
+    ]
+
+
+def test_history_as_of_json(runner, dated_history):
+    result = runner.invoke(history, ["--as-of", "2026-03-15", "--output", "json"])
+
+    assert json.loads(result.output) == [
+        {
+            "job_id": "other_job",
+            "version": 1,
+            "timestamp": "2026-02-15 00:00:00",
+            "current": False,
+        },
+        {
+            "job_id": "test_job",
+            "version": 3,
+            "timestamp": "2026-03-01 00:00:00",
+            "current": True,
+        },
+    ]
 
-    with open(output_file, "r") as f:
-        lines = f.readlines()
 
-    assert len(lines) == 3  # Header + 2 data rows
-    assert "Version,Timestamp,Data" in lines[0]
+def test_history_tsv(runner, dated_history):
+    result = runner.invoke(history, ["--job-id", "test_job", "--output", "tsv"])
 
-    os.remove(output_file)
+    assert result.output.splitlines() == [
+        "job_id\tversion\ttimestamp",
+        "test_job\t2\t2026-02-01 00:00:00",
+        "test_job\t1\t2026-01-01 00:00:00",
+    ]
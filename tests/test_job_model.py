@@ -0,0 +1,51 @@
+import json
+import os
+
+from ml_json_cli import json_parser
+from ml_json_cli.diffing import diff_jobs
+from ml_json_cli.json_parser import Job, normalize_job
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "sample.json")
+
+
+def sample_document():
+    with open(SAMPLE, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_stored_job_matches_document():
+    document = sample_document()
+    row = normalize_job(document)
+
+    job = Job.from_row(row._asdict())
+
+    assert job.document()["datafeed"] == document["datafeed"]
+    assert normalize_job(job.document()) == job.to_row() == row
+    assert job["groups"] == row.groups
+    assert list(job) == list(json_parser.JOB_FIELDS)
+    assert [detector.function for detector in job.detectors] == ["rare"]
+
+
+def test_fields_are_decoded_on_first_access(mocker):
+    job = Job.from_row(normalize_job(sample_document())._asdict())
+    loads = mocker.spy(json_parser.json, "loads")
+
+    attributes = job.attributes()
+    job.attributes()
+
+    assert attributes.detectors == ((0, "rare"),)
+    assert loads.call_count == 3
+    assert "datafeed" not in str(loads.call_args_list)
+
+
+def test_diff_skips_fields_with_identical_text(mocker):
+    old = normalize_job(sample_document())
+    document = sample_document()
+    document["job"]["analysis_limits"]["model_memory_limit"] = "64mb"
+    new = normalize_job(document)
+    loads = mocker.spy(json_parser.json, "loads")
+
+    ops = diff_jobs(Job.from_row(old._asdict()), Job.from_row(new._asdict()))
+
+    assert [op["path"] for op in ops] == ["/analysis_limits/model_memory_limit"]
+    assert loads.call_count == 2
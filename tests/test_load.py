@@ -0,0 +1,246 @@
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+from ml_json_cli import loader
+from ml_json_cli.commands.load import load
+from ml_json_cli.db import get_db_connection
+from ml_json_cli.json_parser import iter_jobs, normalize_job
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "sample.json")
+
+
+@pytest.fixture
+def runner():
+    return CliRunner()
+
+
+def make_job(job_id, bucket_span="15m"):
+    return {
+        "job": {
+            "job_id": job_id,
+            "description": f"Job {job_id}",
+            "groups": ["security"],
+            "analysis_config": {
+                "bucket_span": bucket_span,
+                "detectors": [{"function": "rare", "detector_index": 0}],
+            },
+        },
+        "datafeed": {"indices": ["logs-*"]},
+    }
+
+
+def write_json(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+def test_iter_jobs_single_document():
+    jobs = list(iter_jobs(SAMPLE))
+    assert len(jobs) == 1
+    assert jobs[0]["job"]["job_id"] == "v3_windows_anomalous_process_creation"
+
+
+def test_iter_jobs_array(tmp_path):
+    path = write_json(tmp_path, "jobs.json", [make_job("a"), make_job("b")])
+    assert [job["job"]["job_id"] for job in iter_jobs(path)] == ["a", "b"]
+
+
+def test_normalize_job():
+    row = normalize_job(make_job("a"))
+    assert row.job_id == "a"
+    assert row.groups == "security"
+    assert json.loads(row.analysis_config)["bucket_span"] == "15m"
+    assert json.loads(row.datafeed_config) == {"indices": ["logs-*"]}
+
+
+def test_load_batches(runner, tmp_path):
+    path = write_json(tmp_path, "jobs.json", [make_job(f"job_{i}") for i in range(5)])
+
+    result = runner.invoke(load, [path, "--batch-size", "2"])
+
+    assert result.exit_code == 0
+    assert "Successfully loaded 5 job(s)" in result.output
+    assert "3 batch(es)" in result.output
+    conn = get_db_connection()
+    assert conn.execute("SELECT COUNT(*) FROM jobs").fetchone()[0] == 5
+    conn.close()
+
+
+def test_reload_snapshots_previous_version(runner, tmp_path):
+    first = write_json(tmp_path, "first.json", [make_job("a", "15m")])
+    second = write_json(tmp_path, "second.json", [make_job("a", "30m")])
+
+    runner.invoke(load, [first])
+    result = runner.invoke(load, [second])
+
+    assert result.exit_code == 0
+    conn = get_db_connection()
+    current = conn.execute(
+        "SELECT analysis_config FROM jobs WHERE job_id = 'a'"
+    ).fetchone()
+    previous = conn.execute(
+        "SELECT analysis_config FROM job_versions WHERE job_id = 'a'"
+    ).fetchall()
+    conn.close()
+    assert json.loads(current["analysis_config"])["bucket_span"] == "30m"
+    assert len(previous) == 1
+    assert json.loads(previous[0]["analysis_config"])["bucket_span"] == "15m"
+
+
+def test_duplicate_job_in_one_batch(runner, tmp_path):
+    path = write_json(
+        tmp_path, "jobs.json", [make_job("a", "15m"), make_job("a", "30m")]
+    )
+
+    result = runner.invoke(load, [path])
+
+    assert result.exit_code == 0
+    conn = get_db_connection()
+    assert conn.execute("SELECT COUNT(*) FROM job_versions").fetchone()[0] == 1
+    conn.close()
+
+
+def test_load_skips_jobs_without_id(runner, tmp_path):
+    path = write_json(tmp_path, "jobs.json", [make_job("a"), {"job": {}}])
+
+    result = runner.invoke(load, [path, "--no-validate"])
+
+    assert "Missing key 'job_id'" in result.output
+    assert "Successfully loaded 1 job(s)" in result.output
+
+
+def test_load_rejects_invalid_jobs(runner, tmp_path):
+    bad_span = make_job("b", bucket_span="15 minutes")
+    no_detectors = make_job("c")
+    no_detectors["job"]["analysis_config"]["detectors"] = []
+    path = write_json(
+        tmp_path, "jobs.json", [make_job("a"), bad_span, no_detectors, {"job": {}}]
+    )
+
+    result = runner.invoke(load, [path, "--workers", "1"])
+
+    output = " ".join(result.output.split())
+    assert "Invalid job b" in output
+    assert "'15 minutes' is not a whole number of seconds" in output
+    assert "Invalid job c" in output
+    assert "detectors must contain at least 1 items" in output
+    assert "Invalid job (no job_id)" in output
+    assert "1 new, 0 changed, 0 unchanged, 0 skipped, 3 invalid" in output
+    conn = get_db_connection()
+    assert [row[0] for row in conn.execute("SELECT job_id FROM jobs")] == ["a"]
+    conn.close()
+
+
+def test_load_invalid_json(runner, tmp_path):
+    good = write_json(tmp_path, "good.json", make_job("b"))
+    path = tmp_path / "broken.json"
+    path.write_text(json.dumps([make_job("a")])[:-1] + ", {", encoding="utf-8")
+
+    result = runner.invoke(load, [str(path), good, "--workers", "1"])
+
+    assert result.exit_code == 1
+    assert "Failed to parse JSON file" in result.output
+    assert "Successfully" not in result.output
+    assert "Loaded 1 job(s) from 2 file(s); 1 file(s) could not be loaded" in (
+        " ".join(result.output.split())
+    )
+    conn = get_db_connection()
+    assert [row[0] for row in conn.execute("SELECT job_id FROM jobs")] == ["b"]
+    conn.close()
+
+
+def test_load_directory_in_parallel(runner, tmp_path):
+    source = tmp_path / "exports"
+    nested = source / "nested"
+    nested.mkdir(parents=True)
+    write_json(source, "a.json", [make_job("a"), make_job("b")])
+    write_json(nested, "c.json", make_job("c"))
+    (source / "d.ndjson").write_text(
+        "\n".join(json.dumps(make_job(job_id)) for job_id in ("d", "e")) + "\n",
+        encoding="utf-8",
+    )
+    (source / "notes.txt").write_text("not a job", encoding="utf-8")
+
+    result = runner.invoke(load, [str(source), "--workers", "2"])
+
+    assert result.exit_code == 0
+    assert "Successfully loaded 5 job(s) from 3 file(s)" in result.output
+    conn = get_db_connection()
+    job_ids = [row[0] for row in conn.execute("SELECT job_id FROM jobs ORDER BY 1")]
+    conn.close()
+    assert job_ids == ["a", "b", "c", "d", "e"]
+
+
+def test_parallel_load_fails_when_a_worker_dies(monkeypatch, tmp_path):
+    paths = [write_json(tmp_path, f"{name}.json", make_job(name)) for name in "ab"]
+    monkeypatch.setattr(loader, "POLL_INTERVAL", 0.1)
+    monkeypatch.setattr(loader, "iter_file_events", lambda *args: os._exit(1))
+
+    with pytest.raises(RuntimeError, match="exited unexpectedly"):
+        list(loader.iter_load_events(paths, workers=2))
+
+
+def test_load_glob(runner, tmp_path):
+    write_json(tmp_path, "one.json", make_job("one"))
+    write_json(tmp_path, "two.json", make_job("two"))
+
+    result = runner.invoke(load, [str(tmp_path / "*.json")])
+
+    assert "Successfully loaded 2 job(s) from 2 file(s)" in result.output
+
+
+def test_load_missing_path(runner, tmp_path):
+    result = runner.invoke(load, [str(tmp_path / "missing.json")])
+
+    assert "No such file or directory" in result.output
+
+
+def test_versions_are_numbered_per_job(runner, tmp_path):
+    for bucket_span in ("15m", "30m", "45m"):
+        path = write_json(tmp_path, f"{bucket_span}.json", [make_job("a", bucket_span)])
+        runner.invoke(load, [path])
+
+    conn = get_db_connection()
+    versions = [
+        row[0]
+        for row in conn.execute(
+            "SELECT version FROM job_versions WHERE job_id = 'a' ORDER BY version"
+        )
+    ]
+    current = conn.execute(
+        "SELECT current_version FROM jobs WHERE job_id = 'a'"
+    ).fetchone()[0]
+    conn.close()
+    assert versions == [1, 2]
+    assert current == 2
+
+
+def test_unchanged_reload_writes_nothing(runner, tmp_path):
+    path = write_json(tmp_path, "jobs.json", [make_job("a"), make_job("b")])
+    runner.invoke(load, [path])
+    reformatted = tmp_path / "reformatted.json"
+    reformatted.write_text(
+        json.dumps([make_job("a"), make_job("b", "30m")], indent=2, sort_keys=True),
+        encoding="utf-8",
+    )
+
+    result = runner.invoke(load, [str(reformatted)])
+
+    assert "0 new, 1 changed, 1 unchanged" in result.output
+    conn = get_db_connection()
+    versions = [row[0] for row in conn.execute("SELECT job_id FROM job_versions")]
+    conn.close()
+    assert versions == ["b"]
+
+
+def test_content_hash_ignores_formatting():
+    job = make_job("a")
+    reordered = json.loads(json.dumps(job, sort_keys=True))
+    assert normalize_job(job).content_hash == normalize_job(reordered).content_hash
+    assert (
+        normalize_job(job).content_hash
+        != normalize_job(make_job("a", "1h")).content_hash
+    )
@@ -0,0 +1,182 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+from ml_json_cli.commands.load import load
+from ml_json_cli.commands.merge import merge
+from ml_json_cli.commands.undo import undo
+from ml_json_cli.db import get_db_connection
+from conftest import analysis_config, valid_job
+
+
+@pytest.fixture
+def runner():
+    return CliRunner()
+
+
+@pytest.fixture
+def history(runner, tmp_path):
+    """Load job 'a' with bucket spans 15m, 30m, 45m, 30m, 10m, 1h (current)."""
+    for index, bucket_span in enumerate(("15m", "30m", "45m", "30m", "10m", "1h")):
+        path = tmp_path / f"{index}.json"
+        path.write_text(
+            json.dumps({"job": valid_job("a", bucket_span)}),
+            encoding="utf-8",
+        )
+        runner.invoke(load, [str(path)])
+
+
+def current_bucket_span():
+    conn = get_db_connection()
+    row = conn.execute("SELECT analysis_config FROM jobs WHERE job_id = 'a'").fetchone()
+    conn.close()
+    return json.loads(row["analysis_config"])["bucket_span"]
+
+
+@pytest.mark.parametrize(
+    "strategy, expected",
+    [("most_common", "30m"), ("latest", "10m"), ("earliest", "15m")],
+)
+def test_merge_strategies(runner, history, strategy, expected):
+    result = runner.invoke(merge, ["--strategy", strategy])
+
+    assert "Merged 1 jobs using strategy" in result.output
+    assert current_bucket_span() == expected
+
+
+def test_merge_without_history(runner):
+    result = runner.invoke(merge, [])
+
+    assert "No jobs found to merge." in result.output
+
+
+def load_versions(runner, tmp_path, documents, *options):
+    path = tmp_path / "job.json"
+    for document in documents:
+        path.write_text(json.dumps({"job": document}), encoding="utf-8")
+        runner.invoke(load, [str(path), *options])
+
+
+def current_job(job_id):
+    conn = get_db_connection()
+    row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+    conn.close()
+    return row
+
+
+def test_merge_resolves_fields_separately(runner, tmp_path):
+    load_versions(
+        runner,
+        tmp_path,
+        [
+            {"job_id": "b", "description": "old", "analysis_config": {"n": 1}},
+            {"job_id": "b", "description": "old", "analysis_config": {"n": 2}},
+            {"job_id": "b", "description": "new", "analysis_config": {"n": 2}},
+            {"job_id": "b", "description": "new", "analysis_config": {"n": 3}},
+            {"job_id": "b", "description": "current", "analysis_config": {}},
+        ],
+        "--no-validate",
+    )
+
+    result = runner.invoke(merge, ["--field", "description=earliest"])
+
+    assert "(1 changed)" in result.output
+    job = current_job("b")
+    assert job["description"] == "old"
+    assert json.loads(job["analysis_config"]) == {"n": 2}
+
+
+def test_merge_dry_run_writes_nothing(runner, history):
+    before = dict(current_job("a"))
+
+    result = runner.invoke(merge, ["--strategy", "earliest", "--dry-run"])
+
+    assert "would change 1" in result.output
+    assert "  a: analysis_config" in result.output
+    assert dict(current_job("a")) == before
+
+
+def test_merge_can_be_undone(runner, history):
+    runner.invoke(merge, ["--strategy", "earliest"])
+    runner.invoke(undo, ["a"])
+
+    assert current_bucket_span() == "1h"
+
+
+def test_merge_rejects_unknown_field(runner):
+    result = runner.invoke(merge, ["--field", "bucket_span=latest"])
+
+    assert result.exit_code == 2
+    assert "FIELD=STRATEGY" in result.output
+
+
+def module_job(bucket_span, memory, description="Rare processes"):
+    return valid_job(
+        "c",
+        bucket_span,
+        description=description,
+        analysis_limits={"model_memory_limit": memory},
+    )
+
+
+def test_three_way_merge_applies_upstream_changes(runner, tmp_path):
+    # Upstream 15m/32mb, tuned locally to 64mb; upstream then moves to 30m.
+    load_versions(
+        runner, tmp_path, [module_job("15m", "32mb"), module_job("15m", "64mb")]
+    )
+    module = tmp_path / "module.json"
+    module.write_text(
+        json.dumps(
+            [
+                {"job": module_job("30m", "32mb")},
+                {"job": dict(module_job("1h", "16mb"), job_id="d")},
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    result = runner.invoke(merge, ["--three-way", str(module)])
+
+    assert "2 jobs from" in result.output
+    assert "1 new, 1 changed, 0 unchanged, 0 conflict(s)" in result.output
+    job = current_job("c")
+    assert json.loads(job["analysis_config"]) == analysis_config("30m")
+    assert json.loads(job["analysis_limits"]) == {"model_memory_limit": "64mb"}
+    assert current_job("d") is not None
+
+
+@pytest.mark.parametrize("base", ["earliest", "latest"])
+def test_three_way_merge_uses_last_upstream_as_base(runner, tmp_path, base):
+    load_versions(
+        runner, tmp_path, [module_job("15m", "32mb"), module_job("15m", "64mb")]
+    )
+    for revision, bucket_span in (("up2", "30m"), ("up3", "1h")):
+        module = tmp_path / f"{revision}.json"
+        module.write_text(
+            json.dumps({"job": module_job(bucket_span, "32mb")}), encoding="utf-8"
+        )
+
+        result = runner.invoke(merge, ["--three-way", str(module), "--base", base])
+
+        assert "1 changed, 0 unchanged, 0 conflict(s)" in result.output
+
+    job = current_job("c")
+    assert json.loads(job["analysis_config"])["bucket_span"] == "1h"
+    assert json.loads(job["analysis_limits"]) == {"model_memory_limit": "64mb"}
+
+
+def test_three_way_merge_reports_conflicts(runner, tmp_path):
+    load_versions(
+        runner, tmp_path, [module_job("15m", "32mb"), module_job("1h", "32mb")]
+    )
+    module = tmp_path / "module.json"
+    module.write_text(json.dumps({"job": module_job("30m", "32mb")}), encoding="utf-8")
+
+    result = runner.invoke(merge, ["--three-way", str(module), "--dry-run"])
+
+    assert (
+        'Conflict in c at /analysis_config/bucket_span: ours "1h", theirs "30m", '
+        'base "15m"' in result.output
+    )
+    assert "Dry run: would merge 1 jobs" in result.output
+    assert json.loads(current_job("c")["analysis_config"]) == analysis_config("1h")
@@ -0,0 +1,67 @@
+import json
+import os
+import pstats
+
+from click.testing import CliRunner
+from ml_json_cli import perf
+from ml_json_cli.cli import cli
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "sample.json")
+
+
+def test_normalize_sql_groups_executions():
+    first = perf.normalize_sql(
+        "INSERT INTO jobs (job_id, version)  VALUES ('win_rare', 3)"
+    )
+    second = perf.normalize_sql(
+        "INSERT INTO jobs (job_id, version) VALUES ('it''s', 12)"
+    )
+
+    assert first == second == "INSERT INTO jobs (job_id, version) VALUES (?, ?)"
+    assert perf.normalize_sql("PRAGMA cache_size = -65536") == "PRAGMA cache_size = -?"
+
+
+def test_trace_sql_reports_phases_and_statements_as_json():
+    result = CliRunner().invoke(
+        cli, ["--trace-sql", "--profile-format", "json", "load", SAMPLE]
+    )
+
+    assert result.exit_code == 0, result.output
+    summary = json.loads(result.stderr)
+    assert summary["command"] == "load"
+    assert {"import", "parse", "write"} <= {p["name"] for p in summary["phases"]}
+    assert summary["sql"]["statements"] >= summary["sql"]["distinct"] > 0
+    assert any(s["sql"].startswith("INSERT INTO jobs") for s in summary["sql"]["top"])
+    assert perf.profiler() is None
+
+
+def test_profile_prints_breakdown_to_stderr():
+    runner = CliRunner()
+    runner.invoke(cli, ["load", SAMPLE])
+
+    result = runner.invoke(cli, ["--profile", "search", "--group", "security"])
+
+    assert result.exit_code == 0, result.output
+    assert "Profile of search" not in result.stdout
+    assert result.stderr.startswith("Profile of search: ")
+    assert "  render " in result.stderr
+    assert "SQL:" not in result.stderr
+
+
+def test_profile_out_writes_pstats(tmp_path):
+    path = str(tmp_path / "history.pstats")
+
+    result = CliRunner().invoke(
+        cli, ["--profile-out", path, "history", "--job-id", "missing"]
+    )
+
+    assert result.exit_code == 0, result.output
+    assert f"cProfile stats written to {path}" in result.stderr
+    assert pstats.Stats(path).total_calls > 0
+
+
+def test_no_profile_by_default():
+    result = CliRunner().invoke(cli, ["history", "--job-id", "missing"])
+
+    assert result.exit_code == 0
+    assert result.stderr == ""
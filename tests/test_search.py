@@ -0,0 +1,232 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+from rich.console import Console
+from ml_json_cli.commands import search as search_module
+from ml_json_cli.commands.load import load
+from ml_json_cli.commands.search import search
+from ml_json_cli.commands.undo import undo
+from ml_json_cli.db import get_db_connection
+from ml_json_cli.search_index import fuzzy_matches
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    monkeypatch.setattr(search_module, "console", Console(width=400))
+    return CliRunner()
+
+
+def make_job(job_id, function="rare", bucket_span="15m", influencers=("host.name",)):
+    return {
+        "job": {
+            "job_id": job_id,
+            "description": f"Job {job_id}",
+            "groups": ["security", "windows" if "win" in job_id else "linux"],
+            "analysis_config": {
+                "bucket_span": bucket_span,
+                "detectors": [{"function": function, "detector_index": 0}],
+                "influencers": list(influencers),
+            },
+            "analysis_limits": {"model_memory_limit": "32mb"},
+            "custom_settings": {"created_by": f"module-{function}"},
+        }
+    }
+
+
+@pytest.fixture
+def fleet(runner, tmp_path):
+    jobs = [make_job(f"win_rare_{i}") for i in range(3)]
+    jobs += [make_job(f"linux_count_{i}", "high_count", "1h") for i in range(12)]
+    jobs.append(make_job("win_users", "rare", influencers=("user.name", "host.name")))
+    path = tmp_path / "fleet.json"
+    path.write_text(json.dumps(jobs), encoding="utf-8")
+    runner.invoke(load, [str(path)])
+
+
+def job_ids(output):
+    return {
+        word
+        for line in output.splitlines()
+        for word in line.replace("│", " ").split()
+        if word.startswith(("win_", "linux_"))
+    }
+
+
+def test_filters_apply_before_pagination(runner, fleet):
+    result = runner.invoke(search, ["--detector-function", "rare", "--limit", "3"])
+
+    assert result.exit_code == 0
+    assert len(job_ids(result.output)) == 3
+
+
+@pytest.mark.parametrize(
+    "args, expected",
+    [
+        (["--bucket-span", "15m"], 4),
+        (["--model-memory-limit", "32MB"], 16),
+        (["--created-by", "module-high_count"], 12),
+        (["--influencers", "user.name, host.name"], 1),
+        (["--group", "Windows"], 4),
+        (["--job-id", "USERS"], 1),
+    ],
+)
+def test_search_filters(runner, fleet, args, expected):
+    result = runner.invoke(search, args + ["--limit", "50"])
+
+    assert result.exit_code == 0
+    assert len(job_ids(result.output)) == expected
+
+
+def test_fuzzy_search(runner, fleet):
+    result = runner.invoke(search, ["--fuzzy", "win_usrs"])
+
+    assert job_ids(result.output) == {"win_users"}
+
+
+def test_no_results(runner, fleet):
+    result = runner.invoke(search, ["--detector-function", "mean"])
+
+    assert "No jobs found" in result.output
+
+
+def load_described(runner, tmp_path, job_id, description, detector_description):
+    job = make_job(job_id)
+    job["job"]["description"] = description
+    job["job"]["analysis_config"]["detectors"][0][
+        "detector_description"
+    ] = detector_description
+    path = tmp_path / f"{job_id}.json"
+    path.write_text(json.dumps(job), encoding="utf-8")
+    runner.invoke(load, [str(path)])
+
+
+def test_text_search_ranks_matches(runner, tmp_path):
+    load_described(
+        runner, tmp_path, "win_rdp", "Lateral movement over RDP", "Lateral movement"
+    )
+    load_described(
+        runner, tmp_path, "win_smb", "Unusual SMB shares", "Lateral movement"
+    )
+    load_described(runner, tmp_path, "linux_dns", "Rare DNS queries", "DNS tunneling")
+
+    result = runner.invoke(search, ["--text", "lateral movement"])
+
+    assert result.exit_code == 0
+    lines = [line for line in result.output.splitlines() if "win_" in line]
+    assert [line.split()[1] for line in lines] == ["win_rdp", "win_smb"]
+    assert "Match" in result.output
+
+
+def test_text_search_accepts_punctuation(runner, tmp_path):
+    load_described(runner, tmp_path, "win_rdp", "Lateral movement", "RDP")
+
+    result = runner.invoke(search, ["--text", "lateral-movement"])
+
+    assert result.exit_code == 0
+    assert job_ids(result.output) == {"win_rdp"}
+
+
+def test_text_index_follows_undo(runner, tmp_path):
+    load_described(runner, tmp_path, "win_rdp", "Lateral movement", "RDP")
+    load_described(runner, tmp_path, "win_rdp", "Credential access", "RDP")
+
+    assert not job_ids(runner.invoke(search, ["--text", "lateral"]).output)
+    runner.invoke(undo, ["win_rdp"])
+    assert job_ids(runner.invoke(search, ["--text", "lateral"]).output) == {"win_rdp"}
+    assert not job_ids(runner.invoke(search, ["--text", "credential"]).output)
+
+
+def test_fuzzy_search_paginates_by_score(runner, fleet):
+    first = runner.invoke(search, ["--fuzzy", "win_rare", "--limit", "2"])
+    second = runner.invoke(
+        search, ["--fuzzy", "win_rare", "--limit", "2", "--page", "2"]
+    )
+
+    assert len(job_ids(first.output)) == 2
+    assert len(job_ids(second.output)) == 1
+    assert job_ids(first.output) | job_ids(second.output) == {
+        "win_rare_0",
+        "win_rare_1",
+        "win_rare_2",
+    }
+    assert "Score" in first.output
+
+
+def test_fuzzy_search_combines_with_filters(runner, fleet):
+    result = runner.invoke(search, ["--fuzzy", "linux_count", "--bucket-span", "15m"])
+
+    assert "No jobs found" in result.output
+
+
+def test_fuzzy_matches_short_query(fleet):
+    conn = get_db_connection()
+    matches = fuzzy_matches(conn.cursor(), "us")
+    conn.close()
+    assert [job_id for job_id, _ in matches] == ["win_users"]
+
+
+def test_search_streams_ndjson(runner, fleet):
+    result = runner.invoke(
+        search, ["--bucket-span", "15m", "--limit", "50", "--output", "ndjson"]
+    )
+
+    assert result.exit_code == 0
+    records = [json.loads(line) for line in result.output.splitlines()]
+    assert len(records) == 4
+    assert records[0].keys() == set(search_module.SEARCH_FIELDS)
+    assert {record["bucket_span"] for record in records} == {"15m"}
+
+
+def test_search_streams_tsv_with_scores(runner, fleet):
+    result = runner.invoke(search, ["--fuzzy", "win_usrs", "--output", "tsv"])
+
+    header, *rows = result.output.splitlines()
+    assert header.split("\t")[-1] == "score"
+    assert [row.split("\t")[0] for row in rows] == ["win_users"]
+
+
+def test_search_json_output_without_matches(runner, fleet):
+    result = runner.invoke(search, ["--detector-function", "mean", "--output", "json"])
+
+    assert json.loads(result.output) == []
+
+
+def test_keyset_pagination_visits_every_job_once(runner, fleet):
+    seen, args = [], ["--limit", "4", "--output", "ndjson"]
+    while True:
+        result = runner.invoke(search, args)
+        records = [json.loads(line) for line in result.output.splitlines()]
+        seen += [record["job_id"] for record in records]
+        if len(records) < 4:
+            break
+        last = records[-1]
+        args = ["--limit", "4", "--output", "ndjson"]
+        args += ["--after", f"{last['last_updated']},{last['job_id']}"]
+
+    assert len(seen) == len(set(seen)) == 16
+
+
+def test_table_prints_next_page_cursor(runner, fleet):
+    first = runner.invoke(search, ["--limit", "15"])
+    cursor = first.output.split("--after '")[1].split("'")[0]
+
+    second = runner.invoke(search, ["--limit", "15", "--after", cursor])
+
+    assert len(job_ids(second.output)) == 1
+    assert not job_ids(first.output) & job_ids(second.output)
+    assert "Next page" not in second.output
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ["--page", "2"],
+        ["--fuzzy", "win", "--after", "2024-01-01 00:00:00,win_rare_0"],
+        ["--after", "2024-01-01"],
+    ],
+)
+def test_pagination_usage_errors(runner, fleet, args):
+    result = runner.invoke(search, args)
+
+    assert result.exit_code == 2
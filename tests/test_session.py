@@ -0,0 +1,83 @@
+import json
+
+from click.testing import CliRunner
+from ml_json_cli.cli import cli
+from ml_json_cli.commands.load import load
+from ml_json_cli.db import get_db_connection
+from ml_json_cli.session import Session
+from ml_json_cli.versions import fetch_job
+
+
+def load_job(tmp_path, description):
+    path = tmp_path / "job.json"
+    job = {
+        "job": {
+            "job_id": "win_rare",
+            "description": description,
+            "analysis_config": {
+                "bucket_span": "15m",
+                "detectors": [{"function": "count"}],
+            },
+        }
+    }
+    path.write_text(json.dumps(job), encoding="utf-8")
+    CliRunner().invoke(load, [str(path)])
+
+
+def test_commands_share_the_session_connection():
+    with Session() as session:
+        conn = get_db_connection()
+        conn.close()
+
+        assert conn is session.conn
+        assert conn.execute("SELECT 1").fetchone()[0] == 1
+    assert get_db_connection() is not conn
+
+
+def test_job_cache_hits_until_content_changes(tmp_path):
+    load_job(tmp_path, "first")
+    with Session() as session:
+        job = fetch_job(session.conn, "win_rare")
+        assert fetch_job(session.conn, "win_rare") is job
+        assert (session.hits, session.misses) == (1, 1)
+
+        load_job(tmp_path, "second")
+
+        assert fetch_job(session.conn, "win_rare")["description"] == "second"
+        assert fetch_job(session.conn, "win_rare", 1)["description"] == "first"
+        assert fetch_job(session.conn, "missing") is None
+
+
+def test_run_rolls_back_and_records_timings():
+    with Session() as session:
+
+        def failing():
+            session.conn.execute("DELETE FROM jobs")
+            raise RuntimeError
+
+        try:
+            session.run("undo", failing)
+        except RuntimeError:
+            pass
+
+        assert not session.conn.in_transaction
+        assert session.stats()["commands"][0][:2] == ("undo", 1)
+
+
+def test_shell_keeps_running_and_reports_stats(tmp_path):
+    load_job(tmp_path, "first")
+    load_job(tmp_path, "second")
+    commands = [
+        "compare --job-id win_rare",
+        "compare --job-id win_rare",
+        "history --bogus",
+        ".stats",
+        "exit",
+    ]
+
+    result = CliRunner().invoke(cli, ["shell"], input="\n".join(commands) + "\n")
+
+    assert result.exit_code == 0
+    assert "No such option" in result.output
+    assert "Job cache: 2 hit(s), 2 miss(es)" in result.output
+    assert "Exiting mlcli" in result.output
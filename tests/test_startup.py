@@ -0,0 +1,70 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+# Cumulative import time of ml_json_cli.cli, in microseconds. Eager command
+# imports cost about 370ms; the lazy group needs little more than click.
+IMPORT_BUDGET_US = 150_000
+
+HEAVY_MODULES = (
+    "argcomplete",
+    "deepdiff",
+    "fuzzywuzzy",
+    "ijson",
+    "numpy",
+    "rapidfuzz",
+    "readline",
+    "rich",
+)
+
+
+def run_python(*args, cwd):
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    return subprocess.run(
+        [sys.executable, *args],
+        capture_output=True,
+        text=True,
+        cwd=cwd,
+        env=env,
+        check=True,
+    )
+
+
+def import_time_us(cwd):
+    result = run_python("-X", "importtime", "-c", "import ml_json_cli.cli", cwd=cwd)
+    for line in result.stderr.splitlines():
+        _, cumulative, name = line.split("|")
+        if name.strip() == "ml_json_cli.cli":
+            return int(cumulative)
+    raise AssertionError(result.stderr)
+
+
+def test_import_within_budget(tmp_path):
+    # Best of three, so a busy machine does not fail the run.
+    best = min(import_time_us(tmp_path) for _ in range(3))
+
+    assert best < IMPORT_BUDGET_US
+
+
+def test_import_does_not_touch_the_database(tmp_path):
+    cwd = tmp_path / "cwd"
+    cwd.mkdir()
+
+    run_python("-c", "import ml_json_cli.cli", cwd=cwd)
+
+    assert not (cwd / "ml_jobs.db").exists()
+
+
+def test_history_skips_heavy_imports(tmp_path):
+    script = (
+        "import sys\n"
+        "from ml_json_cli.cli import cli\n"
+        "cli.main(args=['history', '--job-id', 'win_rare'], standalone_mode=False)\n"
+        f"print(sorted(set({HEAVY_MODULES!r}) & set(sys.modules)))\n"
+    )
+
+    result = run_python("-c", script, cwd=tmp_path)
+
+    assert result.stdout.splitlines()[-1] == "[]"
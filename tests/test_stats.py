@@ -0,0 +1,118 @@
+import json
+
+import numpy as np
+import pytest
+from click.testing import CliRunner
+from rich.console import Console
+from ml_json_cli import analytics
+from ml_json_cli.commands import stats as stats_module
+from ml_json_cli.commands.load import load
+from ml_json_cli.commands.stats import stats
+from ml_json_cli.commands.storage import storage
+from ml_json_cli.db import get_db_connection
+from ml_json_cli.json_parser import parse_duration, parse_memory
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    monkeypatch.setattr(stats_module, "console", Console(width=200))
+    return CliRunner()
+
+
+def make_job(job_id, groups, bucket_span, memory, created_by):
+    return {
+        "job": {
+            "job_id": job_id,
+            "groups": groups,
+            "analysis_config": {
+                "bucket_span": bucket_span,
+                "detectors": [{"function": "rare"}],
+            },
+            "analysis_limits": {"model_memory_limit": memory},
+            "custom_settings": {"created_by": created_by},
+        }
+    }
+
+
+@pytest.fixture
+def fleet(runner, tmp_path):
+    jobs = [
+        make_job("win_1", ["security", "windows"], "15m", "64mb", "siem"),
+        make_job("win_2", ["windows"], "1h", "1gb", "siem"),
+        make_job("linux_1", ["security"], "15m", "32mb", "apm"),
+        make_job("linux_2", [], "15m", "bogus", "apm"),
+    ]
+    path = tmp_path / "fleet.json"
+    path.write_text(json.dumps(jobs), encoding="utf-8")
+    # Stored before validation existed, e.g. the unparseable memory limit.
+    runner.invoke(load, [str(path), "--no-validate"])
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [("15mb", 15 * 1024**2), ("1GB", 1024**3), (32, 32 * 1024**2), ("x", None)],
+)
+def test_parse_memory(value, expected):
+    assert parse_memory(value) == expected
+
+
+@pytest.mark.parametrize(
+    "value, expected", [("12m", 720), ("1h", 3600), ("500ms", 0.5), ("15", None)]
+)
+def test_parse_duration(value, expected):
+    assert parse_duration(value) == expected
+
+
+def test_group_by_aggregates(fleet):
+    conn = get_db_connection()
+    columns = analytics.explode_groups(analytics.extract_columns(conn))
+    conn.close()
+
+    labels, results = analytics.group_by(
+        columns, ["group"], "model_memory_bytes", analytics.AGGREGATES
+    )
+
+    assert labels == [("-",), ("security",), ("windows",)]
+    assert results["count"].tolist() == [1, 2, 2]
+    assert np.isnan(results["sum"][0])
+    assert results["sum"][1] == 96 * 1024**2
+    assert results["max"][2] == 1024**3
+    assert results["min"][2] == 64 * 1024**2
+
+
+def test_stats_command(runner, fleet):
+    result = runner.invoke(
+        stats,
+        ["--by", "created_by", "--by", "bucket_span", "--agg", "count", "--agg", "sum"],
+    )
+
+    assert result.exit_code == 0
+    rows = [line.split() for line in result.output.splitlines() if "│" in line]
+    assert ["│", "apm", "│", "15m", "│", "2", "│", "32.0", "MiB", "│"] in rows
+    assert ["│", "siem", "│", "1h", "│", "1", "│", "1.0", "GiB", "│"] in rows
+
+
+def test_stats_reads_delta_versions(runner, tmp_path):
+    runner.invoke(storage, ["--mode", "delta"])
+    path = tmp_path / "job.json"
+    for span in ("15m", "30m", "1h"):
+        path.write_text(
+            json.dumps(make_job("win_1", [], span, "64mb", "siem")), encoding="utf-8"
+        )
+        runner.invoke(load, [str(path)])
+
+    conn = get_db_connection()
+    columns = analytics.extract_columns(conn, "versions")
+    conn.close()
+
+    assert columns["bucket_span_seconds"].tolist() == [900, 1800]
+
+
+def test_stats_parquet_requires_pyarrow(runner, fleet, tmp_path, monkeypatch):
+    def missing(columns, path):
+        raise ImportError("No module named 'pyarrow'")
+
+    monkeypatch.setattr(analytics, "write_parquet", missing)
+    result = runner.invoke(stats, ["--parquet", str(tmp_path / "jobs.parquet")])
+
+    assert "pip install ml-json-cli[parquet]" in result.output
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+from ml_json_cli.commands.compare import compare
+from ml_json_cli.commands.drift import drift
+from ml_json_cli.commands.load import load
+from ml_json_cli.commands.merge import merge
+from ml_json_cli.commands.storage import storage
+from ml_json_cli.commands.undo import undo
+from ml_json_cli.db import get_db_connection
+from ml_json_cli.versions import read_version
+from conftest import valid_job
+
+QUERY = {"terms": {"event.code": [str(i) for i in range(200)]}}
+
+
+@pytest.fixture
+def runner():
+    return CliRunner()
+
+
+def load_history(runner, tmp_path, spans):
+    path = tmp_path / "job.json"
+    for span in spans:
+        job = valid_job(
+            "win_rare",
+            span,
+            description="Rare processes",
+            datafeed_config={"query": QUERY},
+        )
+        path.write_text(json.dumps({"job": job}), encoding="utf-8")
+        runner.invoke(load, [str(path)])
+
+
+def history(conn):
+    return {
+        row["version"]: (
+            row["encoding"],
+            json.loads(
+                read_version(conn, "win_rare", row["version"])["analysis_config"]
+            )["bucket_span"],
+        )
+        for row in conn.execute(
+            "SELECT version, encoding FROM job_versions WHERE job_id = 'win_rare'"
+        )
+    }
+
+
+SPANS = [f"{minutes}m" for minutes in range(1, 14)]
+
+
+def test_delta_mode_snapshots_every_interval(runner, tmp_path):
+    runner.invoke(storage, ["--mode", "delta", "--snapshot-interval", "5"])
+    load_history(runner, tmp_path, SPANS)
+
+    conn = get_db_connection()
+    versions = history(conn)
+    raw = conn.execute(
+        "SELECT COUNT(*) FROM job_versions WHERE analysis_config IS NOT NULL"
+    ).fetchone()[0]
+    conn.close()
+
+    assert len(versions) == 12
+    assert [v for v, (encoding, _) in versions.items() if encoding == "snapshot"] == [
+        1,
+        6,
+        11,
+    ]
+    assert [span for _, span in versions.values()] == SPANS[:-1]
+    assert raw == 0
+
+
+def test_rewrite_round_trips(runner, tmp_path):
+    load_history(runner, tmp_path, SPANS)
+    conn = get_db_connection()
+    before = {v: span for v, (_, span) in history(conn).items()}
+
+    runner.invoke(storage, ["--mode", "delta", "--rewrite"])
+    delta = history(conn)
+    runner.invoke(storage, ["--mode", "full", "--rewrite"])
+    full = history(conn)
+    conn.close()
+
+    assert {v: span for v, (_, span) in delta.items()} == before
+    assert {encoding for encoding, _ in delta.values()} == {"snapshot", "delta"}
+    assert {v: span for v, (_, span) in full.items()} == before
+    assert {encoding for encoding, _ in full.values()} == {None}
+
+
+def test_commands_read_delta_versions(runner, tmp_path):
+    runner.invoke(storage, ["--mode", "delta"])
+    load_history(runner, tmp_path, ["15m", "30m", "1h", "30m"])
+
+    compared = runner.invoke(compare, ["--job-id", "win_rare", "--show-json"])
+    drifted = runner.invoke(drift, ["--output", "-", "--workers", "1"])
+    runner.invoke(undo, ["win_rare"])
+    merged = runner.invoke(merge, ["--strategy", "earliest"])
+
+    assert json.loads(compared.output)[0]["old"] == "1h"
+    assert '"old": "1h", "value": "30m"' in drifted.output
+    assert "Merged 1 jobs" in merged.output
+    conn = get_db_connection()
+    current = conn.execute("SELECT analysis_config FROM jobs").fetchone()[0]
+    conn.close()
+    assert json.loads(current)["bucket_span"] == "15m"
+
+
+def test_storage_reports_usage(runner):
+    result = runner.invoke(storage, [])
+
+    assert result.exit_code == 0
+    assert "Version storage: full" in result.output
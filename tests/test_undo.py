@@ -0,0 +1,57 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+from ml_json_cli.commands.load import load
+from ml_json_cli.commands.undo import undo
+from ml_json_cli.db import get_db_connection
+from conftest import valid_job
+
+
+@pytest.fixture
+def runner():
+    return CliRunner()
+
+
+def load_job(runner, tmp_path, bucket_span):
+    path = tmp_path / f"{bucket_span}.json"
+    path.write_text(
+        json.dumps({"job": valid_job("a", bucket_span)}),
+        encoding="utf-8",
+    )
+    runner.invoke(load, [str(path)])
+
+
+def bucket_span_and_counter():
+    conn = get_db_connection()
+    row = conn.execute(
+        "SELECT analysis_config, current_version FROM jobs WHERE job_id = 'a'"
+    ).fetchone()
+    conn.close()
+    return json.loads(row["analysis_config"])["bucket_span"], row["current_version"]
+
+
+def test_undo_restores_previous_version(runner, tmp_path):
+    load_job(runner, tmp_path, "15m")
+    load_job(runner, tmp_path, "30m")
+
+    result = runner.invoke(undo, ["a"])
+
+    assert "Successfully rolled back a to version 1" in result.output
+    assert bucket_span_and_counter() == ("15m", 0)
+
+
+def test_load_after_undo_reuses_version_number(runner, tmp_path):
+    load_job(runner, tmp_path, "15m")
+    load_job(runner, tmp_path, "30m")
+    runner.invoke(undo, ["a"])
+
+    load_job(runner, tmp_path, "45m")
+
+    assert bucket_span_and_counter() == ("45m", 1)
+
+
+def test_undo_without_history(runner):
+    result = runner.invoke(undo, ["missing"])
+
+    assert "No previous version found" in result.output
@@ -0,0 +1,108 @@
+import json
+import os
+
+import pytest
+from click.testing import CliRunner
+from ml_json_cli.commands.load import load
+from ml_json_cli.commands.validate import validate
+from ml_json_cli.validation import validate_job
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "sample.json")
+
+
+@pytest.fixture
+def runner():
+    return CliRunner()
+
+
+def make_job(job_id, **config):
+    analysis_config = {"bucket_span": "15m", "detectors": [{"function": "count"}]}
+    analysis_config.update(config)
+    return {
+        "job": {"job_id": job_id, "analysis_config": analysis_config},
+        "datafeed": {"job_id": job_id, "indices": ["logs-*"]},
+    }
+
+
+def write_json(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_text(json.dumps(data), encoding="utf-8")
+    return str(path)
+
+
+def test_validate_job_accepts_sample():
+    with open(SAMPLE, encoding="utf-8") as f:
+        assert validate_job(json.load(f)) == []
+
+
+def test_validate_job_reports_schema_errors():
+    assert validate_job({"job": {"job_id": "a"}}) == [
+        "job must contain ['analysis_config'] properties"
+    ]
+    (error,) = validate_job(make_job("a", detectors=[{"function": "average"}]))
+    assert error.startswith("job.analysis_config.detectors[0].function must be one")
+
+
+def test_validate_job_reports_every_semantic_error():
+    document = make_job(
+        "a",
+        bucket_span="90ms",
+        detectors=[
+            {"function": "mean", "detector_index": 0},
+            {"function": "count", "field_name": "bytes", "detector_index": 0},
+        ],
+    )
+    document["datafeed"]["job_id"] = "b"
+
+    assert validate_job(document) == [
+        "job.analysis_config.bucket_span: '90ms' is not a whole number of "
+        "seconds, e.g. '15m'",
+        "job.analysis_config.detectors[0]: function 'mean' requires field_name",
+        "job.analysis_config.detectors[1]: function 'count' does not take "
+        "field_name",
+        "job.analysis_config.detectors[1]: duplicate detector_index 0",
+        "datafeed.job_id: 'b' does not match job_id 'a'",
+    ]
+
+
+def test_validate_job_accepts_aliases_and_implicit_indexes():
+    detectors = [
+        {"function": "count", "detector_index": 1},
+        {"function": "count"},
+        {"function": "high_avg", "field_name": "bytes"},
+        {"function": "nzc"},
+    ]
+
+    assert validate_job(make_job("a", detectors=detectors)) == []
+    assert validate_job(make_job("a", detectors=[{"function": "dc"}])) == [
+        "job.analysis_config.detectors[0]: function 'dc' requires field_name"
+    ]
+
+
+def test_validate_files_lists_invalid_jobs(runner, tmp_path):
+    good = write_json(tmp_path, "good.json", [make_job("a"), make_job("b")])
+    bad = write_json(tmp_path, "bad.json", [make_job("c", bucket_span="soon")])
+    broken = tmp_path / "broken.json"
+    broken.write_text("[{", encoding="utf-8")
+
+    result = runner.invoke(validate, [good, bad, str(broken), "--workers", "2"])
+
+    output = " ".join(result.output.split())
+    assert result.exit_code == 1
+    assert f"c ({bad}): - job.analysis_config.bucket_span: 'soon'" in output
+    assert f"Failed to parse {broken}" in output
+    assert "Validated 3 job(s): 1 invalid, 1 file(s) failed" in output
+
+
+def test_validate_stored_jobs(runner):
+    runner.invoke(load, [SAMPLE])
+
+    result = runner.invoke(validate, ["--db", "--workers", "1"])
+
+    assert result.exit_code == 0, result.output
+    assert "Validated 1 job(s): 0 invalid" in result.output
+
+
+def test_validate_needs_paths_or_db(runner):
+    assert runner.invoke(validate, []).exit_code == 2
+    assert runner.invoke(validate, ["--db", SAMPLE]).exit_code == 2